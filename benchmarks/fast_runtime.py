@@ -0,0 +1,142 @@
+"""Standard library vs fast runtime: backup JSON round-trips, health response encoding and event loop overhead.
+
+Usage:
+    python -m benchmarks.fast_runtime [members]
+
+Columns for orjson and uvloop are skipped when the packages are not installed.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+LEAGUES = ['Bronze', 'Silver', 'Gold', 'Platinum', 'Diamond', 'Champion']
+REPEAT = 5
+
+
+def backup_payload(members: int):
+    now = datetime.utcnow()
+    return {
+        'config': {'guild_id': 900000000000000001, 'clan_tag': 'EBN', 'activity_threshold_days': 7,
+                   'audit_log_enabled': True, 'rate_limits': {'purge': {'user': [3, 60]}}},
+        'members': [
+            {'id': i, 'guild_id': 900000000000000001, 'user_id': 100000000000000000 + i,
+             'username': f"pilot_{i}", 'clan_rank': f"R{i % 5 + 1}", 'hangar_power': 1000 + i % 90000,
+             'league': LEAGUES[i % len(LEAGUES)], 'last_active': now - timedelta(minutes=i),
+             'is_inactive': i % 7 == 0, 'joined_at': now - timedelta(days=i % 365), 'updated_at': now}
+            for i in range(members)
+        ],
+        'role_mappings': [{'discord_role_id': 800000000000000000 + i, 'clan_rank': f"R{i + 1}"} for i in range(5)],
+        'timestamp': now.isoformat()
+    }
+
+
+def health_payload():
+    histogram = {'count': 1200, 'p50_ms': 12.5, 'p95_ms': 80.1, 'p99_ms': 240.7,
+                 'buckets': {str(bound): bound * 3 for bound in (5, 10, 25, 50, 100, 250, 500, 1000, 2500)}}
+    return {
+        'commands': {f"command-{i}": {'total': histogram, 'db': histogram, 'discord': histogram} for i in range(45)},
+        'rate_limits': {'buckets': 5231, 'limited': 17},
+        'runtime': {'event_loop': 'asyncio', 'json': 'json'}
+    }
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, default=str)
+
+
+def orjson_dumps(data):
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def best_of(func, *args, repeat: int = REPEAT) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_json(members: int):
+    payload = backup_payload(members)
+    encoders = [('json', stdlib_dumps, json.loads)]
+    if orjson is not None:
+        encoders.append(('orjson', orjson_dumps, orjson.loads))
+    
+    print(f"Backup payload, {members} members")
+    for name, dumps, loads in encoders:
+        text = dumps(payload)
+        encode = best_of(dumps, payload)
+        decode = best_of(loads, text)
+        print(f"  {name:<8} encode {encode * 1000:>8.1f} ms  decode {decode * 1000:>8.1f} ms  "
+              f"{len(text) / 2**20:>6.1f} MiB")
+    
+    payload = health_payload()
+    iterations = 2000
+    print(f"Health response, {iterations} encodes")
+    for name, dumps, _ in encoders:
+        elapsed = best_of(lambda: [dumps(payload) for _ in range(iterations)])
+        print(f"  {name:<8} {elapsed / iterations * 1e6:>8.1f} us/response")
+
+
+async def ping_pong(rounds: int):
+    # Two tasks hand a value back and forth through queues, like workers draining the event pipeline.
+    requests, replies = asyncio.Queue(), asyncio.Queue()
+    
+    async def echo():
+        for _ in range(rounds):
+            replies.put_nowait(await requests.get())
+    
+    worker = asyncio.create_task(echo())
+    for i in range(rounds):
+        requests.put_nowait(i)
+        await replies.get()
+    await worker
+
+
+async def fan_out(tasks: int):
+    async def job(i):
+        await asyncio.sleep(0)
+        return i
+    
+    await asyncio.gather(*(job(i) for i in range(tasks)))
+
+
+def bench_loop():
+    loops = [('asyncio', asyncio.new_event_loop)]
+    if uvloop is not None:
+        loops.append(('uvloop', uvloop.new_event_loop))
+    
+    rounds, tasks = 100_000, 50_000
+    print(f"Event loop, {rounds} queue round trips / {tasks} gathered tasks")
+    for name, factory in loops:
+        with asyncio.Runner(loop_factory=factory) as runner:
+            pong = best_of(lambda: runner.run(ping_pong(rounds)), repeat=3)
+            gather = best_of(lambda: runner.run(fan_out(tasks)), repeat=3)
+        print(f"  {name:<8} round trip {pong / rounds * 1e6:>6.2f} us  task {gather / tasks * 1e6:>6.2f} us")
+
+
+def main():
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    bench_json(members)
+    bench_loop()
+
+
+if __name__ == "__main__":
+    main()
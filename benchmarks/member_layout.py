@@ -0,0 +1,166 @@
+"""Row width and scan times of the members table before and after rank/league moved to lookup codes.
+
+The old layout is rebuilt next to the current one as `members_wide`, both are filled with the same rows,
+and each is queried the way the bot does. Run it against a scratch database.
+
+Usage:
+    python -m benchmarks.member_layout sqlite [rows]
+    DATABASE_URL=postgres://... python -m benchmarks.member_layout postgres [rows]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import MEMBER_COLUMNS, MEMBERS_TABLE, DatabaseManager
+from sqlite_backend import SQLiteDatabaseManager
+
+
+GUILD_IDS = [900000000000000001 + i for i in range(5)]
+LEAGUES = ['Bronze', 'Silver', 'Gold', 'Platinum', 'Diamond', 'Champion']
+ITERATIONS = 50
+
+WIDE_TABLE = """
+CREATE TABLE members_wide (
+    id {id_type},
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    username VARCHAR(255),
+    clan_rank VARCHAR(10),
+    hangar_power INTEGER,
+    league VARCHAR(50),
+    last_active TIMESTAMP,
+    is_inactive BOOLEAN DEFAULT FALSE,
+    joined_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    UNIQUE(guild_id, user_id)
+);
+CREATE INDEX idx_members_wide_guild_id ON members_wide(guild_id);
+CREATE INDEX idx_members_wide_guild_rank_username ON members_wide(guild_id, clan_rank, username, user_id);
+CREATE INDEX idx_members_wide_guild_league_username ON members_wide(guild_id, league, username, user_id);
+CREATE INDEX idx_members_wide_guild_inactive_username ON members_wide(guild_id, username, user_id) WHERE is_inactive;
+"""
+
+WIDE_COLUMNS = "id, guild_id, user_id, username, clan_rank, hangar_power, league, last_active, is_inactive, joined_at"
+
+QUERIES = {
+    'inactivity sweep': (
+        "SELECT id FROM members_wide WHERE guild_id = $1 AND last_active < $2 AND NOT is_inactive",
+        "SELECT id FROM members WHERE guild_id = $1 AND last_active < $2 AND NOT is_inactive",
+        lambda guild_id, cutoff: (guild_id, cutoff)
+    ),
+    'rank filter': (
+        "SELECT COUNT(*) FROM members_wide WHERE guild_id = $1 AND clan_rank = $2",
+        "SELECT COUNT(*) FROM members WHERE guild_id = $1 AND rank_id = (SELECT id FROM member_ranks WHERE name = $2)",
+        lambda guild_id, cutoff: (guild_id, "R3")
+    ),
+    'active page': (
+        f"""SELECT {WIDE_COLUMNS} FROM members_wide WHERE guild_id = $1 AND NOT is_inactive
+            ORDER BY username, user_id LIMIT 10""",
+        f"""SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1 AND NOT is_inactive
+            ORDER BY username, user_id LIMIT 10""",
+        lambda guild_id, cutoff: (guild_id,)
+    ),
+    'full roster': (
+        f"SELECT {WIDE_COLUMNS} FROM members_wide WHERE guild_id = $1",
+        f"SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1",
+        lambda guild_id, cutoff: (guild_id,)
+    ),
+}
+
+
+def member_rows(rows: int):
+    now = datetime.utcnow()
+    per_guild = rows // len(GUILD_IDS)
+    for guild_id in GUILD_IDS:
+        for i in range(per_guild):
+            last_active = now - timedelta(hours=i % (60 * 24))
+            yield (guild_id, 100000000000000000 + i, f"pilot_{i}", f"R{i % 5 + 1}", 1000 + i % 90000,
+                   LEAGUES[i % len(LEAGUES)], last_active, last_active < now - timedelta(days=45), now - timedelta(days=i % 365))
+
+
+async def populate(db: DatabaseManager, backend: str, rows: int):
+    data = list(member_rows(rows))
+    id_type = 'INTEGER PRIMARY KEY AUTOINCREMENT' if backend == 'sqlite' else 'SERIAL PRIMARY KEY'
+    ranks = {name: await db.member_codes['clan_rank'].code(name) for name in {row[3] for row in data}}
+    leagues = {name: await db.member_codes['league'].code(name) for name in LEAGUES}
+    async with db.acquire(write=True) as conn:
+        await conn.execute("DROP TABLE IF EXISTS members_wide")
+        await conn.execute(WIDE_TABLE.format(id_type=id_type))
+        for guild_id in GUILD_IDS:
+            await conn.execute("DELETE FROM members WHERE guild_id = $1", guild_id)
+        await conn.executemany(
+            """INSERT INTO members_wide (guild_id, user_id, username, clan_rank, hangar_power, league,
+                                         last_active, is_inactive, joined_at, updated_at)
+               VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, CURRENT_TIMESTAMP)""",
+            data
+        )
+        await conn.executemany(
+            """INSERT INTO members (guild_id, user_id, username, rank_id, hangar_power, league_id,
+                                    last_active, is_inactive, joined_at)
+               VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)""",
+            [(g, u, n, ranks[r], p, leagues[l], a, i, j) for g, u, n, r, p, l, a, i, j in data]
+        )
+        await conn.execute("ANALYZE")
+
+
+async def row_widths(db: DatabaseManager, backend: str):
+    async with db.acquire() as conn:
+        if backend == 'sqlite':
+            # dbstat sums the record payload stored in each table's leaf pages.
+            query = """SELECT CAST(SUM(payload) AS REAL) / SUM(ncell), SUM(pgsize)
+                       FROM dbstat WHERE name = $1 AND pagetype = 'leaf'"""
+            return [tuple(await conn.fetchrow(query, table)) for table in ('members_wide', 'members')]
+        return [
+            tuple(await conn.fetchrow(
+                f"""SELECT AVG(pg_column_size(t.*))::float, pg_relation_size('{table}')
+                    FROM {table} t WHERE guild_id = ANY($1::bigint[])""",
+                GUILD_IDS
+            ))
+            for table in ('members_wide', 'members')
+        ]
+
+
+async def time_query(db: DatabaseManager, query: str, args) -> float:
+    async with db.acquire() as conn:
+        await conn.fetch(query, *args)
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await conn.fetch(query, *args)
+        return (time.perf_counter() - start) / ITERATIONS
+
+
+async def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'sqlite'
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    if backend == 'sqlite':
+        db = SQLiteDatabaseManager(os.path.join(tempfile.mkdtemp(), 'layout.db'))
+    else:
+        db = DatabaseManager()
+    
+    await db.connect()
+    try:
+        await populate(db, backend, rows)
+        print(f"{backend}: {rows} members across {len(GUILD_IDS)} guilds")
+        (wide_row, wide_size), (compact_row, compact_size) = await row_widths(db, backend)
+        print(f"{'row width':<18} {wide_row:>8.1f} B  -> {compact_row:>8.1f} B   "
+              f"table {wide_size / 2**20:.1f} MiB -> {compact_size / 2**20:.1f} MiB")
+        
+        cutoff = datetime.utcnow() - timedelta(days=30)
+        for name, (wide_query, compact_query, args) in QUERIES.items():
+            arguments = args(GUILD_IDS[0], cutoff)
+            before = await time_query(db, wide_query, arguments)
+            after = await time_query(db, compact_query, arguments)
+            print(f"{name:<18} {before * 1000:>8.2f} ms -> {after * 1000:>8.2f} ms")
+    finally:
+        async with db.acquire(write=True) as conn:
+            await conn.execute("DROP TABLE IF EXISTS members_wide")
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
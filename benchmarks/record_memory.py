@@ -0,0 +1,85 @@
+"""Retained memory of a 100k-row member export as dicts, slotted records, columns and the roster mirror.
+
+Usage:
+    python -m benchmarks.record_memory [rows]
+"""
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import MEMBER_COLUMNS, MEMBERS_TABLE
+from records import MemberRecord
+from sqlite_backend import SQLiteDatabaseManager
+
+
+GUILD_ID = 900000000000000001
+LEAGUES = ['Bronze', 'Silver', 'Gold', 'Platinum', 'Diamond', 'Champion']
+
+
+async def populate(db: SQLiteDatabaseManager, rows: int):
+    now = datetime.utcnow()
+    ranks = [await db.member_codes['clan_rank'].code(f"R{rank}") for rank in range(1, 6)]
+    leagues = [await db.member_codes['league'].code(league) for league in LEAGUES]
+    async with db.acquire(write=True) as conn:
+        await conn.executemany(
+            """INSERT INTO members (guild_id, user_id, username, rank_id, hangar_power, league_id, last_active, joined_at)
+               VALUES ($1, $2, $3, $4, $5, $6, $7, $8)""",
+            [(GUILD_ID, 100000000000000000 + i, f"pilot_{i}", ranks[i % 5], 1000 + i % 90000,
+              leagues[i % len(leagues)], now - timedelta(minutes=i), now - timedelta(days=i % 365))
+             for i in range(rows)]
+        )
+
+
+async def fetch_dicts(db: SQLiteDatabaseManager):
+    async with db.acquire() as conn:
+        rows = await conn.fetch(
+            f"SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1 ORDER BY m.joined_at ASC",
+            GUILD_ID
+        )
+        return [dict(row) for row in rows]
+
+
+async def measure(name: str, func, rows: int):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await func()
+    elapsed = time.perf_counter() - start
+    # Let the loop drop its last handle, which still references the raw rows of the executor future.
+    await asyncio.sleep(0)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {retained / 2**20:>8.1f} MiB retained  {peak / 2**20:>8.1f} MiB peak  "
+          f"{retained / rows:>6.0f} B/row  {elapsed * 1000:>7.0f} ms")
+    del result
+    return retained
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    db = SQLiteDatabaseManager(os.path.join(tempfile.mkdtemp(), 'record_memory.db'))
+    await db.connect()
+    try:
+        await populate(db, rows)
+        print(f"{rows} members, {len(MemberRecord._fields)} columns")
+        baseline = await measure("dict(row)", lambda: fetch_dicts(db), rows)
+        records = await measure("MemberRecord", lambda: db.get_all_members(GUILD_ID), rows)
+        columns = await measure("RecordColumns", lambda: db.get_member_columns(GUILD_ID), rows)
+        await measure("GuildRoster", lambda: db.rosters.get(GUILD_ID), rows)
+        print(f"GuildRoster.memory_bytes() estimate: {db.rosters.stats()[GUILD_ID]['memory_bytes'] / 2**20:.1f} MiB")
+        print(f"records save {1 - records / baseline:.0%}, columns save {1 - columns / baseline:.0%} "
+              f"of the dict baseline")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,290 @@
+"""Conformance checks and micro-benchmarks shared by every storage backend.
+
+Usage:
+    python -m benchmarks.storage_conformance sqlite [path]
+    DATABASE_URL=postgres://... python -m benchmarks.storage_conformance postgres
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import DatabaseManager
+from sqlite_backend import SQLiteDatabaseManager
+
+
+GUILD_ID = 900000000000000001
+OTHER_GUILD_ID = 900000000000000002
+USER_ID = 800000000000000001
+MOD_ID = 800000000000000002
+ROLE_ID = 700000000000000001
+TABLES = ['guild_configs', 'members', 'warnings', 'staff_notes', 'audit_logs', 'role_mappings',
+          'permissions', 'blacklist', 'backups', 'mutes', 'escalation_rules', 'announcements', 'reports']
+
+
+class Conformance:
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.failures = []
+        self.passed = 0
+    
+    def check(self, name: str, condition: bool):
+        if condition:
+            self.passed += 1
+        else:
+            self.failures.append(name)
+            print(f"FAIL {name}")
+    
+    async def cleanup(self):
+        async with self.db.acquire(write=True) as conn:
+            for table in TABLES:
+                await conn.execute(f"DELETE FROM {table} WHERE guild_id IN ($1, $2)", GUILD_ID, OTHER_GUILD_ID)
+        self.db.rosters.invalidate(GUILD_ID)
+        self.db.rosters.invalidate(OTHER_GUILD_ID)
+    
+    async def run(self):
+        db = self.db
+        await self.cleanup()
+        
+        self.check("missing config is None", await db.get_guild_config(GUILD_ID) is None)
+        await db.create_or_update_guild_config(GUILD_ID, audit_log_enabled=True, activity_threshold_days=7)
+        await db.create_or_update_guild_config(GUILD_ID, clan_tag="EBN")
+        config = await db.get_guild_config(GUILD_ID)
+        self.check("config upsert keeps columns", config['clan_tag'] == "EBN" and config['activity_threshold_days'] == 7)
+        self.check("config booleans are truthy", bool(config['audit_log_enabled']))
+        
+        context = await db.get_command_context(GUILD_ID, USER_ID, "warn")
+        self.check("context without rules", not context['is_blacklisted'] and context['required_roles'] == [])
+        self.check("context carries config", context['config']['clan_tag'] == "EBN")
+        await db.add_permission(GUILD_ID, "warn", ROLE_ID)
+        await db.add_to_blacklist(GUILD_ID, USER_ID, MOD_ID, "spam")
+        context = await db.get_command_context(GUILD_ID, USER_ID, "warn")
+        self.check("context with rules", context['is_blacklisted'] and context['required_roles'] == [ROLE_ID])
+        self.check("get_permissions", await db.get_permissions(GUILD_ID, "warn") == [ROLE_ID])
+        self.check("is_blacklisted", await db.is_blacklisted(GUILD_ID, USER_ID))
+        self.check("remove_from_blacklist", await db.remove_from_blacklist(GUILD_ID, USER_ID))
+        self.check("remove_from_blacklist twice", not await db.remove_from_blacklist(GUILD_ID, USER_ID))
+        context = await db.get_command_context(OTHER_GUILD_ID, USER_ID, "warn")
+        self.check("context for unknown guild", context['config'] is None)
+        
+        first_id = await db.add_warning(GUILD_ID, USER_ID, MOD_ID, "first")
+        await db.add_warnings_bulk(GUILD_ID, [USER_ID, MOD_ID], MOD_ID, "bulk")
+        warnings = await db.get_warnings(GUILD_ID, USER_ID)
+        self.check("get_warnings returns all", len(warnings) == 2)
+        self.check("get_warnings limit", len(await db.get_warnings(GUILD_ID, USER_ID, limit=1)) == 1)
+        self.check("count_warnings", await db.count_warnings(GUILD_ID, USER_ID) == 2)
+        self.check("count_warnings since", await db.count_warnings(GUILD_ID, USER_ID, datetime.utcnow() + timedelta(days=1)) == 0)
+        times = await db.get_warning_times(GUILD_ID, USER_ID, datetime.utcnow() - timedelta(days=1))
+        self.check("get_warning_times", len(times) == 2 and all(isinstance(t, datetime) for t in times))
+        self.check("remove_warning", await db.remove_warning(first_id, GUILD_ID))
+        self.check("remove_warning wrong guild", not await db.remove_warning(first_id, OTHER_GUILD_ID))
+        
+        rule_id = await db.add_escalation_rule(GUILD_ID, 3, 7, "mute", 60)
+        await db.add_escalation_rule(GUILD_ID, 3, 7, "kick")
+        rules = await db.get_escalation_rules(GUILD_ID)
+        self.check("escalation rule upsert", len(rules) == 1 and rules[0]['action'] == "kick")
+        self.check("remove_escalation_rule", await db.remove_escalation_rule(rule_id, GUILD_ID))
+        
+        await db.add_staff_note(GUILD_ID, USER_ID, MOD_ID, "watch this one")
+        notes = await db.get_staff_notes(GUILD_ID, USER_ID)
+        self.check("staff notes", len(notes) == 1 and notes[0]['note'] == "watch this one")
+        
+        await db.add_staff_note(GUILD_ID, MOD_ID, USER_ID, "alt account of a banned spammer, watch closely")
+        await db.add_warning(GUILD_ID, MOD_ID, USER_ID, "posting invite links from an alt account")
+        await db.add_warning(OTHER_GUILD_ID, MOD_ID, USER_ID, "alt account")
+        found, cursor = await db.search_moderation_text(GUILD_ID, "watching")
+        self.check("text search stems words", sorted(r.user_id for r in found if r.kind == 'note') == [USER_ID, MOD_ID]
+                   and cursor is None and '**' in found[0].headline)
+        found, cursor = await db.search_moderation_text(GUILD_ID, "alt account")
+        self.check("text search stays in guild", sorted(r.kind for r in found) == ['note', 'warning']
+                   and all(r.user_id == MOD_ID and isinstance(r.created_at, datetime) for r in found))
+        page, cursor = await db.search_moderation_text(GUILD_ID, "alt account", limit=1)
+        rest, end = await db.search_moderation_text(GUILD_ID, "alt account", after=cursor, limit=1)
+        self.check("text search keyset pages", [r.id for r in page + rest] == [r.id for r in found] and end is None)
+        found, _ = await db.search_moderation_text(GUILD_ID, '"alt account" -invite', kinds=('warning',))
+        self.check("text search phrase and exclusion", found == [])
+        found, _ = await db.search_moderation_text(GUILD_ID, "watch", user_id=USER_ID)
+        self.check("text search user filter", [r.user_id for r in found] == [USER_ID])
+        self.check("text search empty query", await db.search_moderation_text(GUILD_ID, "  ") == ([], None))
+        
+        await db.add_audit_log(GUILD_ID, "warn", MOD_ID, USER_ID, "Reason: test")
+        await db.add_audit_logs_bulk(GUILD_ID, "ban", MOD_ID, [(USER_ID, "a"), (MOD_ID, "b")])
+        logs = await db.get_audit_logs(GUILD_ID, 10)
+        self.check("audit logs", len(logs) == 3 and isinstance(logs[0]['created_at'], datetime))
+        self.check("audit log limit", len(await db.get_audit_logs(GUILD_ID, 2)) == 2)
+        
+        await db.add_member(GUILD_ID, USER_ID, "pilot", clan_rank="R4", hangar_power=1500, league="Gold")
+        await db.add_member(GUILD_ID, USER_ID, "pilot2", hangar_power=1600)
+        member = await db.get_member(GUILD_ID, USER_ID)
+        self.check("member upsert", member['username'] == "pilot2" and member['hangar_power'] == 1600
+                   and member['clan_rank'] == "R4")
+        await db.add_member(GUILD_ID, MOD_ID, "officer", last_active=datetime.utcnow() - timedelta(days=30))
+        self.check("get_all_members", len(await db.get_all_members(GUILD_ID)) == 2)
+        self.check("member record mapping", dict(member)['league'] == "Gold" and member.get('missing') is None
+                   and member.user_id == USER_ID)
+        columns = await db.get_member_columns(GUILD_ID)
+        self.check("get_member_columns", columns.row_count == 2 and list(columns['user_id']) == [USER_ID, MOD_ID]
+                   and columns.row(0)['username'] == "pilot2")
+        self.check("mark_inactive_members", await db.mark_inactive_members(GUILD_ID, 7) == [MOD_ID])
+        await db.update_member_activity(GUILD_ID, MOD_ID)
+        self.check("update_member_activity", not (await db.get_member(GUILD_ID, MOD_ID))['is_inactive'])
+        
+        roster = await db.rosters.get(GUILD_ID)
+        await db.add_member(GUILD_ID, MOD_ID, "officer", clan_rank="R5", hangar_power=900)
+        self.check("roster mirrors writes", [m.user_id for m in roster.query(clan_rank="R5")] == [MOD_ID]
+                   and [m.user_id for m in roster.query(min_power=1000)] == [USER_ID]
+                   and roster.get(USER_ID)['league'] == "Gold")
+        self.check("roster power range", [m.user_id for m in roster.query(min_power=900, max_power=1600)]
+                   == [USER_ID, MOD_ID] and roster.query(max_power=899) == [])
+        
+        version = roster.leaderboard_version
+        self.check("leaderboard order", [m.user_id for m in roster.leaderboard()] == [USER_ID, MOD_ID]
+                   and roster.power_rank(MOD_ID) == 2 and roster.power_rank(USER_ID, "Gold") == 1
+                   and roster.power_rank(MOD_ID, "Gold") is None)
+        await db.update_member_activity(GUILD_ID, USER_ID)
+        self.check("leaderboard version ignores activity", roster.leaderboard_version == version)
+        await db.add_member(GUILD_ID, MOD_ID, "officer", hangar_power=2000, league="Gold")
+        self.check("leaderboard reorders on upsert", roster.leaderboard_version != version
+                   and [m.user_id for m in roster.leaderboard("Gold")] == [MOD_ID, USER_ID])
+        await db.add_member(GUILD_ID, MOD_ID, "officer", hangar_power=900, league=None)
+        
+        found, cursor = await db.search_members(GUILD_ID, name="pilot")
+        self.check("search fuzzy name", [m.user_id for m in found] == [USER_ID] and cursor is None)
+        page, cursor = await db.search_members(GUILD_ID, limit=1)
+        rest, end = await db.search_members(GUILD_ID, after=cursor, limit=1)
+        self.check("search keyset pages", [m['username'] for m in page + rest] == ["officer", "pilot2"] and end is None)
+        found, _ = await db.search_members(GUILD_ID, clan_rank="R5", max_power=1000, inactive=False)
+        self.check("search filters", [m.user_id for m in found] == [MOD_ID])
+        found, _ = await db.search_members(GUILD_ID, league="Gold")
+        self.check("search by league", [m.user_id for m in found] == [USER_ID])
+        found, _ = await db.search_members(GUILD_ID, clan_rank="R9")
+        self.check("search by unknown rank", found == [])
+        
+        await db.add_role_mapping(GUILD_ID, ROLE_ID, "R4")
+        await db.add_role_mapping(GUILD_ID, ROLE_ID, "R5")
+        mappings = await db.get_role_mappings(GUILD_ID)
+        self.check("role mapping upsert", len(mappings) == 1 and mappings[0]['clan_rank'] == "R5")
+        
+        backup_id = await db.create_backup(GUILD_ID, MOD_ID)
+        backup = await db.get_backup(backup_id, GUILD_ID)
+        self.check("backup roundtrip", backup['backup_data']['config']['clan_tag'] == "EBN"
+                   and len(backup['backup_data']['members']) == 2)
+        self.check("backup wrong guild", await db.get_backup(backup_id, OTHER_GUILD_ID) is None)
+        self.check("list backups", [b['id'] for b in await db.get_all_backups(GUILD_ID)] == [backup_id])
+        
+        await db.add_mute(GUILD_ID, USER_ID, MOD_ID, datetime.utcnow() + timedelta(hours=1), "loud")
+        await db.add_mutes_bulk(GUILD_ID, [MOD_ID], MOD_ID, datetime.utcnow() - timedelta(minutes=1), "expired")
+        self.check("is_muted", await db.is_muted(GUILD_ID, USER_ID) and not await db.is_muted(GUILD_ID, MOD_ID))
+        expired = [mute['user_id'] for mute in await db.get_expired_mutes() if mute['guild_id'] == GUILD_ID]
+        self.check("get_expired_mutes", expired == [MOD_ID])
+        
+        announcement_id = await db.create_announcement(GUILD_ID, MOD_ID, None, {'title': "hi"},
+                                                       [('dm', USER_ID), ('channel', ROLE_ID)])
+        due = [d for d in await db.get_due_deliveries(100) if d.announcement_id == announcement_id]
+        self.check("deliveries queued channels first", [d.target_type for d in due] == ['channel', 'dm']
+                   and due[0]['embed'] is not None)
+        await db.update_deliveries([(due[0].id, 'sent', 1, None, None),
+                                    (due[1].id, 'pending', 1, "429", datetime.utcnow() + timedelta(hours=1))])
+        stats = await db.get_delivery_stats(GUILD_ID, announcement_id)
+        self.check("delivery stats", stats[0]['sent'] == 1 and stats[0]['pending'] == 1
+                   and stats[0]['last_delivered_at'] is not None)
+        self.check("retry waits for backoff", all(d.announcement_id != announcement_id
+                                                  for d in await db.get_due_deliveries(100))
+                   and await db.get_next_delivery_time() > datetime.utcnow())
+        
+        dossier = await db.get_moderation_dossier(GUILD_ID, USER_ID)
+        self.check("dossier counts", dossier['warning_count'] == 1 and dossier['note_count'] == 1)
+        self.check("dossier recent", dossier['recent_warnings'][0]['reason'] == "bulk"
+                   and dossier['recent_notes'][0]['note'] == "watch this one")
+        self.check("dossier mute and member", dossier['mute_reason'] == "loud" and dossier['clan_rank'] == "R4")
+        self.check("dossier blacklist", not dossier['is_blacklisted'])
+        
+        history, cursor = await db.get_user_history(GUILD_ID, USER_ID)
+        self.check("history merges sources", sorted(r.kind for r in history) == ['audit', 'mute', 'note', 'warning']
+                   and cursor is None and [r.action for r in history if r.kind == 'audit'] == ["ban"])
+        self.check("history newest first", [r.created_at for r in history] == sorted((r.created_at for r in history), reverse=True)
+                   and isinstance([r for r in history if r.kind == 'mute'][0].expires_at, datetime))
+        pages, cursor = [], None
+        while True:
+            page, cursor = await db.get_user_history(GUILD_ID, USER_ID, before=cursor, limit=1)
+            pages.append(page)
+            if cursor is None:
+                break
+        self.check("history keyset pages", [r for page in pages for r in page] == history and len(pages) == 4)
+        self.check("remove_mute", await db.remove_mute(GUILD_ID, USER_ID))
+        
+        report = await db.create_report(GUILD_ID, ROLE_ID, ROLE_ID + 1, USER_ID, ROLE_ID + 2, ROLE_ID + 3)
+        await db.update_report_count(report.id, 40)
+        found = await db.get_open_report(GUILD_ID, ROLE_ID, ROLE_ID + 1, datetime.utcnow() - timedelta(minutes=5))
+        self.check("open report lookup", found is not None and found.id == report.id and found.report_count == 40
+                   and isinstance(found.created_at, datetime))
+        claimed = await db.claim_report(GUILD_ID, ROLE_ID + 3, MOD_ID)
+        self.check("claim report", claimed is not None and claimed.status == 'claimed' and claimed.claimed_by == MOD_ID
+                   and await db.claim_report(GUILD_ID, ROLE_ID + 3, USER_ID) is None)
+        resolved = await db.resolve_report(GUILD_ID, ROLE_ID + 3, MOD_ID, 41)
+        self.check("resolve report", resolved is not None and resolved.report_count == 41
+                   and await db.resolve_report(GUILD_ID, ROLE_ID + 3, MOD_ID) is None
+                   and await db.get_open_report(GUILD_ID, ROLE_ID, ROLE_ID + 1, datetime.utcnow() - timedelta(minutes=5)) is None)
+        
+        async with db.session("conformance") as session:
+            await db.get_command_context(GUILD_ID, USER_ID, "mute")
+            await db.get_guild_config(GUILD_ID)
+            await db.add_audit_log(GUILD_ID, "mute", MOD_ID, USER_ID)
+        self.check("session caches config", session.configs[GUILD_ID]['clan_tag'] == "EBN" and session.round_trips <= 4)
+        self.check("session stats recorded", db.round_trip_stats['conformance'][0] == 1)
+        
+        await self.cleanup()
+
+
+async def benchmark(db: DatabaseManager, iterations: int = 500):
+    results = {}
+    
+    async def timed(name, func):
+        start = time.perf_counter()
+        for i in range(iterations):
+            await func(i)
+        elapsed = time.perf_counter() - start
+        results[name] = elapsed
+        print(f"{name:<28} {iterations / elapsed:>10.0f} ops/s  {elapsed / iterations * 1e6:>8.0f} us/op")
+    
+    await db.create_or_update_guild_config(GUILD_ID, audit_log_enabled=True)
+    await timed("add_audit_log", lambda i: db.add_audit_log(GUILD_ID, "bench", MOD_ID, USER_ID, str(i)))
+    await timed("get_guild_config", lambda i: db.get_guild_config(GUILD_ID))
+    await timed("get_command_context", lambda i: db.get_command_context(GUILD_ID, USER_ID, "warn"))
+    await timed("add_member", lambda i: db.add_member(GUILD_ID, USER_ID + i, f"user{i}", hangar_power=i))
+    await timed("get_member", lambda i: db.get_member(GUILD_ID, USER_ID + i))
+    await timed("get_audit_logs(50)", lambda i: db.get_audit_logs(GUILD_ID, 50))
+    await timed("search_members(page)", lambda i: db.search_members(GUILD_ID, min_power=100, limit=10))
+    await timed("search_members(name)", lambda i: db.search_members(GUILD_ID, name=f"user{i}", limit=10))
+    await timed("get_moderation_dossier", lambda i: db.get_moderation_dossier(GUILD_ID, USER_ID))
+    return results
+
+
+async def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'sqlite'
+    if backend == 'sqlite':
+        path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.mkdtemp(), 'conformance.db')
+        db = SQLiteDatabaseManager(path)
+    else:
+        db = DatabaseManager()
+    
+    await db.connect()
+    try:
+        suite = Conformance(db)
+        await suite.run()
+        print(f"{backend}: {suite.passed} checks passed, {len(suite.failures)} failed")
+        if suite.failures:
+            sys.exit(1)
+        
+        await benchmark(db)
+        await suite.cleanup()
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,17 +4,27 @@ import os
 import asyncio
 import logging
 from dotenv import load_dotenv
-from database import DatabaseManager
+from db_manager import create_database
 from health_check import HealthCheckServer
+from command_tree import ClanCommandTree
+from utils.cache_policy import CHUNK_GUILDS_AT_STARTUP, MESSAGE_CACHE_SIZE, member_cache_flags
+from utils.delivery import DeliveryQueue
+from utils.events import BLOCK, DROP_OLDEST, EventPipeline
+from utils.logs import setup_logging
+from utils.looplag import LoopLagMonitor
+from utils.offload import offload
+from utils.ratelimit import RateLimiter
+from utils.runtime import run, runtime_info
+from utils.snapshot import StateSnapshot
+from utils.tracing import Tracer
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+EVENT_WORKERS = int(os.getenv('EVENT_WORKERS', '4'))
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '2000'))
+
 
 class ClanBot(commands.Bot):
     def __init__(self):
@@ -26,17 +36,41 @@ class ClanBot(commands.Bot):
         super().__init__(
             command_prefix='!',
             intents=intents,
-            help_command=None
+            help_command=None,
+            tree_cls=ClanCommandTree,
+            chunk_guilds_at_startup=CHUNK_GUILDS_AT_STARTUP,
+            member_cache_flags=member_cache_flags(),
+            max_messages=MESSAGE_CACHE_SIZE or None
         )
         
-        self.db = DatabaseManager()
+        self.db = create_database()
+        self.tracer = Tracer()
+        self.rate_limiter = RateLimiter(self.db)
+        self.snapshot = StateSnapshot(self)
+        self.loop_monitor = LoopLagMonitor()
+        self.reconcile_task = None
+        self.tracer.instrument(self)
         self.health_server = HealthCheckServer(self)
+        self.delivery = DeliveryQueue(self)
+        self.events = EventPipeline(self.db)
+        self.events.register('member_update', self.process_member_update,
+                             workers=EVENT_WORKERS, maxsize=EVENT_QUEUE_SIZE, policy=DROP_OLDEST)
+        # Guild joins are rare and must not be lost, so they apply backpressure instead of dropping.
+        self.events.register('guild_join', self.process_guild_join, workers=1, maxsize=100, policy=BLOCK)
     
     async def setup_hook(self):
+        self.loop_monitor.start()
+        runtime = runtime_info()
+        logger.info(f"Using the {runtime['event_loop']} event loop and {runtime['json']} for JSON")
+        
         logger.info("Connecting to database...")
         await self.db.connect()
         logger.info("Database connected successfully")
         
+        await self.snapshot.restore()
+        if self.snapshot.restored_at is not None:
+            self.reconcile_task = asyncio.create_task(self.snapshot.reconcile())
+        
         logger.info("Loading cogs...")
         cogs = ['cogs.utility', 'cogs.admin', 'cogs.moderation', 'cogs.members']
         for cog in cogs:
@@ -51,6 +85,10 @@ class ClanBot(commands.Bot):
         
         logger.info("Starting background tasks...")
         self.check_expired_mutes.start()
+        self.delivery.start()
+        self.events.start()
+        self.save_snapshot.start()
+        offload.start()
     
     async def on_ready(self):
         logger.info(f"Bot is ready! Logged in as {self.user.name} ({self.user.id})")
@@ -64,6 +102,9 @@ class ClanBot(commands.Bot):
     
     async def on_guild_join(self, guild):
         logger.info(f"Joined new guild: {guild.name} ({guild.id})")
+        await self.events.submit('guild_join', guild.id, guild)
+    
+    async def process_guild_join(self, guild):
         await self.db.create_or_update_guild_config(
             guild.id,
             audit_log_enabled=True,
@@ -72,21 +113,24 @@ class ClanBot(commands.Bot):
     
     async def on_member_update(self, before, after):
         if before.roles != after.roles:
-            config = await self.db.get_guild_config(after.guild.id)
-            if config and config.get('auto_roles_enabled'):
-                role_mappings = await self.db.get_role_mappings(after.guild.id)
-                
-                for mapping in role_mappings:
-                    role = after.guild.get_role(mapping['discord_role_id'])
-                    if role in after.roles and role not in before.roles:
-                        member_data = await self.db.get_member(after.guild.id, after.id)
-                        if member_data:
-                            await self.db.add_member(
-                                after.guild.id,
-                                after.id,
-                                str(after),
-                                clan_rank=mapping['clan_rank']
-                            )
+            await self.events.submit('member_update', after.guild.id, before, after)
+    
+    async def process_member_update(self, before, after):
+        config = await self.db.get_guild_config(after.guild.id)
+        if config and config.get('auto_roles_enabled'):
+            role_mappings = await self.db.get_role_mappings(after.guild.id)
+            
+            for mapping in role_mappings:
+                role = after.guild.get_role(mapping['discord_role_id'])
+                if role in after.roles and role not in before.roles:
+                    member_data = await self.db.get_member(after.guild.id, after.id)
+                    if member_data:
+                        await self.db.add_member(
+                            after.guild.id,
+                            after.id,
+                            str(after),
+                            clan_rank=mapping['clan_rank']
+                        )
     
     @tasks.loop(minutes=5)
     async def check_expired_mutes(self):
@@ -113,11 +157,26 @@ class ClanBot(commands.Bot):
     async def before_check_expired_mutes(self):
         await self.wait_until_ready()
     
+    @tasks.loop(minutes=10)
+    async def save_snapshot(self):
+        try:
+            await self.snapshot.save()
+        except Exception as e:
+            logger.error(f"Error saving state snapshot: {e}")
+    
     async def close(self):
         logger.info("Shutting down bot...")
         self.check_expired_mutes.cancel()
+        self.save_snapshot.cancel()
+        await self.delivery.stop()
+        await self.events.stop()
+        if self.reconcile_task is not None and not self.reconcile_task.done():
+            self.reconcile_task.cancel()
+        await self.save_snapshot()
         await self.health_server.stop()
+        await self.loop_monitor.stop()
         await self.db.close()
+        offload.shutdown()
         await super().close()
 
 
@@ -141,7 +200,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Configured here rather than at import, since offload worker processes re-import this module.
+    log_listener = setup_logging()
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
+    finally:
+        log_listener.stop()
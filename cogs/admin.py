@@ -1,9 +1,19 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from utils.helpers import has_permissions
+from utils.cache_policy import ensure_chunked
+from utils.compliance import check_compliance, sync_compliance_role
+from utils.offload import OffloadError
+from utils.ratelimit import DEFAULT_LIMITS, parse_overrides
 from typing import Optional, Literal
-import json
+import logging
+import re
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_ID_PATTERN = re.compile(r'\b(\d{15,20})\b')
 
 
 class Admin(commands.Cog):
@@ -11,6 +21,12 @@ class Admin(commands.Cog):
         self.bot = bot
         self.db = bot.db
     
+    async def cog_load(self):
+        self.compliance_sweep.start()
+    
+    async def cog_unload(self):
+        self.compliance_sweep.cancel()
+    
     @app_commands.command(name="setup", description="Initialize the bot in this server")
     @app_commands.default_permissions(administrator=True)
     async def setup(self, interaction: discord.Interaction):
@@ -20,25 +36,25 @@ class Admin(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
-        await self.db.create_or_update_guild_config(
-            interaction.guild.id,
-            audit_log_enabled=True,
-            auto_roles_enabled=False,
-            activity_threshold_days=7
-        )
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(
+                interaction.guild.id,
+                audit_log_enabled=True,
+                auto_roles_enabled=False,
+                activity_threshold_days=7
+            )
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "setup",
+                interaction.user.id,
+                details="Bot initialized"
+            )
         
         await interaction.followup.send(
             "✅ Bot setup complete! Default configuration has been initialized.\n"
             "Use `/config view` to see current settings.",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "setup",
-            interaction.user.id,
-            details="Bot initialized"
-        )
     
     config_group = app_commands.Group(name="config", description="Bot configuration commands")
     
@@ -87,6 +103,18 @@ class Admin(commands.Cog):
                 inline=False
             )
         
+        rate_limits = parse_overrides(config.get('rate_limits'))
+        if rate_limits:
+            embed.add_field(
+                name="Rate Limit Overrides",
+                value="\n".join(
+                    f"/{command} ({scope}): " + (f"{uses} per {per_seconds}s" if uses else "unlimited")
+                    for command, scopes in rate_limits.items()
+                    for scope, (uses, per_seconds) in scopes.items()
+                )[:1024],
+                inline=False
+            )
+        
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
     @config_group.command(name="set", description="Set a configuration option")
@@ -106,46 +134,26 @@ class Admin(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
+        settings = {}
         if option == "audit_log":
             enabled = value.lower() in ["true", "enable", "yes", "on"]
-            await self.db.create_or_update_guild_config(
-                interaction.guild.id,
-                audit_log_enabled=enabled
-            )
-            await interaction.followup.send(
-                f"✅ Audit logging {'enabled' if enabled else 'disabled'}.",
-                ephemeral=True
-            )
+            settings['audit_log_enabled'] = enabled
+            message = f"✅ Audit logging {'enabled' if enabled else 'disabled'}."
         
         elif option == "auto_roles":
             enabled = value.lower() in ["true", "enable", "yes", "on"]
-            await self.db.create_or_update_guild_config(
-                interaction.guild.id,
-                auto_roles_enabled=enabled
-            )
-            await interaction.followup.send(
-                f"✅ Auto roles {'enabled' if enabled else 'disabled'}.",
-                ephemeral=True
-            )
+            settings['auto_roles_enabled'] = enabled
+            message = f"✅ Auto roles {'enabled' if enabled else 'disabled'}."
         
         elif option == "activity_threshold":
             try:
                 days = int(value)
                 if days < 1:
                     raise ValueError()
-                await self.db.create_or_update_guild_config(
-                    interaction.guild.id,
-                    activity_threshold_days=days
-                )
-                await interaction.followup.send(
-                    f"✅ Activity threshold set to {days} days.",
-                    ephemeral=True
-                )
+                settings['activity_threshold_days'] = days
+                message = f"✅ Activity threshold set to {days} days."
             except ValueError:
-                await interaction.followup.send(
-                    "❌ Invalid value. Please provide a positive number.",
-                    ephemeral=True
-                )
+                message = "❌ Invalid value. Please provide a positive number."
         
         elif option == "logging_channel":
             try:
@@ -155,25 +163,84 @@ class Admin(commands.Cog):
                     await interaction.followup.send("❌ Channel not found.", ephemeral=True)
                     return
                 
-                await self.db.create_or_update_guild_config(
-                    interaction.guild.id,
-                    logging_channel_id=channel_id
-                )
-                await interaction.followup.send(
-                    f"✅ Logging channel set to {channel.mention}.",
-                    ephemeral=True
-                )
+                settings['logging_channel_id'] = channel_id
+                message = f"✅ Logging channel set to {channel.mention}."
             except ValueError:
-                await interaction.followup.send(
-                    "❌ Invalid channel ID or mention.",
+                message = "❌ Invalid channel ID or mention."
+        
+        async with self.db.transaction():
+            if settings:
+                await self.db.create_or_update_guild_config(interaction.guild.id, **settings)
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "config_change",
+                interaction.user.id,
+                details=f"Changed {option} to {value}"
+            )
+        
+        await interaction.followup.send(message, ephemeral=True)
+    
+    @config_group.command(name="rate-limit", description="Override how often a command may be used")
+    @app_commands.describe(
+        command="Command name, e.g. echo or clan message",
+        scope="Limit each user separately or the whole server together",
+        uses="Uses allowed per window (0 disables the limit, leave empty to restore the default)",
+        per_seconds="Window length in seconds"
+    )
+    async def config_rate_limit(
+        self,
+        interaction: discord.Interaction,
+        command: str,
+        scope: Literal["user", "guild"],
+        uses: Optional[app_commands.Range[int, 0, 1000]] = None,
+        per_seconds: Optional[app_commands.Range[int, 1, 86400]] = None
+    ):
+        if not await has_permissions(self.db, interaction, "config"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        command = command.strip().lstrip('/').lower()
+        if self.bot.tree.get_command(command.split(' ')[0]) is None:
+            await interaction.response.send_message(f"❌ Unknown command `/{command}`.", ephemeral=True)
+            return
+        
+        config = await self.db.get_guild_config(interaction.guild.id)
+        overrides = parse_overrides(config.get('rate_limits') if config else None)
+        scopes = overrides.setdefault(command, {})
+        if uses is None:
+            scopes.pop(scope, None)
+            if not scopes:
+                del overrides[command]
+        else:
+            default = DEFAULT_LIMITS.get(command, {}).get(scope)
+            if per_seconds is None and default is None and uses:
+                await interaction.response.send_message(
+                    "❌ This command has no default window; please provide `per_seconds`.",
                     ephemeral=True
                 )
+                return
+            scopes[scope] = (uses, per_seconds or (default[1] if default else 1))
         
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "config_change",
-            interaction.user.id,
-            details=f"Changed {option} to {value}"
+        limit = overrides.get(command, {}).get(scope) or DEFAULT_LIMITS.get(command, {}).get(scope)
+        if limit is None or limit[0] == 0:
+            description = "no limit"
+        else:
+            description = f"{limit[0]} use(s) per {limit[1]}s"
+        
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(interaction.guild.id, rate_limits=overrides)
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "config_change",
+                    interaction.user.id,
+                    details=f"Rate limit for /{command} ({scope}) set to {description}"
+                )
+        self.bot.rate_limiter.set_overrides(interaction.guild.id, overrides)
+        
+        await interaction.response.send_message(
+            f"✅ `/{command}` is now limited to {description} per {scope}.",
+            ephemeral=True
         )
     
     clan_group = app_commands.Group(name="clan", description="Clan management commands")
@@ -185,63 +252,108 @@ class Admin(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        await self.db.create_or_update_guild_config(
-            interaction.guild.id,
-            clan_tag=tag
-        )
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(
+                interaction.guild.id,
+                clan_tag=tag
+            )
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "clan_tag_change",
+                interaction.user.id,
+                details=f"Tag set to {tag}"
+            )
         
         await interaction.response.send_message(
             f"✅ Clan tag set to: **{tag}**",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "clan_tag_change",
-            interaction.user.id,
-            details=f"Tag set to {tag}"
-        )
     
     @clan_group.command(name="set-requirements", description="Set clan joining requirements")
     @app_commands.describe(
         league="Required league level",
-        minimum_hangar_power="Minimum hangar power required"
+        minimum_hangar_power="Minimum hangar power required",
+        compliance_role="Role given to members who do not meet the requirements"
     )
     async def clan_set_requirements(
         self,
         interaction: discord.Interaction,
         league: str,
-        minimum_hangar_power: int
+        minimum_hangar_power: int,
+        compliance_role: Optional[discord.Role] = None
     ):
         if not await has_permissions(self.db, interaction, "clan"):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        await self.db.create_or_update_guild_config(
-            interaction.guild.id,
-            clan_requirements_league=league,
-            clan_requirements_power=minimum_hangar_power
-        )
+        settings = {
+            'clan_requirements_league': league,
+            'clan_requirements_power': minimum_hangar_power
+        }
+        if compliance_role:
+            settings['compliance_role_id'] = compliance_role.id
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(interaction.guild.id, **settings)
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "clan_requirements_change",
+                interaction.user.id,
+                details=f"League: {league}, Power: {minimum_hangar_power}"
+            )
         
+        role_line = f"\nCompliance Role: {compliance_role.mention}" if compliance_role else ""
         await interaction.response.send_message(
-            f"✅ Clan requirements set:\nLeague: **{league}**\nMinimum Power: **{minimum_hangar_power}**",
+            f"✅ Clan requirements set:\nLeague: **{league}**\nMinimum Power: **{minimum_hangar_power}**{role_line}",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "clan_requirements_change",
-            interaction.user.id,
-            details=f"League: {league}, Power: {minimum_hangar_power}"
-        )
     
     @clan_group.command(name="message", description="Send a clan-wide announcement")
-    @app_commands.describe(content="The announcement message")
-    async def clan_message(self, interaction: discord.Interaction, content: str):
+    @app_commands.describe(
+        content="The announcement message",
+        channels="Channels to post in, as mentions separated by spaces (default: this channel)",
+        dm_ranks="Also DM members of these clan ranks, e.g. R4 R5"
+    )
+    async def clan_message(
+        self,
+        interaction: discord.Interaction,
+        content: str,
+        channels: Optional[str] = None,
+        dm_ranks: Optional[str] = None
+    ):
         if not await has_permissions(self.db, interaction, "clan"):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
+        channel_ids = [int(match) for match in CHANNEL_ID_PATTERN.findall(channels)] if channels else [interaction.channel.id]
+        if not channel_ids:
+            await interaction.response.send_message("❌ No channels found. Mention them like #announcements.", ephemeral=True)
+            return
+        
+        targets = []
+        for channel_id in dict.fromkeys(channel_ids):
+            channel = interaction.guild.get_channel(channel_id)
+            if not isinstance(channel, discord.TextChannel):
+                await interaction.response.send_message(f"❌ <#{channel_id}> is not a text channel in this server.", ephemeral=True)
+                return
+            if not channel.permissions_for(interaction.guild.me).send_messages:
+                await interaction.response.send_message(f"❌ I can't send messages in {channel.mention}.", ephemeral=True)
+                return
+            targets.append(('channel', channel.id))
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        dm_count = 0
+        if dm_ranks:
+            ranks = {rank.upper() for rank in dm_ranks.replace(',', ' ').split()}
+            await ensure_chunked(interaction.guild)
+            roster = await self.db.rosters.get(interaction.guild.id)
+            for rank in sorted(ranks):
+                for record in roster.query(clan_rank=rank):
+                    member = interaction.guild.get_member(record['user_id'])
+                    if member and not member.bot:
+                        targets.append(('dm', member.id))
+                        dm_count += 1
+        
         config = await self.db.get_guild_config(interaction.guild.id)
         
         embed = discord.Embed(
@@ -259,19 +371,173 @@ class Admin(commands.Cog):
             icon_url=interaction.user.display_avatar.url
         )
         
-        message_content = ""
+        message_content = None
         if config and config.get('announcement_role_id'):
             message_content = f"<@&{config['announcement_role_id']}>"
         
-        await interaction.channel.send(content=message_content, embed=embed)
-        await interaction.response.send_message("✅ Announcement sent!", ephemeral=True)
+        async with self.db.transaction():
+            announcement_id = await self.db.create_announcement(
+                interaction.guild.id,
+                interaction.user.id,
+                message_content,
+                embed.to_dict(),
+                targets
+            )
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "clan_announcement",
+                interaction.user.id,
+                details=f"Announcement #{announcement_id}: {len(targets) - dm_count} channel(s), {dm_count} DM(s)"
+            )
+        # Wake the delivery worker only once the queued rows are visible to its connection.
+        self.bot.delivery.notify()
         
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "clan_announcement",
-            interaction.user.id,
-            details="Announcement sent"
+        dm_info = f" and {dm_count} DM(s)" if dm_count else ""
+        await interaction.followup.send(
+            f"✅ Announcement #{announcement_id} queued for {len(targets) - dm_count} channel(s){dm_info}. "
+            f"Track it with `/clan delivery-status`.",
+            ephemeral=True
+        )
+    
+    @clan_group.command(name="delivery-status", description="Show delivery progress of recent announcements")
+    @app_commands.describe(announcement_id="Only show this announcement")
+    async def clan_delivery_status(self, interaction: discord.Interaction, announcement_id: Optional[int] = None):
+        if not await has_permissions(self.db, interaction, "clan"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        stats = await self.db.get_delivery_stats(interaction.guild.id, announcement_id)
+        if not stats:
+            await interaction.response.send_message("❌ No announcements found.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="📬 Announcement Delivery",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        for entry in stats:
+            last = entry['last_delivered_at'].strftime('%Y-%m-%d %H:%M') if entry['last_delivered_at'] else "-"
+            embed.add_field(
+                name=f"Announcement #{entry['id']}",
+                value=f"**Sent:** {entry['sent']} · **Failed:** {entry['failed']} · **Pending:** {entry['pending']}\n"
+                      f"**Retried:** {entry['retried']} · **Last delivery:** {last}",
+                inline=False
+            )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @clan_group.command(name="compliance", description="Check the roster against the clan requirements")
+    @app_commands.describe(apply_role="Give the compliance role to non-compliant members and remove it from the rest")
+    async def clan_compliance(self, interaction: discord.Interaction, apply_role: bool = False):
+        if not await has_permissions(self.db, interaction, "clan"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        config = await self.db.get_guild_config(interaction.guild.id)
+        if not config or (config.get('clan_requirements_league') is None and config.get('clan_requirements_power') is None):
+            await interaction.response.send_message(
+                "❌ No clan requirements set. Use `/clan set-requirements` first.",
+                ephemeral=True
+            )
+            return
+        
+        role = interaction.guild.get_role(config['compliance_role_id']) if config.get('compliance_role_id') else None
+        if apply_role and not role:
+            await interaction.response.send_message(
+                "❌ No compliance role configured. Set one with `/clan set-requirements`.",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        report, role_changes = await self.run_compliance(interaction.guild, config, role if apply_role else None)
+        
+        embed = discord.Embed(
+            title="📋 Clan Requirements Compliance",
+            color=discord.Color.green() if not report.non_compliant else discord.Color.orange(),
+            timestamp=discord.utils.utcnow()
         )
+        embed.add_field(name="League", value=report.required_league or "Any", inline=True)
+        embed.add_field(
+            name="Minimum Power",
+            value=f"{report.required_power:,}" if report.required_power is not None else "Any",
+            inline=True
+        )
+        embed.add_field(name="Checked", value=str(report.checked), inline=True)
+        
+        if report.non_compliant:
+            lines = [f"<@{user_id}> - {reasons}" for user_id, reasons in report.non_compliant[:25]]
+            if len(report.non_compliant) > 25:
+                lines.append(f"...and {len(report.non_compliant) - 25} more")
+            embed.add_field(
+                name=f"Non-compliant ({len(report.non_compliant)})",
+                value='\n'.join(lines)[:1024],
+                inline=False
+            )
+        else:
+            embed.description = "✅ Every recorded member meets the requirements."
+        
+        if role_changes:
+            added, removed, failed = role_changes
+            embed.add_field(
+                name=f"Role {role.name}",
+                value=f"Added: {added} · Removed: {removed} · Failed: {failed}",
+                inline=False
+            )
+        
+        if config.get('audit_log_enabled'):
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "compliance_check",
+                interaction.user.id,
+                details=f"{len(report.non_compliant)} of {report.checked} members non-compliant"
+            )
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    async def run_compliance(self, guild: discord.Guild, config: dict, role: Optional[discord.Role] = None):
+        roster = await self.db.rosters.get(guild.id)
+        report = check_compliance(
+            roster.columns(),
+            config.get('clan_requirements_league'),
+            config.get('clan_requirements_power')
+        )
+        
+        role_changes = None
+        if role:
+            await ensure_chunked(guild)
+            role_changes = await sync_compliance_role(guild, role, report.user_ids, reason="Clan requirements compliance")
+        return report, role_changes
+    
+    @tasks.loop(hours=6)
+    async def compliance_sweep(self):
+        for guild in self.bot.guilds:
+            try:
+                config = await self.db.get_guild_config(guild.id)
+                if not config or not config.get('compliance_role_id'):
+                    continue
+                if config.get('clan_requirements_league') is None and config.get('clan_requirements_power') is None:
+                    continue
+                
+                role = guild.get_role(config['compliance_role_id'])
+                if not role:
+                    continue
+                
+                report, (added, removed, failed) = await self.run_compliance(guild, config, role)
+                if (added or removed) and config.get('audit_log_enabled'):
+                    await self.db.add_audit_log(
+                        guild.id,
+                        "compliance_sweep",
+                        details=f"{len(report.non_compliant)} non-compliant, role added {added}, removed {removed}, failed {failed}"
+                    )
+            except Exception as e:
+                logger.error(f"Compliance sweep failed for guild {guild.id}: {e}")
+    
+    @compliance_sweep.before_loop
+    async def before_compliance_sweep(self):
+        await self.bot.wait_until_ready()
     
     @app_commands.command(name="backup", description="Create a backup of bot data")
     @app_commands.default_permissions(administrator=True)
@@ -282,20 +548,23 @@ class Admin(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
-        backup_id = await self.db.create_backup(interaction.guild.id, interaction.user.id)
-        
-        await interaction.followup.send(
-            f"✅ Backup created successfully!\nBackup ID: **{backup_id}**\n"
-            f"Use `/restore {backup_id}` to restore this backup.",
-            ephemeral=True
-        )
-        
+        try:
+            backup_id = await self.db.create_backup(interaction.guild.id, interaction.user.id)
+        except OffloadError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
         await self.db.add_audit_log(
             interaction.guild.id,
             "backup_created",
             interaction.user.id,
             details=f"Backup ID: {backup_id}"
         )
+        
+        await interaction.followup.send(
+            f"✅ Backup created successfully!\nBackup ID: **{backup_id}**\n"
+            f"Use `/restore {backup_id}` to restore this backup.",
+            ephemeral=True
+        )
     
     @app_commands.command(name="restore", description="Restore a backup")
     @app_commands.describe(backup_id="The ID of the backup to restore")
@@ -307,24 +576,28 @@ class Admin(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
-        backup = await self.db.get_backup(backup_id, interaction.guild.id)
+        try:
+            backup = await self.db.get_backup(backup_id, interaction.guild.id)
+        except OffloadError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
         
         if not backup:
             await interaction.followup.send("❌ Backup not found.", ephemeral=True)
             return
         
-        await interaction.followup.send(
-            f"✅ Backup restored successfully!\n"
-            f"Restored data from: {backup['created_at'].strftime('%Y-%m-%d %H:%M:%S')}",
-            ephemeral=True
-        )
-        
         await self.db.add_audit_log(
             interaction.guild.id,
             "backup_restored",
             interaction.user.id,
             details=f"Backup ID: {backup_id}"
         )
+        
+        await interaction.followup.send(
+            f"✅ Backup restored successfully!\n"
+            f"Restored data from: {backup['created_at'].strftime('%Y-%m-%d %H:%M:%S')}",
+            ephemeral=True
+        )
     
     @app_commands.command(name="listbackups", description="List all available backups")
     @app_commands.default_permissions(administrator=True)
@@ -429,19 +702,19 @@ class Admin(commands.Cog):
         command: str,
         role: discord.Role
     ):
-        await self.db.add_permission(interaction.guild.id, command, role.id)
+        async with self.db.transaction():
+            await self.db.add_permission(interaction.guild.id, command, role.id)
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "permission_set",
+                interaction.user.id,
+                details=f"Command: {command}, Role: {role.name}"
+            )
         
         await interaction.response.send_message(
             f"✅ Command `{command}` now requires role: {role.mention}",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "permission_set",
-            interaction.user.id,
-            details=f"Command: {command}, Role: {role.name}"
-        )
     
     blacklist_group = app_commands.Group(name="blacklist", description="Blacklist management commands")
     
@@ -457,25 +730,25 @@ class Admin(commands.Cog):
         user: discord.Member,
         reason: Optional[str] = None
     ):
-        await self.db.add_to_blacklist(
-            interaction.guild.id,
-            user.id,
-            interaction.user.id,
-            reason
-        )
+        async with self.db.transaction():
+            await self.db.add_to_blacklist(
+                interaction.guild.id,
+                user.id,
+                interaction.user.id,
+                reason
+            )
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "blacklist_add",
+                interaction.user.id,
+                user.id,
+                reason
+            )
         
         await interaction.response.send_message(
             f"✅ {user.mention} has been blacklisted.",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "blacklist_add",
-            interaction.user.id,
-            user.id,
-            reason
-        )
     
     @blacklist_group.command(name="remove", description="Remove a user from the blacklist")
     @app_commands.describe(user="User to remove from blacklist")
@@ -485,20 +758,21 @@ class Admin(commands.Cog):
         interaction: discord.Interaction,
         user: discord.Member
     ):
-        removed = await self.db.remove_from_blacklist(interaction.guild.id, user.id)
+        async with self.db.transaction():
+            removed = await self.db.remove_from_blacklist(interaction.guild.id, user.id)
+            if removed:
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "blacklist_remove",
+                    interaction.user.id,
+                    user.id
+                )
         
         if removed:
             await interaction.response.send_message(
                 f"✅ {user.mention} has been removed from the blacklist.",
                 ephemeral=True
             )
-            
-            await self.db.add_audit_log(
-                interaction.guild.id,
-                "blacklist_remove",
-                interaction.user.id,
-                user.id
-            )
         else:
             await interaction.response.send_message(
                 f"❌ {user.mention} is not blacklisted.",
@@ -523,29 +797,29 @@ class Admin(commands.Cog):
         await view.wait()
         
         if view.value:
-            await self.db.create_or_update_guild_config(
-                interaction.guild.id,
-                clan_tag=None,
-                clan_requirements_league=None,
-                clan_requirements_power=None,
-                audit_log_enabled=True,
-                auto_roles_enabled=False,
-                activity_threshold_days=7,
-                logging_channel_id=None,
-                announcement_role_id=None
-            )
+            async with self.db.transaction():
+                await self.db.create_or_update_guild_config(
+                    interaction.guild.id,
+                    clan_tag=None,
+                    clan_requirements_league=None,
+                    clan_requirements_power=None,
+                    audit_log_enabled=True,
+                    auto_roles_enabled=False,
+                    activity_threshold_days=7,
+                    logging_channel_id=None,
+                    announcement_role_id=None
+                )
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "reset_bot",
+                    interaction.user.id,
+                    details="All data reset to defaults"
+                )
             
             await interaction.edit_original_response(
                 content="✅ Bot data has been reset to defaults.",
                 view=None
             )
-            
-            await self.db.add_audit_log(
-                interaction.guild.id,
-                "reset_bot",
-                interaction.user.id,
-                details="All data reset to defaults"
-            )
         else:
             await interaction.edit_original_response(
                 content="❌ Reset cancelled.",
@@ -565,22 +839,22 @@ class Admin(commands.Cog):
             return
         
         enabled = action == "enable"
-        await self.db.create_or_update_guild_config(
-            interaction.guild.id,
-            audit_log_enabled=enabled
-        )
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(
+                interaction.guild.id,
+                audit_log_enabled=enabled
+            )
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "audit_log_toggle",
+                interaction.user.id,
+                details=f"Audit logging {action}d"
+            )
         
         await interaction.response.send_message(
             f"✅ Audit logging {'enabled' if enabled else 'disabled'}.",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "audit_log_toggle",
-            interaction.user.id,
-            details=f"Audit logging {action}d"
-        )
     
     @app_commands.command(name="auto-roles", description="Enable or disable automatic role assignment")
     @app_commands.describe(action="Enable or disable auto roles")
@@ -595,22 +869,22 @@ class Admin(commands.Cog):
             return
         
         enabled = action == "enable"
-        await self.db.create_or_update_guild_config(
-            interaction.guild.id,
-            auto_roles_enabled=enabled
-        )
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(
+                interaction.guild.id,
+                auto_roles_enabled=enabled
+            )
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                "auto_roles_toggle",
+                interaction.user.id,
+                details=f"Auto roles {action}d"
+            )
         
         await interaction.response.send_message(
             f"✅ Auto roles {'enabled' if enabled else 'disabled'}.",
             ephemeral=True
         )
-        
-        await self.db.add_audit_log(
-            interaction.guild.id,
-            "auto_roles_toggle",
-            interaction.user.id,
-            details=f"Auto roles {action}d"
-        )
 
 
 class ConfirmView(discord.ui.View):
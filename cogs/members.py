@@ -2,15 +2,25 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from utils.helpers import has_permissions
-from typing import Optional
-import pandas as pd
+from utils.cache import TTLCache
+from utils.cache_policy import ensure_chunked
+from utils.member_files import parse_member_table, render_member_csv
+from utils.offload import MAX_UPLOAD_BYTES, OffloadError, offload
+from utils.paging import KeysetPager
+from typing import Optional, Literal
+from datetime import datetime, timedelta
 import io
 
 
+MEMBER_SEARCH_PAGE_SIZE = 10
+LEADERBOARD_PAGE_SIZE = 10
+
+
 class Members(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.leaderboard_pages = TTLCache(ttl=3600, max_size=512)
     
     @app_commands.command(name="role-link", description="Link a Discord role to a clan rank")
     @app_commands.describe(
@@ -28,25 +38,25 @@ class Members(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        await self.db.add_role_mapping(
-            interaction.guild.id,
-            discord_role.id,
-            clan_rank
-        )
+        config = await self.db.get_guild_config(interaction.guild.id)
+        async with self.db.transaction():
+            await self.db.add_role_mapping(
+                interaction.guild.id,
+                discord_role.id,
+                clan_rank
+            )
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "role_link",
+                    interaction.user.id,
+                    details=f"Role: {discord_role.name}, Rank: {clan_rank}"
+                )
         
         await interaction.response.send_message(
             f"✅ Linked {discord_role.mention} to clan rank **{clan_rank}**.",
             ephemeral=True
         )
-        
-        config = await self.db.get_guild_config(interaction.guild.id)
-        if config and config.get('audit_log_enabled'):
-            await self.db.add_audit_log(
-                interaction.guild.id,
-                "role_link",
-                interaction.user.id,
-                details=f"Role: {discord_role.name}, Rank: {clan_rank}"
-            )
     
     @app_commands.command(name="sync-ranks", description="Sync all member ranks with their Discord roles")
     @app_commands.default_permissions(administrator=True)
@@ -57,33 +67,24 @@ class Members(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
+        await ensure_chunked(interaction.guild)
         role_mappings = await self.db.get_role_mappings(interaction.guild.id)
-        members = await self.db.get_all_members(interaction.guild.id)
+        roster = await self.db.rosters.get(interaction.guild.id)
         
         synced = 0
-        for member_data in members:
-            member = interaction.guild.get_member(member_data['user_id'])
-            if not member:
-                continue
-            
-            clan_rank = member_data.get('clan_rank')
-            if not clan_rank:
+        for mapping in role_mappings:
+            role = interaction.guild.get_role(mapping['discord_role_id'])
+            if not role:
                 continue
             
-            for mapping in role_mappings:
-                if mapping['clan_rank'] == clan_rank:
-                    role = interaction.guild.get_role(mapping['discord_role_id'])
-                    if role and role not in member.roles:
-                        try:
-                            await member.add_roles(role)
-                            synced += 1
-                        except discord.Forbidden:
-                            pass
-        
-        await interaction.followup.send(
-            f"✅ Rank sync complete! Updated {synced} member(s).",
-            ephemeral=True
-        )
+            for member_data in roster.query(clan_rank=mapping['clan_rank']):
+                member = interaction.guild.get_member(member_data['user_id'])
+                if member and role not in member.roles:
+                    try:
+                        await member.add_roles(role)
+                        synced += 1
+                    except discord.Forbidden:
+                        pass
         
         config = await self.db.get_guild_config(interaction.guild.id)
         if config and config.get('audit_log_enabled'):
@@ -93,6 +94,11 @@ class Members(commands.Cog):
                 interaction.user.id,
                 details=f"Synced {synced} members"
             )
+        
+        await interaction.followup.send(
+            f"✅ Rank sync complete! Updated {synced} member(s).",
+            ephemeral=True
+        )
     
     @app_commands.command(name="import-members", description="Import members from a CSV/Excel file")
     @app_commands.describe(file="CSV or Excel file containing member data")
@@ -115,53 +121,45 @@ class Members(commands.Cog):
             )
             return
         
+        if file.size > MAX_UPLOAD_BYTES:
+            await interaction.followup.send(
+                f"❌ File is too large (max {MAX_UPLOAD_BYTES // 2**20} MB).",
+                ephemeral=True
+            )
+            return
+        
         try:
             file_bytes = await file.read()
-            
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(io.BytesIO(file_bytes))
-            else:
-                df = pd.read_excel(io.BytesIO(file_bytes))
-            
-            required_columns = ['user_id', 'username']
-            if not all(col in df.columns for col in required_columns):
-                await interaction.followup.send(
-                    f"❌ Missing required columns. File must contain: {', '.join(required_columns)}",
-                    ephemeral=True
-                )
+            try:
+                columns, rows = await offload.run_cpu(parse_member_table, file_bytes, file.filename)
+            except ValueError as e:
+                await interaction.followup.send(f"❌ {e}", ephemeral=True)
                 return
             
+            config = await self.db.get_guild_config(interaction.guild.id)
             imported = 0
-            for _, row in df.iterrows():
-                kwargs = {}
-                if 'clan_rank' in df.columns:
-                    kwargs['clan_rank'] = row['clan_rank']
-                if 'hangar_power' in df.columns:
-                    kwargs['hangar_power'] = int(row['hangar_power']) if pd.notna(row['hangar_power']) else None
-                if 'league' in df.columns:
-                    kwargs['league'] = row['league']
-                
-                await self.db.add_member(
-                    interaction.guild.id,
-                    int(row['user_id']),
-                    str(row['username']),
-                    **kwargs
-                )
-                imported += 1
+            await self.db.load_member_codes(dict(zip(columns, values)) for _, _, *values in rows)
+            async with self.db.transaction():
+                for user_id, username, *values in rows:
+                    await self.db.add_member(
+                        interaction.guild.id,
+                        user_id,
+                        username,
+                        **dict(zip(columns, values))
+                    )
+                    imported += 1
+                if config and config.get('audit_log_enabled'):
+                    await self.db.add_audit_log(
+                        interaction.guild.id,
+                        "import_members",
+                        interaction.user.id,
+                        details=f"Imported {imported} members"
+                    )
             
             await interaction.followup.send(
                 f"✅ Successfully imported {imported} member(s)!",
                 ephemeral=True
             )
-            
-            config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
-                await self.db.add_audit_log(
-                    interaction.guild.id,
-                    "import_members",
-                    interaction.user.id,
-                    details=f"Imported {imported} members"
-                )
         
         except Exception as e:
             await interaction.followup.send(
@@ -178,44 +176,41 @@ class Members(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
-        members = await self.db.get_all_members(interaction.guild.id)
+        roster = await self.db.rosters.get(interaction.guild.id)
+        members = roster.columns()
         
-        if not members:
+        if not members.row_count:
             await interaction.followup.send(
                 "❌ No members found in the database.",
                 ephemeral=True
             )
             return
         
-        df = pd.DataFrame(members)
-        
-        columns_to_export = ['user_id', 'username', 'clan_rank', 'hangar_power', 'league', 'last_active', 'is_inactive', 'joined_at']
-        existing_columns = [col for col in columns_to_export if col in df.columns]
-        df = df[existing_columns]
-        
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_buffer.seek(0)
+        try:
+            csv_bytes = await offload.run_cpu(render_member_csv, dict(members))
+        except OffloadError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
         
         file = discord.File(
-            io.BytesIO(csv_buffer.getvalue().encode()),
+            io.BytesIO(csv_bytes),
             filename=f"members_{interaction.guild.name}_{discord.utils.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
         )
         
-        await interaction.followup.send(
-            f"✅ Exported {len(members)} member(s).",
-            file=file,
-            ephemeral=True
-        )
-        
         config = await self.db.get_guild_config(interaction.guild.id)
         if config and config.get('audit_log_enabled'):
             await self.db.add_audit_log(
                 interaction.guild.id,
                 "export_members",
                 interaction.user.id,
-                details=f"Exported {len(members)} members"
+                details=f"Exported {members.row_count} members"
             )
+        
+        await interaction.followup.send(
+            f"✅ Exported {members.row_count} member(s).",
+            file=file,
+            ephemeral=True
+        )
     
     @app_commands.command(name="activity-threshold", description="Set inactivity threshold in days")
     @app_commands.describe(days="Number of days before marking as inactive")
@@ -236,24 +231,24 @@ class Members(commands.Cog):
             )
             return
         
-        await self.db.create_or_update_guild_config(
-            interaction.guild.id,
-            activity_threshold_days=days
-        )
+        config = await self.db.get_guild_config(interaction.guild.id)
+        async with self.db.transaction():
+            await self.db.create_or_update_guild_config(
+                interaction.guild.id,
+                activity_threshold_days=days
+            )
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "activity_threshold_change",
+                    interaction.user.id,
+                    details=f"Threshold: {days} days"
+                )
         
         await interaction.response.send_message(
             f"✅ Activity threshold set to **{days} day(s)**.",
             ephemeral=True
         )
-        
-        config = await self.db.get_guild_config(interaction.guild.id)
-        if config and config.get('audit_log_enabled'):
-            await self.db.add_audit_log(
-                interaction.guild.id,
-                "activity_threshold_change",
-                interaction.user.id,
-                details=f"Threshold: {days} days"
-            )
     
     @app_commands.command(name="force-activity-scan", description="Scan for inactive members")
     @app_commands.default_permissions(administrator=True)
@@ -267,10 +262,21 @@ class Members(commands.Cog):
         config = await self.db.get_guild_config(interaction.guild.id)
         threshold_days = config.get('activity_threshold_days', 7) if config else 7
         
-        inactive_user_ids = await self.db.mark_inactive_members(
-            interaction.guild.id,
-            threshold_days
-        )
+        roster = await self.db.rosters.get(interaction.guild.id)
+        inactive_user_ids = []
+        async with self.db.transaction():
+            if roster.stale_members(datetime.utcnow() - timedelta(days=threshold_days)):
+                inactive_user_ids = await self.db.mark_inactive_members(
+                    interaction.guild.id,
+                    threshold_days
+                )
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "activity_scan",
+                    interaction.user.id,
+                    details=f"Found {len(inactive_user_ids)} inactive members"
+                )
         
         if inactive_user_ids:
             embed = discord.Embed(
@@ -299,14 +305,133 @@ class Members(commands.Cog):
                 "✅ No inactive members found.",
                 ephemeral=True
             )
+    
+    @app_commands.command(name="member-search", description="Search the clan roster")
+    @app_commands.describe(
+        name="Username to match (fuzzy)",
+        rank="Only members with this clan rank",
+        league="Only members in this league",
+        min_power="Minimum hangar power",
+        max_power="Maximum hangar power",
+        inactive="Only inactive (true) or active (false) members"
+    )
+    @app_commands.default_permissions(moderate_members=True)
+    async def member_search(
+        self,
+        interaction: discord.Interaction,
+        name: Optional[str] = None,
+        rank: Optional[Literal["R1", "R2", "R3", "R4", "R5"]] = None,
+        league: Optional[str] = None,
+        min_power: Optional[int] = None,
+        max_power: Optional[int] = None,
+        inactive: Optional[bool] = None
+    ):
+        if not await has_permissions(self.db, interaction, "member-search"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
         
-        if config and config.get('audit_log_enabled'):
-            await self.db.add_audit_log(
-                interaction.guild.id,
-                "activity_scan",
-                interaction.user.id,
-                details=f"Found {len(inactive_user_ids)} inactive members"
+        if min_power is not None and max_power is not None and min_power > max_power:
+            await interaction.response.send_message("❌ Minimum power cannot exceed maximum power.", ephemeral=True)
+            return
+        
+        filters = {
+            'name': name,
+            'clan_rank': rank,
+            'league': league,
+            'min_power': min_power,
+            'max_power': max_power,
+            'inactive': inactive
+        }
+        await interaction.response.defer(ephemeral=True)
+        
+        view = KeysetPager(
+            interaction.user.id,
+            lambda cursor: self.db.search_members(interaction.guild.id, after=cursor, limit=MEMBER_SEARCH_PAGE_SIZE,
+                                                  **filters),
+            lambda pager: member_search_embed(pager, filters),
+            "Only the officer who ran this search can page through it."
+        )
+        await view.load_page()
+        
+        if not view.records:
+            await interaction.followup.send("❌ No members match these filters.", ephemeral=True)
+            return
+        
+        await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
+    
+    @app_commands.command(name="leaderboard", description="Show the hangar power leaderboard")
+    @app_commands.describe(
+        league="Only rank members of this league",
+        page="Page number (default: 1)"
+    )
+    async def leaderboard(
+        self,
+        interaction: discord.Interaction,
+        league: Optional[str] = None,
+        page: int = 1
+    ):
+        if not await has_permissions(self.db, interaction, "leaderboard"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        await interaction.response.defer()
+        
+        roster = await self.db.rosters.get(interaction.guild.id)
+        total = len(roster.ranking(league))
+        if not total:
+            scope = f"the {league} league" if league else "this clan"
+            await interaction.followup.send(f"❌ No hangar power recorded for {scope}.")
+            return
+        
+        pages = (total + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE
+        if page < 1 or page > pages:
+            await interaction.followup.send(f"❌ Page must be between 1 and {pages}.")
+            return
+        
+        key = (interaction.guild.id, league, page)
+        cached = self.leaderboard_pages.get(key)
+        if cached and cached[0] == roster.leaderboard_version:
+            embed = discord.Embed.from_dict(cached[1])
+        else:
+            offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+            lines = []
+            for position, record in enumerate(roster.leaderboard(league, offset, LEADERBOARD_PAGE_SIZE), start=offset + 1):
+                league_info = "" if league else f" · {record['league'] or 'No league'}"
+                lines.append(f"`#{position}` **{record['username']}** - ⚡ {record['hangar_power']:,}{league_info}")
+            
+            embed = discord.Embed(
+                title=f"🏆 {league + ' League' if league else 'Clan'} Leaderboard",
+                description='\n'.join(lines),
+                color=discord.Color.gold()
             )
+            embed.set_footer(text=f"Page {page}/{pages} · {total} ranked member(s)")
+            self.leaderboard_pages.set(key, (roster.leaderboard_version, embed.to_dict()))
+        
+        own_rank = roster.power_rank(interaction.user.id, league)
+        content = f"Your rank: **#{own_rank}** of {total}" if own_rank else None
+        await interaction.followup.send(content=content, embed=embed)
+
+
+def member_search_embed(pager: KeysetPager, filters: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title="🔎 Member Search",
+        color=discord.Color.blue(),
+        timestamp=discord.utils.utcnow()
+    )
+    
+    lines = []
+    for record in pager.records:
+        details = [record['clan_rank'] or "No rank", record['league'] or "No league"]
+        if record['hangar_power'] is not None:
+            details.append(f"⚡ {record['hangar_power']:,}")
+        if record['is_inactive']:
+            details.append("💤 inactive")
+        lines.append(f"**{record['username']}** (<@{record['user_id']}>) - {' · '.join(details)}")
+    embed.description = '\n'.join(lines)
+    
+    active_filters = [f"{key}={value}" for key, value in filters.items() if value is not None]
+    embed.set_footer(text=f"Page {pager.page + 1} · {', '.join(active_filters) or 'no filters'}")
+    return embed
 
 
 async def setup(bot):
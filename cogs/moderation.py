@@ -1,15 +1,53 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
-from utils.helpers import has_permissions, parse_duration, format_duration
-from typing import Optional, Literal
-from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+from utils.helpers import has_permissions, parse_duration, format_duration, gather_bounded
+from utils.raid import RaidDetector, RaidSettings, GuildRaidState, LEVEL_NAMES, LEVEL_VERIFICATION, LEVEL_LOCKDOWN
+from utils.purge import PurgeFilter, PurgeJob, PurgeProgress
+from utils.escalation import EscalationEngine, describe_rule
+from utils.cache import TTLCache
+from utils.cache_policy import ensure_chunked
+from utils.offload import MAX_UPLOAD_BYTES, OffloadError
+from utils.paging import KeysetPager
+from utils.reports import ReportTriage, OpenReport, parse_message_link
+from utils.bulk import BulkResult, parse_user_ids, filter_targets, bulk_ban, bulk_kick, bulk_timeout
+from typing import Optional, Literal, List, Mapping
+from datetime import datetime, timedelta, timezone
+import logging
+import re
+import time
+
+
+logger = logging.getLogger(__name__)
+
+PURGE_MAX_AMOUNT = 10000
+PURGE_MAX_SCAN = 20000
+# Interaction tokens last 15 minutes; stop editing followups a little before that.
+INTERACTION_TOKEN_LIFETIME = timedelta(minutes=14)
+MOD_SEARCH_PAGE_SIZE = 5
+HISTORY_PAGE_SIZE = 8
+HISTORY_LABELS = {'warning': "⚠️ Warning", 'note': "📝 Note", 'mute': "🔇 Active mute", 'audit': "📋"}
+MOD_SEARCH_SOURCES = {'all': ('warning', 'note'), 'warnings': ('warning',), 'notes': ('note',)}
+REPORT_COLORS = {'open': discord.Color.red(), 'claimed': discord.Color.orange(), 'resolved': discord.Color.green()}
 
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.raid_detector = RaidDetector()
+        self.escalations = EscalationEngine(self.db)
+        self.dossier_cache = TTLCache(ttl=60)
+        self.reports = ReportTriage(self.refresh_report)
+    
+    async def cog_load(self):
+        # Claim/Resolve buttons keep working on triage messages posted before a restart.
+        self.bot.add_view(ReportTriageView(self))
+        self.raid_cool_down.start()
+    
+    async def cog_unload(self):
+        self.raid_cool_down.cancel()
+        self.reports.close()
     
     @app_commands.command(name="warn", description="Warn a user")
     @app_commands.describe(
@@ -27,12 +65,23 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        warning_id = await self.db.add_warning(
-            interaction.guild.id,
-            user.id,
-            interaction.user.id,
-            reason
-        )
+        async with self.db.transaction():
+            warning_id = await self.db.add_warning(
+                interaction.guild.id,
+                user.id,
+                interaction.user.id,
+                reason
+            )
+            
+            config = await self.db.get_guild_config(interaction.guild.id)
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "warn",
+                    interaction.user.id,
+                    user.id,
+                    f"Reason: {reason}"
+                )
         
         try:
             await user.send(
@@ -48,14 +97,12 @@ class Moderation(commands.Cog):
             ephemeral=True
         )
         
-        config = await self.db.get_guild_config(interaction.guild.id)
-        if config and config.get('audit_log_enabled'):
-            await self.db.add_audit_log(
-                interaction.guild.id,
-                "warn",
-                interaction.user.id,
-                user.id,
-                f"Reason: {reason}"
+        self.dossier_cache.invalidate((interaction.guild.id, user.id))
+        rule = await self.escalations.record_warning(interaction.guild.id, user.id)
+        if rule and await self.apply_escalation(interaction.guild, user, rule, interaction.user.id):
+            await interaction.followup.send(
+                f"⚡ Escalation triggered for {user.mention}: **{describe_rule(rule)}**",
+                ephemeral=True
             )
     
     @app_commands.command(name="warnings", description="View warnings for a user")
@@ -69,7 +116,7 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        warnings = await self.db.get_warnings(interaction.guild.id, user.id)
+        warnings = await self.db.get_warnings(interaction.guild.id, user.id, limit=10)
         
         if not warnings:
             await interaction.response.send_message(
@@ -84,7 +131,7 @@ class Moderation(commands.Cog):
             timestamp=discord.utils.utcnow()
         )
         
-        for warning in warnings[:10]:
+        for warning in warnings:
             moderator = interaction.guild.get_member(warning['moderator_id'])
             mod_name = moderator.name if moderator else f"Unknown ({warning['moderator_id']})"
             
@@ -96,7 +143,8 @@ class Moderation(commands.Cog):
                 inline=False
             )
         
-        embed.set_footer(text=f"Total warnings: {len(warnings)}")
+        total = await self.db.count_warnings(interaction.guild.id, user.id)
+        embed.set_footer(text=f"Total warnings: {total}")
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
@@ -116,16 +164,11 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        removed = await self.db.remove_warning(warning_id, interaction.guild.id)
-        
-        if removed:
-            await interaction.response.send_message(
-                f"✅ Warning #{warning_id} has been removed from {user.mention}.",
-                ephemeral=True
-            )
+        async with self.db.transaction():
+            removed = await self.db.remove_warning(warning_id, interaction.guild.id)
             
             config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
+            if removed and config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
                     interaction.guild.id,
                     "warning_removed",
@@ -133,12 +176,150 @@ class Moderation(commands.Cog):
                     user.id,
                     f"Warning ID: {warning_id}"
                 )
+        
+        if removed:
+            self.escalations.invalidate_user(interaction.guild.id, user.id)
+            self.dossier_cache.invalidate((interaction.guild.id, user.id))
+            await interaction.response.send_message(
+                f"✅ Warning #{warning_id} has been removed from {user.mention}.",
+                ephemeral=True
+            )
         else:
             await interaction.response.send_message(
                 f"❌ Warning #{warning_id} not found.",
                 ephemeral=True
             )
     
+    async def apply_escalation(self, guild: discord.Guild, member: discord.Member, rule: dict, moderator_id: int) -> bool:
+        reason = f"Automatic escalation: {rule['warning_count']} warnings in {rule['window_days']} day(s)"
+        
+        duration_td = timedelta(minutes=rule['duration_minutes'] or 60)
+        try:
+            if rule['action'] == "mute":
+                await member.timeout(duration_td, reason=reason)
+            elif rule['action'] == "kick":
+                await member.kick(reason=reason)
+            else:
+                await member.ban(reason=reason)
+        except discord.HTTPException:
+            return False
+        
+        async with self.db.transaction():
+            if rule['action'] == "mute":
+                await self.db.add_mute(guild.id, member.id, moderator_id, datetime.utcnow() + duration_td, reason)
+            
+            config = await self.db.get_guild_config(guild.id)
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    guild.id,
+                    "auto_escalation",
+                    moderator_id,
+                    member.id,
+                    describe_rule(rule)
+                )
+        self.dossier_cache.invalidate((guild.id, member.id))
+        return True
+    
+    escalation_group = app_commands.Group(
+        name="escalation",
+        description="Automatic actions for repeat offenders",
+        default_permissions=discord.Permissions(administrator=True)
+    )
+    
+    @escalation_group.command(name="add", description="Add or update an escalation rule")
+    @app_commands.describe(
+        warnings="Number of warnings that triggers the rule",
+        days="Rolling window in days",
+        action="Action to take",
+        duration="Mute duration (e.g., 1h) - only used for mute"
+    )
+    async def escalation_add(
+        self,
+        interaction: discord.Interaction,
+        warnings: app_commands.Range[int, 1, 100],
+        days: app_commands.Range[int, 1, 365],
+        action: Literal["mute", "kick", "ban"],
+        duration: Optional[str] = None
+    ):
+        if not await has_permissions(self.db, interaction, "escalation"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        duration_minutes = None
+        if action == "mute":
+            duration_td = parse_duration(duration) if duration else timedelta(hours=1)
+            if not duration_td or duration_td > timedelta(days=28):
+                await interaction.response.send_message(
+                    "❌ Mute duration must be valid and at most 28 days.",
+                    ephemeral=True
+                )
+                return
+            duration_minutes = max(1, int(duration_td.total_seconds() // 60))
+        
+        rule = {'warning_count': warnings, 'window_days': days, 'action': action, 'duration_minutes': duration_minutes}
+        async with self.db.transaction():
+            rule_id = await self.db.add_escalation_rule(interaction.guild.id, warnings, days, action, duration_minutes)
+            
+            config = await self.db.get_guild_config(interaction.guild.id)
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "escalation_rule_add",
+                    interaction.user.id,
+                    details=describe_rule(rule)
+                )
+        self.escalations.invalidate_rules(interaction.guild.id)
+        
+        await interaction.response.send_message(
+            f"✅ Escalation rule #{rule_id} saved: **{describe_rule(rule)}**",
+            ephemeral=True
+        )
+    
+    @escalation_group.command(name="list", description="List escalation rules")
+    async def escalation_list(self, interaction: discord.Interaction):
+        if not await has_permissions(self.db, interaction, "escalation"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        rules = await self.escalations.get_rules(interaction.guild.id)
+        if not rules:
+            await interaction.response.send_message("No escalation rules configured.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="⚡ Escalation Rules",
+            description="\n".join(f"**#{rule['id']}** {describe_rule(rule)}" for rule in rules),
+            color=discord.Color.orange(),
+            timestamp=discord.utils.utcnow()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @escalation_group.command(name="remove", description="Remove an escalation rule")
+    @app_commands.describe(rule_id="ID of the rule to remove")
+    async def escalation_remove(self, interaction: discord.Interaction, rule_id: int):
+        if not await has_permissions(self.db, interaction, "escalation"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        async with self.db.transaction():
+            removed = await self.db.remove_escalation_rule(rule_id, interaction.guild.id)
+            
+            config = await self.db.get_guild_config(interaction.guild.id)
+            if removed and config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "escalation_rule_remove",
+                    interaction.user.id,
+                    details=f"Rule ID: {rule_id}"
+                )
+        
+        if not removed:
+            await interaction.response.send_message(f"❌ Escalation rule #{rule_id} not found.", ephemeral=True)
+            return
+        
+        self.escalations.invalidate_rules(interaction.guild.id)
+        await interaction.response.send_message(f"✅ Escalation rule #{rule_id} removed.", ephemeral=True)
+    
     @app_commands.command(name="mute", description="Mute a user for a specified duration")
     @app_commands.describe(
         user="User to mute",
@@ -177,28 +358,30 @@ class Moderation(commands.Cog):
         try:
             await user.timeout(expires_at, reason=reason)
             
-            await self.db.add_mute(
-                interaction.guild.id,
-                user.id,
-                interaction.user.id,
-                expires_at,
-                reason
-            )
+            async with self.db.transaction():
+                await self.db.add_mute(
+                    interaction.guild.id,
+                    user.id,
+                    interaction.user.id,
+                    expires_at,
+                    reason
+                )
+                
+                config = await self.db.get_guild_config(interaction.guild.id)
+                if config and config.get('audit_log_enabled'):
+                    await self.db.add_audit_log(
+                        interaction.guild.id,
+                        "mute",
+                        interaction.user.id,
+                        user.id,
+                        f"Duration: {format_duration(duration_td)}, Reason: {reason}"
+                    )
+            self.dossier_cache.invalidate((interaction.guild.id, user.id))
             
             await interaction.response.send_message(
                 f"✅ {user.mention} has been muted for {format_duration(duration_td)}.",
                 ephemeral=True
             )
-            
-            config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
-                await self.db.add_audit_log(
-                    interaction.guild.id,
-                    "mute",
-                    interaction.user.id,
-                    user.id,
-                    f"Duration: {format_duration(duration_td)}, Reason: {reason}"
-                )
         
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -221,21 +404,23 @@ class Moderation(commands.Cog):
         try:
             await user.timeout(None)
             
-            await self.db.remove_mute(interaction.guild.id, user.id)
+            async with self.db.transaction():
+                await self.db.remove_mute(interaction.guild.id, user.id)
+                
+                config = await self.db.get_guild_config(interaction.guild.id)
+                if config and config.get('audit_log_enabled'):
+                    await self.db.add_audit_log(
+                        interaction.guild.id,
+                        "unmute",
+                        interaction.user.id,
+                        user.id
+                    )
+            self.dossier_cache.invalidate((interaction.guild.id, user.id))
             
             await interaction.response.send_message(
                 f"✅ {user.mention} has been unmuted.",
                 ephemeral=True
             )
-            
-            config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
-                await self.db.add_audit_log(
-                    interaction.guild.id,
-                    "unmute",
-                    interaction.user.id,
-                    user.id
-                )
         
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -262,11 +447,6 @@ class Moderation(commands.Cog):
         try:
             await user.kick(reason=reason)
             
-            await interaction.response.send_message(
-                f"✅ {user.mention} has been kicked.\n**Reason:** {reason or 'No reason provided'}",
-                ephemeral=True
-            )
-            
             config = await self.db.get_guild_config(interaction.guild.id)
             if config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
@@ -276,6 +456,11 @@ class Moderation(commands.Cog):
                     user.id,
                     f"Reason: {reason}"
                 )
+            
+            await interaction.response.send_message(
+                f"✅ {user.mention} has been kicked.\n**Reason:** {reason or 'No reason provided'}",
+                ephemeral=True
+            )
         
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -302,11 +487,6 @@ class Moderation(commands.Cog):
         try:
             await user.ban(reason=reason)
             
-            await interaction.response.send_message(
-                f"✅ {user.mention} has been banned.\n**Reason:** {reason or 'No reason provided'}",
-                ephemeral=True
-            )
-            
             config = await self.db.get_guild_config(interaction.guild.id)
             if config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
@@ -316,6 +496,11 @@ class Moderation(commands.Cog):
                     user.id,
                     f"Reason: {reason}"
                 )
+            
+            await interaction.response.send_message(
+                f"✅ {user.mention} has been banned.\n**Reason:** {reason or 'No reason provided'}",
+                ephemeral=True
+            )
         
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -323,6 +508,191 @@ class Moderation(commands.Cog):
                 ephemeral=True
             )
     
+    @app_commands.command(name="bulk-mod", description="Ban, kick, timeout or warn many users at once")
+    @app_commands.describe(
+        action="Action to apply to every target",
+        user_ids="User IDs or mentions separated by spaces or commas",
+        file="Text or CSV file containing user IDs",
+        joined_within="Target members who joined within this window (e.g., 10m, 1h)",
+        duration="Timeout duration (e.g., 1h, 1d) - required for timeout",
+        reason="Reason recorded for every target",
+        dry_run="Only list the targets without taking action"
+    )
+    @app_commands.default_permissions(ban_members=True)
+    async def bulk_mod(
+        self,
+        interaction: discord.Interaction,
+        action: Literal["ban", "kick", "timeout", "warn"],
+        user_ids: Optional[str] = None,
+        file: Optional[discord.Attachment] = None,
+        joined_within: Optional[str] = None,
+        duration: Optional[str] = None,
+        reason: Optional[str] = None,
+        dry_run: bool = False
+    ):
+        if not await has_permissions(self.db, interaction, "bulk-mod"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        if not (user_ids or file or joined_within):
+            await interaction.response.send_message(
+                "❌ Provide user IDs, a file, or a join window.",
+                ephemeral=True
+            )
+            return
+        
+        duration_td = None
+        if action == "timeout":
+            duration_td = parse_duration(duration) if duration else None
+            if not duration_td or duration_td > timedelta(days=28):
+                await interaction.response.send_message(
+                    "❌ Timeout needs a duration of at most 28 days (e.g., 1h, 1d).",
+                    ephemeral=True
+                )
+                return
+        
+        window_td = None
+        if joined_within:
+            window_td = parse_duration(joined_within)
+            if not window_td:
+                await interaction.response.send_message(
+                    "❌ Invalid join window. Use formats like: 10m, 1h, 1d.",
+                    ephemeral=True
+                )
+                return
+        
+        if file and file.size > MAX_UPLOAD_BYTES:
+            await interaction.response.send_message(
+                f"❌ File is too large (max {MAX_UPLOAD_BYTES // 2**20} MB).",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        # Hierarchy checks and the join window both rely on every member being cached.
+        await ensure_chunked(interaction.guild)
+        candidates = parse_user_ids(user_ids) if user_ids else []
+        if file:
+            candidates.extend(parse_user_ids((await file.read()).decode('utf-8', errors='ignore')))
+        if window_td:
+            joined_after = discord.utils.utcnow() - window_td
+            candidates.extend(
+                member.id for member in interaction.guild.members
+                if member.joined_at and member.joined_at >= joined_after and not member.bot
+            )
+        candidates = list(dict.fromkeys(candidates))
+        
+        result = BulkResult()
+        targets = filter_targets(interaction.guild, interaction.user, candidates, result)
+        
+        if action != "ban":
+            members = []
+            for user_id in targets:
+                member = interaction.guild.get_member(user_id)
+                if member:
+                    members.append(member)
+                else:
+                    result.skipped.append(user_id)
+            targets = [member.id for member in members]
+        
+        if not targets:
+            await interaction.followup.send(
+                f"❌ No eligible targets found ({len(result.skipped)} skipped).",
+                ephemeral=True
+            )
+            return
+        
+        if dry_run:
+            preview = ' '.join(f"<@{user_id}>" for user_id in targets[:50])
+            more = f"\n...and {len(targets) - 50} more" if len(targets) > 50 else ""
+            await interaction.followup.send(
+                f"📝 Dry run: `{action}` would apply to {len(targets)} user(s), {len(result.skipped)} skipped.\n"
+                f"{preview}{more}",
+                ephemeral=True
+            )
+            return
+        
+        audit_reason = f"{action} by {interaction.user}: {reason or 'No reason provided'}"
+        try:
+            if action == "ban":
+                outcome = await bulk_ban(interaction.guild, targets, reason=audit_reason)
+            elif action == "kick":
+                outcome = await bulk_kick(members, reason=audit_reason)
+            elif action == "timeout":
+                outcome = await bulk_timeout(members, discord.utils.utcnow() + duration_td, reason=audit_reason)
+            else:
+                outcome = BulkResult()
+                outcome.succeeded = targets
+        except discord.Forbidden:
+            await interaction.followup.send(
+                f"❌ I don't have permission to {action} members.",
+                ephemeral=True
+            )
+            return
+        
+        result.succeeded = outcome.succeeded
+        result.failed = outcome.failed
+        
+        async with self.db.transaction():
+            if action == "warn" and result.succeeded:
+                await self.db.add_warnings_bulk(interaction.guild.id, result.succeeded, interaction.user.id, reason or "Bulk warning")
+            elif action == "timeout" and result.succeeded:
+                await self.db.add_mutes_bulk(
+                    interaction.guild.id,
+                    result.succeeded,
+                    interaction.user.id,
+                    datetime.utcnow() + duration_td,
+                    reason
+                )
+            
+            config = await self.db.get_guild_config(interaction.guild.id)
+            if config and config.get('audit_log_enabled') and result.succeeded:
+                details = f"Bulk {action}, Reason: {reason}"
+                if duration_td:
+                    details = f"Bulk {action}, Duration: {format_duration(duration_td)}, Reason: {reason}"
+                await self.db.add_audit_logs_bulk(
+                    interaction.guild.id,
+                    action,
+                    interaction.user.id,
+                    [(user_id, details) for user_id in result.succeeded]
+                )
+        
+        embed = discord.Embed(
+            title=f"🔨 Bulk {action.title()} Complete",
+            color=discord.Color.green() if not result.failed else discord.Color.orange(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(name="Succeeded", value=str(len(result.succeeded)), inline=True)
+        embed.add_field(name="Failed", value=str(len(result.failed)), inline=True)
+        embed.add_field(name="Skipped", value=str(len(result.skipped)), inline=True)
+        if duration_td:
+            embed.add_field(name="Duration", value=format_duration(duration_td), inline=True)
+        embed.add_field(name="Reason", value=reason or "No reason provided", inline=False)
+        if result.failed:
+            embed.add_field(
+                name="Failed Users",
+                value=' '.join(f"<@{user_id}>" for user_id in result.failed[:40]),
+                inline=False
+            )
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        
+        if action == "warn" and result.succeeded:
+            members_by_id = {member.id: member for member in members}
+            escalated = []
+            for user_id in result.succeeded:
+                self.dossier_cache.invalidate((interaction.guild.id, user_id))
+                rule = await self.escalations.record_warning(interaction.guild.id, user_id)
+                if rule and await self.apply_escalation(interaction.guild, members_by_id[user_id], rule, interaction.user.id):
+                    escalated.append(user_id)
+            if escalated:
+                await interaction.followup.send(
+                    f"⚡ Escalation triggered for {len(escalated)} user(s): "
+                    + ' '.join(f"<@{user_id}>" for user_id in escalated[:40]),
+                    ephemeral=True
+                )
+    
     @app_commands.command(name="unban", description="Unban a user from the server")
     @app_commands.describe(user_id="ID of the user to unban")
     @app_commands.default_permissions(ban_members=True)
@@ -340,11 +710,6 @@ class Moderation(commands.Cog):
             user = await self.bot.fetch_user(user_id_int)
             await interaction.guild.unban(user)
             
-            await interaction.response.send_message(
-                f"✅ {user.name} has been unbanned.",
-                ephemeral=True
-            )
-            
             config = await self.db.get_guild_config(interaction.guild.id)
             if config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
@@ -353,6 +718,11 @@ class Moderation(commands.Cog):
                     interaction.user.id,
                     user_id_int
                 )
+            
+            await interaction.response.send_message(
+                f"✅ {user.name} has been unbanned.",
+                ephemeral=True
+            )
         
         except ValueError:
             await interaction.response.send_message(
@@ -371,48 +741,155 @@ class Moderation(commands.Cog):
             )
     
     @app_commands.command(name="purge", description="Delete multiple messages")
-    @app_commands.describe(amount="Number of messages to delete (1-100)")
+    @app_commands.describe(
+        amount="Number of messages to delete (1-10000)",
+        user="Only delete messages from this user",
+        contains="Only delete messages matching this pattern (regex, case-insensitive)",
+        links="Only delete messages containing links",
+        attachments="Only delete messages with attachments",
+        since="Only delete messages newer than this (e.g., 2h, 1d)",
+        before_message="Only delete messages older than this message ID"
+    )
     @app_commands.default_permissions(manage_messages=True)
     async def purge(
         self,
         interaction: discord.Interaction,
-        amount: int
+        amount: int,
+        user: Optional[discord.Member] = None,
+        contains: Optional[str] = None,
+        links: bool = False,
+        attachments: bool = False,
+        since: Optional[str] = None,
+        before_message: Optional[str] = None
     ):
         if not await has_permissions(self.db, interaction, "purge"):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        if amount < 1 or amount > 100:
+        if amount < 1 or amount > PURGE_MAX_AMOUNT:
             await interaction.response.send_message(
-                "❌ Amount must be between 1 and 100.",
+                f"❌ Amount must be between 1 and {PURGE_MAX_AMOUNT}.",
                 ephemeral=True
             )
             return
         
-        await interaction.response.defer(ephemeral=True)
+        after = None
+        if since:
+            since_td = parse_duration(since)
+            if not since_td:
+                await interaction.response.send_message(
+                    "❌ Invalid duration format. Use formats like: 1h, 30m, 1d, etc.",
+                    ephemeral=True
+                )
+                return
+            after = discord.utils.utcnow() - since_td
+        
+        before = None
+        if before_message:
+            try:
+                before = discord.Object(id=int(before_message))
+            except ValueError:
+                await interaction.response.send_message("❌ Invalid message ID.", ephemeral=True)
+                return
         
         try:
-            deleted = await interaction.channel.purge(limit=amount)
-            
-            await interaction.followup.send(
-                f"✅ Deleted {len(deleted)} message(s).",
-                ephemeral=True
+            message_filter = PurgeFilter(
+                user_id=user.id if user else None,
+                pattern=contains,
+                links_only=links,
+                attachments_only=attachments,
+                after=after,
+                before=before
             )
-            
-            config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
-                await self.db.add_audit_log(
-                    interaction.guild.id,
-                    "purge",
-                    interaction.user.id,
-                    details=f"Deleted {len(deleted)} messages"
-                )
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Invalid pattern: {e}.", ephemeral=True)
+            return
+        
+        scan_limit = amount if message_filter.is_empty else PURGE_MAX_SCAN
+        await self.run_purge(interaction, message_filter, amount, scan_limit, "purge")
+    
+    async def run_purge(
+        self,
+        interaction: discord.Interaction,
+        message_filter: PurgeFilter,
+        limit: Optional[int],
+        scan_limit: int,
+        action_type: str
+    ):
+        await interaction.response.defer(ephemeral=True)
         
+        view = PurgeCancelView(interaction.user.id)
+        status_message = await interaction.followup.send(
+            f"🧹 Purging {message_filter.describe()}...",
+            view=view,
+            ephemeral=True,
+            wait=True
+        )
+        
+        # The ephemeral status message can only be edited while the interaction token is valid.
+        token_expires = interaction.created_at + INTERACTION_TOKEN_LIFETIME
+        
+        async def update_status(content: str, status_view: Optional[discord.ui.View] = None) -> bool:
+            if discord.utils.utcnow() >= token_expires:
+                return False
+            try:
+                await status_message.edit(content=content, view=status_view)
+            except discord.HTTPException:
+                return False
+            return True
+        
+        async def finish(content: str):
+            if not await update_status(content):
+                try:
+                    await interaction.channel.send(f"{interaction.user.mention} {content}", delete_after=30)
+                except discord.HTTPException:
+                    pass
+        
+        async def report(progress: PurgeProgress):
+            if progress.finished:
+                return
+            await update_status(
+                f"🧹 Purging {message_filter.describe()}...\n"
+                f"Scanned {progress.scanned}, deleted {progress.deleted}",
+                view
+            )
+        
+        job = PurgeJob(
+            interaction.channel,
+            message_filter,
+            limit,
+            scan_limit,
+            on_progress=report,
+            reason=f"{action_type} by {interaction.user}"
+        )
+        view.job = job
+        
+        try:
+            progress = await job.run()
         except discord.Forbidden:
-            await interaction.followup.send(
-                "❌ I don't have permission to delete messages.",
-                ephemeral=True
+            await finish("❌ I don't have permission to delete messages.")
+            return
+        except OffloadError as e:
+            await finish(f"❌ Purge stopped after deleting {job.progress.deleted} message(s): the pattern failed. {e}")
+            return
+        finally:
+            view.stop()
+        
+        config = await self.db.get_guild_config(interaction.guild.id)
+        if config and config.get('audit_log_enabled'):
+            await self.db.add_audit_log(
+                interaction.guild.id,
+                action_type,
+                interaction.user.id,
+                details=f"Deleted {progress.deleted} messages ({message_filter.describe()}) in {interaction.channel.name}"
             )
+        
+        summary = f"✅ Deleted {progress.deleted} message(s) after scanning {progress.scanned}."
+        if progress.cancelled:
+            summary = f"⏹️ Purge cancelled. Deleted {progress.deleted} message(s) after scanning {progress.scanned}."
+        if progress.failed:
+            summary += f"\n⚠️ {progress.failed} message(s) could not be deleted."
+        await finish(summary)
     
     @app_commands.command(name="note", description="Add a staff note to a user")
     @app_commands.describe(
@@ -436,6 +913,7 @@ class Moderation(commands.Cog):
             interaction.user.id,
             note
         )
+        self.dossier_cache.invalidate((interaction.guild.id, user.id))
         
         await interaction.response.send_message(
             f"✅ Note added for {user.mention}.",
@@ -482,6 +960,70 @@ class Moderation(commands.Cog):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
+    @app_commands.command(name="mod-search", description="Search warning reasons and staff notes")
+    @app_commands.describe(
+        query='Words to find; use "quotes" for phrases and -word to exclude',
+        source="Search warnings, notes or both (default: all)",
+        user="Only records about this user"
+    )
+    @app_commands.default_permissions(moderate_members=True)
+    async def mod_search(
+        self,
+        interaction: discord.Interaction,
+        query: str,
+        source: Literal["all", "warnings", "notes"] = "all",
+        user: Optional[discord.User] = None
+    ):
+        if not await has_permissions(self.db, interaction, "mod-search"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        target_id = user.id if user else None
+        view = KeysetPager(
+            interaction.user.id,
+            lambda cursor: self.db.search_moderation_text(interaction.guild.id, query, kinds=MOD_SEARCH_SOURCES[source],
+                                                          user_id=target_id, after=cursor, limit=MOD_SEARCH_PAGE_SIZE),
+            lambda pager: mod_search_embed(pager, interaction.guild, query, target_id),
+            "Only the moderator who ran this search can page through it."
+        )
+        await view.load_page()
+        
+        if not view.records:
+            await interaction.followup.send("❌ No warnings or notes match this search.", ephemeral=True)
+            return
+        
+        await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
+    
+    @app_commands.command(name="history", description="View a user's moderation timeline")
+    @app_commands.describe(user="User to show the history of")
+    @app_commands.default_permissions(moderate_members=True)
+    async def history(
+        self,
+        interaction: discord.Interaction,
+        user: discord.User
+    ):
+        if not await has_permissions(self.db, interaction, "history"):
+            await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        view = KeysetPager(
+            interaction.user.id,
+            lambda cursor: self.db.get_user_history(interaction.guild.id, user.id, before=cursor, limit=HISTORY_PAGE_SIZE),
+            lambda pager: history_embed(pager, interaction.guild, user),
+            "Only the moderator who opened this history can page through it."
+        )
+        await view.load_page()
+        
+        if not view.records:
+            await interaction.followup.send(f"{user.mention} has no moderation history.", ephemeral=True)
+            return
+        
+        await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
+    
     @app_commands.command(name="verify", description="Verify a user and assign starter roles")
     @app_commands.describe(user="User to verify")
     @app_commands.default_permissions(moderate_members=True)
@@ -494,11 +1036,6 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        await interaction.response.send_message(
-            f"✅ {user.mention} has been verified!",
-            ephemeral=True
-        )
-        
         config = await self.db.get_guild_config(interaction.guild.id)
         if config and config.get('audit_log_enabled'):
             await self.db.add_audit_log(
@@ -508,6 +1045,11 @@ class Moderation(commands.Cog):
                 user.id,
                 "User verified"
             )
+        
+        await interaction.response.send_message(
+            f"✅ {user.mention} has been verified!",
+            ephemeral=True
+        )
     
     @app_commands.command(name="report", description="Report a message to staff for review")
     @app_commands.describe(message_link="Link to the message to report")
@@ -516,6 +1058,11 @@ class Moderation(commands.Cog):
         interaction: discord.Interaction,
         message_link: str
     ):
+        target = parse_message_link(message_link)
+        if target is None or target[0] != interaction.guild.id:
+            await interaction.response.send_message("❌ That is not a link to a message in this server.", ephemeral=True)
+            return
+        
         await interaction.response.defer(ephemeral=True)
         
         config = await self.db.get_guild_config(interaction.guild.id)
@@ -534,20 +1081,93 @@ class Moderation(commands.Cog):
             )
             return
         
-        embed = discord.Embed(
-            title="📋 Message Reported",
-            color=discord.Color.red(),
-            timestamp=discord.utils.utcnow()
-        )
-        embed.add_field(name="Reported By", value=interaction.user.mention, inline=True)
-        embed.add_field(name="Message Link", value=message_link, inline=False)
+        entry, created, counted = self.reports.add(target, interaction.user.id)
+        if not counted:
+            await interaction.followup.send("You have already reported this message.", ephemeral=True)
+            return
+        
+        if created:
+            try:
+                await self.open_report(entry, interaction.user.id, logging_channel)
+            except Exception as e:
+                # Later reports would otherwise join an entry that never gets a triage message.
+                self.reports.discard(entry)
+                if not isinstance(e, discord.HTTPException):
+                    raise
+                await interaction.followup.send("❌ Could not post the report to the logging channel.", ephemeral=True)
+                return
         
-        await logging_channel.send(embed=embed)
         await interaction.followup.send(
             "✅ Message has been reported to staff.",
             ephemeral=True
         )
     
+    async def open_report(self, entry: OpenReport, reporter_id: int, logging_channel: discord.TextChannel):
+        """Reuse the open report of the message from before a restart, or post a new triage message."""
+        guild_id, channel_id, message_id = entry.key
+        record = await self.db.get_open_report(guild_id, channel_id, message_id,
+                                               datetime.utcnow() - self.reports.window)
+        if record is not None:
+            self.reports.attach(entry, record, base_count=record['report_count'])
+            return
+        
+        draft = {
+            'guild_id': guild_id, 'channel_id': channel_id, 'message_id': message_id, 'reporter_id': reporter_id,
+            'report_count': entry.count, 'status': 'open', 'claimed_by': None, 'resolved_by': None,
+            'created_at': datetime.utcnow()
+        }
+        message = await logging_channel.send(embed=report_embed(draft), view=ReportTriageView(self))
+        record = await self.db.create_report(guild_id, channel_id, message_id, reporter_id,
+                                             logging_channel.id, message.id, draft['report_count'])
+        self.reports.attach(entry, record)
+    
+    async def refresh_report(self, entry: OpenReport):
+        record = entry.record
+        record.report_count = entry.count
+        await self.db.update_report_count(record.id, record.report_count)
+        channel = self.bot.get_channel(record.triage_channel_id)
+        if channel is not None:
+            await channel.get_partial_message(record.triage_message_id).edit(embed=report_embed(record))
+    
+    async def triage_report(self, interaction: discord.Interaction, action: str):
+        if not interaction.user.guild_permissions.moderate_members or \
+                not await has_permissions(self.db, interaction, "report-triage"):
+            await interaction.response.send_message("You don't have permission to triage reports.", ephemeral=True)
+            return
+        
+        entry = self.reports.find(interaction.message.id)
+        config = await self.db.get_guild_config(interaction.guild.id)
+        async with self.db.transaction():
+            if action == "claim":
+                record = await self.db.claim_report(interaction.guild.id, interaction.message.id, interaction.user.id)
+            else:
+                record = await self.db.resolve_report(interaction.guild.id, interaction.message.id, interaction.user.id,
+                                                      entry.count if entry else None)
+            if record is not None:
+                if entry is not None:
+                    if action == "claim" and entry.count != record.report_count:
+                        await self.db.update_report_count(record.id, entry.count)
+                    record.report_count = entry.count
+                if config and config.get('audit_log_enabled'):
+                    await self.db.add_audit_log(
+                        interaction.guild.id,
+                        f"report_{record.status}",
+                        interaction.user.id,
+                        details=f"Report #{record.id} ({record.report_count} reports): {message_link(record)}"
+                    )
+        if record is None:
+            await interaction.response.send_message("This report has already been handled.", ephemeral=True)
+            return
+        
+        if entry is not None:
+            if action == "claim":
+                entry.record = record
+                self.reports.mark_rendered(entry)
+            else:
+                self.reports.discard(entry)
+        
+        await interaction.response.edit_message(embed=report_embed(record), view=ReportTriageView(self, record.status))
+    
     @app_commands.command(name="clean-bots", description="Delete bot spam messages from the channel")
     @app_commands.describe(amount="Number of messages to check (default: 50)")
     @app_commands.default_permissions(manage_messages=True)
@@ -560,52 +1180,54 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        await interaction.response.defer(ephemeral=True)
-        
-        def is_bot(message):
-            return message.author.bot
-        
-        try:
-            deleted = await interaction.channel.purge(limit=amount, check=is_bot)
-            
-            await interaction.followup.send(
-                f"✅ Deleted {len(deleted)} bot message(s).",
-                ephemeral=True
-            )
-            
-            config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
-                await self.db.add_audit_log(
-                    interaction.guild.id,
-                    "clean_bots",
-                    interaction.user.id,
-                    details=f"Deleted {len(deleted)} bot messages"
-                )
-        except discord.Forbidden:
-            await interaction.followup.send(
-                "❌ I don't have permission to delete messages.",
+        if amount < 1 or amount > PURGE_MAX_SCAN:
+            await interaction.response.send_message(
+                f"❌ Amount must be between 1 and {PURGE_MAX_SCAN}.",
                 ephemeral=True
             )
+            return
+        
+        await self.run_purge(interaction, PurgeFilter(bots_only=True), None, amount, "clean_bots")
     
     @app_commands.command(name="raid-shield", description="Enable or disable raid protection mode")
-    @app_commands.describe(action="Enable or disable raid shield")
+    @app_commands.describe(
+        action="Enable, disable or check the raid shield",
+        join_threshold="Joins within the window that trigger the shield (default: 10)",
+        window_seconds="Length of the join window in seconds (default: 30)",
+        min_account_age_days="Accounts younger than this are treated as suspicious (default: 7)"
+    )
     @app_commands.default_permissions(administrator=True)
     async def raid_shield(
         self,
         interaction: discord.Interaction,
-        action: Literal["enable", "disable"]
+        action: Literal["enable", "disable", "status"],
+        join_threshold: Optional[int] = None,
+        window_seconds: Optional[int] = None,
+        min_account_age_days: Optional[int] = None
     ):
         if not await has_permissions(self.db, interaction, "raid-shield"):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        enabled = action == "enable"
-        
-        await interaction.response.send_message(
-            f"🛡️ Raid shield {'enabled' if enabled else 'disabled'}.\n"
-            f"{'Server is now in lockdown mode.' if enabled else 'Server is back to normal.'}",
-            ephemeral=True
-        )
+        if action == "status":
+            state = self.raid_detector.get_state(interaction.guild.id)
+            if not state:
+                await interaction.response.send_message("🛡️ Raid shield is disabled.", ephemeral=True)
+                return
+            
+            if self.raid_detector.cool_down(interaction.guild.id):
+                await self.stand_down(interaction.guild, state)
+            state.evict(time.monotonic())
+            settings = state.settings
+            await interaction.response.send_message(
+                f"🛡️ Raid shield is enabled.\n"
+                f"**Status:** {LEVEL_NAMES[state.level]}\n"
+                f"**Joins in window:** {len(state.joins)}/{settings.join_threshold} ({settings.window_seconds}s)\n"
+                f"**New accounts in window:** {state.young_count}\n"
+                f"**Members actioned:** {state.actioned_total}",
+                ephemeral=True
+            )
+            return
         
         config = await self.db.get_guild_config(interaction.guild.id)
         if config and config.get('audit_log_enabled'):
@@ -615,6 +1237,166 @@ class Moderation(commands.Cog):
                 interaction.user.id,
                 details=f"Raid shield {action}d"
             )
+        
+        if action == "enable":
+            settings = RaidSettings()
+            if join_threshold is not None:
+                settings.join_threshold = max(2, join_threshold)
+            if window_seconds is not None:
+                settings.window_seconds = max(1, window_seconds)
+            if min_account_age_days is not None:
+                settings.min_account_age_days = max(0, min_account_age_days)
+            self.raid_detector.arm(interaction.guild.id, settings)
+            
+            await interaction.response.send_message(
+                f"🛡️ Raid shield enabled.\n"
+                f"Escalating when {settings.join_threshold} members join within {settings.window_seconds}s.",
+                ephemeral=True
+            )
+        else:
+            await interaction.response.defer(ephemeral=True)
+            
+            state = self.raid_detector.disarm(interaction.guild.id)
+            if state and state.previous_verification_level is not None:
+                try:
+                    await interaction.guild.edit(
+                        verification_level=state.previous_verification_level,
+                        invites_disabled=False,
+                        reason="Raid shield disabled"
+                    )
+                except discord.HTTPException:
+                    pass
+            
+            await interaction.followup.send(
+                "🛡️ Raid shield disabled.\nServer is back to normal.",
+                ephemeral=True
+            )
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if not self.raid_detector.is_armed(member.guild.id):
+            return
+        
+        state = self.raid_detector.cool_down(member.guild.id)
+        if state:
+            await self.stand_down(member.guild, state)
+        
+        level = self.raid_detector.record_join(
+            member.guild.id,
+            member.id,
+            member.name,
+            member.created_at
+        )
+        cohort = self.raid_detector.drain_cohort(member.guild.id)
+        
+        if level or cohort:
+            await self.apply_raid_actions(member.guild, level, cohort)
+    
+    async def apply_raid_actions(self, guild: discord.Guild, level: int, cohort: List[int]):
+        state = self.raid_detector.get_state(guild.id)
+        if not state:
+            return
+        
+        if level >= LEVEL_VERIFICATION:
+            if state.previous_verification_level is None:
+                state.previous_verification_level = guild.verification_level
+            try:
+                await guild.edit(
+                    verification_level=discord.VerificationLevel.highest,
+                    invites_disabled=level >= LEVEL_LOCKDOWN,
+                    reason="Raid shield escalation"
+                )
+            except discord.HTTPException:
+                pass
+        
+        timed_out = 0
+        if cohort:
+            until = discord.utils.utcnow() + timedelta(minutes=state.settings.timeout_minutes)
+            members = [guild.get_member(user_id) for user_id in cohort]
+            results = await gather_bounded(
+                member.timeout(until, reason="Raid shield: join cohort")
+                for member in members if member
+            )
+            timed_out = sum(1 for result in results if not isinstance(result, Exception))
+        
+        if not level:
+            return
+        
+        config = await self.db.get_guild_config(guild.id)
+        if config and config.get('audit_log_enabled'):
+            await self.db.add_audit_log(
+                guild.id,
+                "raid_detected",
+                details=f"Escalated to: {LEVEL_NAMES[level]}, Timed out: {timed_out}"
+            )
+        
+        if config and config.get('logging_channel_id'):
+            logging_channel = guild.get_channel(config['logging_channel_id'])
+            if logging_channel:
+                embed = discord.Embed(
+                    title="🚨 Raid Detected",
+                    description=f"**Status:** {LEVEL_NAMES[level]}",
+                    color=discord.Color.red(),
+                    timestamp=discord.utils.utcnow()
+                )
+                embed.add_field(name="Joins in Window", value=str(len(state.joins)), inline=True)
+                embed.add_field(name="New Accounts", value=str(state.young_count), inline=True)
+                embed.add_field(name="Timed Out", value=str(timed_out), inline=True)
+                try:
+                    await logging_channel.send(embed=embed)
+                except discord.HTTPException:
+                    pass
+    
+    async def stand_down(self, guild: discord.Guild, state: GuildRaidState):
+        if state.previous_verification_level is not None:
+            try:
+                await guild.edit(
+                    verification_level=state.previous_verification_level,
+                    invites_disabled=False,
+                    reason="Raid shield cooled down"
+                )
+            except discord.HTTPException:
+                pass
+            state.previous_verification_level = None
+        
+        quiet = f"No raid joins for {state.settings.cooldown_seconds}s"
+        config = await self.db.get_guild_config(guild.id)
+        if config and config.get('audit_log_enabled'):
+            await self.db.add_audit_log(
+                guild.id,
+                "raid_cooldown",
+                details=f"Raid shield stood down: {quiet}"
+            )
+        
+        if config and config.get('logging_channel_id'):
+            logging_channel = guild.get_channel(config['logging_channel_id'])
+            if logging_channel:
+                embed = discord.Embed(
+                    title="✅ Raid Shield Stood Down",
+                    description=f"**Status:** {LEVEL_NAMES[state.level]}\n{quiet}; server settings restored.",
+                    color=discord.Color.green(),
+                    timestamp=discord.utils.utcnow()
+                )
+                try:
+                    await logging_channel.send(embed=embed)
+                except discord.HTTPException:
+                    pass
+    
+    @tasks.loop(minutes=1)
+    async def raid_cool_down(self):
+        # Lockdown disables invites, so a raided guild may see no join that would let it cool down.
+        for guild_id in list(self.raid_detector.guilds):
+            state = self.raid_detector.cool_down(guild_id)
+            guild = self.bot.get_guild(guild_id)
+            if state and guild:
+                try:
+                    await self.stand_down(guild, state)
+                except Exception as e:
+                    logger.error(f"Raid shield stand-down failed for guild {guild_id}: {e}")
+    
+    @raid_cool_down.before_loop
+    async def before_raid_cool_down(self):
+        await self.bot.wait_until_ready()
     
     @app_commands.command(name="lock-channel", description="Lock the current channel")
     @app_commands.default_permissions(manage_channels=True)
@@ -629,11 +1411,6 @@ class Moderation(commands.Cog):
                 send_messages=False
             )
             
-            await interaction.response.send_message(
-                "🔒 Channel locked. Only moderators can send messages.",
-                ephemeral=True
-            )
-            
             config = await self.db.get_guild_config(interaction.guild.id)
             if config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
@@ -642,6 +1419,11 @@ class Moderation(commands.Cog):
                     interaction.user.id,
                     details=f"Locked {interaction.channel.name}"
                 )
+            
+            await interaction.response.send_message(
+                "🔒 Channel locked. Only moderators can send messages.",
+                ephemeral=True
+            )
         except discord.Forbidden:
             await interaction.response.send_message(
                 "❌ I don't have permission to manage channel permissions.",
@@ -661,11 +1443,6 @@ class Moderation(commands.Cog):
                 send_messages=None
             )
             
-            await interaction.response.send_message(
-                "🔓 Channel unlocked. Everyone can send messages again.",
-                ephemeral=True
-            )
-            
             config = await self.db.get_guild_config(interaction.guild.id)
             if config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
@@ -674,6 +1451,11 @@ class Moderation(commands.Cog):
                     interaction.user.id,
                     details=f"Unlocked {interaction.channel.name}"
                 )
+            
+            await interaction.response.send_message(
+                "🔓 Channel unlocked. Everyone can send messages again.",
+                ephemeral=True
+            )
         except discord.Forbidden:
             await interaction.response.send_message(
                 "❌ I don't have permission to manage channel permissions.",
@@ -702,6 +1484,15 @@ class Moderation(commands.Cog):
         try:
             await interaction.channel.edit(slowmode_delay=seconds)
             
+            config = await self.db.get_guild_config(interaction.guild.id)
+            if config and config.get('audit_log_enabled'):
+                await self.db.add_audit_log(
+                    interaction.guild.id,
+                    "slowmode",
+                    interaction.user.id,
+                    details=f"Set slowmode to {seconds}s in {interaction.channel.name}"
+                )
+            
             if seconds == 0:
                 await interaction.response.send_message(
                     "✅ Slowmode disabled.",
@@ -712,15 +1503,6 @@ class Moderation(commands.Cog):
                     f"✅ Slowmode set to {seconds} second(s).",
                     ephemeral=True
                 )
-            
-            config = await self.db.get_guild_config(interaction.guild.id)
-            if config and config.get('audit_log_enabled'):
-                await self.db.add_audit_log(
-                    interaction.guild.id,
-                    "slowmode",
-                    interaction.user.id,
-                    details=f"Set slowmode to {seconds}s in {interaction.channel.name}"
-                )
         except discord.Forbidden:
             await interaction.response.send_message(
                 "❌ I don't have permission to edit this channel.",
@@ -768,7 +1550,161 @@ class Moderation(commands.Cog):
             inline=False
         )
         
+        dossier = await self.get_dossier(interaction.guild.id, user.id)
+        
+        warnings_value = f"**Total:** {dossier['warning_count']}"
+        for warning in dossier['recent_warnings']:
+            warnings_value += f"\n#{warning['id']} ({warning['created_at'].strftime('%Y-%m-%d')}): {warning['reason'][:80]}"
+        embed.add_field(name="⚠️ Warnings", value=warnings_value, inline=False)
+        
+        notes_value = f"**Total:** {dossier['note_count']}"
+        for note in dossier['recent_notes']:
+            notes_value += f"\n#{note['id']} ({note['created_at'].strftime('%Y-%m-%d')}): {note['note'][:80]}"
+        embed.add_field(name="📝 Staff Notes", value=notes_value, inline=False)
+        
+        if dossier['mute_expires_at']:
+            embed.add_field(
+                name="🔇 Active Mute",
+                value=f"Until {dossier['mute_expires_at'].strftime('%Y-%m-%d %H:%M')}\n"
+                      f"**Reason:** {(dossier['mute_reason'] or 'No reason provided')[:80]}",
+                inline=True
+            )
+        
+        if dossier['is_blacklisted']:
+            embed.add_field(
+                name="⛔ Blacklisted",
+                value=f"Since {dossier['blacklisted_at'].strftime('%Y-%m-%d')}\n"
+                      f"**Reason:** {(dossier['blacklist_reason'] or 'No reason provided')[:80]}",
+                inline=True
+            )
+        
+        if dossier['clan_rank'] or dossier['hangar_power'] is not None:
+            last_active = dossier['last_active'].strftime('%Y-%m-%d') if dossier['last_active'] else "Unknown"
+            embed.add_field(
+                name="🏰 Clan Member",
+                value=f"**Rank:** {dossier['clan_rank'] or 'N/A'}\n"
+                      f"**League:** {dossier['league'] or 'N/A'}\n"
+                      f"**Power:** {dossier['hangar_power'] if dossier['hangar_power'] is not None else 'N/A'}\n"
+                      f"**Last Active:** {last_active}{' (inactive)' if dossier['is_inactive'] else ''}",
+                inline=True
+            )
+        
         await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    async def get_dossier(self, guild_id: int, user_id: int) -> dict:
+        dossier = self.dossier_cache.get((guild_id, user_id))
+        if dossier is None:
+            dossier = await self.db.get_moderation_dossier(guild_id, user_id)
+            self.dossier_cache.set((guild_id, user_id), dossier)
+        return dossier
+
+
+def mod_search_embed(pager: KeysetPager, guild: discord.Guild, query: str, target_id: Optional[int]) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"🔎 Moderation Search: {query[:200]}",
+        color=discord.Color.blue(),
+        timestamp=discord.utils.utcnow()
+    )
+    
+    for record in pager.records:
+        author = guild.get_member(record.author_id)
+        author_name = author.name if author else f"Unknown ({record.author_id})"
+        label = "Warning" if record.kind == 'warning' else "Note"
+        embed.add_field(
+            name=f"{label} #{record.id} - by {author_name}",
+            value=f"<@{record.user_id}>: {record.headline[:900]}\n*{record.created_at.strftime('%Y-%m-%d %H:%M')}*",
+            inline=False
+        )
+    
+    scope = f"<@{target_id}>" if target_id else "whole server"
+    embed.set_footer(text=f"Page {pager.page + 1} · best matches first")
+    embed.description = f"Scope: {scope}"
+    return embed
+
+
+def message_link(report: Mapping) -> str:
+    return f"https://discord.com/channels/{report['guild_id']}/{report['channel_id']}/{report['message_id']}"
+
+
+def report_embed(report: Mapping) -> discord.Embed:
+    embed = discord.Embed(
+        title="📋 Message Reported",
+        color=REPORT_COLORS[report['status']],
+        timestamp=report['created_at'].replace(tzinfo=timezone.utc)
+    )
+    embed.add_field(name="Reported By", value=f"<@{report['reporter_id']}>", inline=True)
+    embed.add_field(name="Reports", value=str(report['report_count']), inline=True)
+    if report['status'] == 'resolved':
+        status = f"✅ Resolved by <@{report['resolved_by']}>"
+    elif report['status'] == 'claimed':
+        status = f"👀 Claimed by <@{report['claimed_by']}>"
+    else:
+        status = "🔴 Open"
+    embed.add_field(name="Status", value=status, inline=True)
+    embed.add_field(name="Message Link", value=message_link(report), inline=False)
+    return embed
+
+
+class ReportTriageView(discord.ui.View):
+    """Persistent Claim/Resolve buttons; the report is looked up by the triage message they are attached to."""
+    
+    def __init__(self, cog: Moderation, status: str = 'open'):
+        super().__init__(timeout=None)
+        self.cog = cog
+        self.claim.disabled = status != 'open'
+        self.resolve.disabled = status == 'resolved'
+    
+    @discord.ui.button(label="Claim", style=discord.ButtonStyle.primary, custom_id="report:claim")
+    async def claim(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.triage_report(interaction, "claim")
+    
+    @discord.ui.button(label="Resolve", style=discord.ButtonStyle.success, custom_id="report:resolve")
+    async def resolve(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.triage_report(interaction, "resolve")
+
+
+def history_embed(pager: KeysetPager, guild: discord.Guild, target: discord.User) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"📜 Moderation History for {target.name}",
+        color=discord.Color.blue(),
+        timestamp=discord.utils.utcnow()
+    )
+    
+    for record in pager.records:
+        author = guild.get_member(record.author_id) if record.author_id else None
+        author_name = author.name if author else f"Unknown ({record.author_id})"
+        label = HISTORY_LABELS[record.kind]
+        if record.kind == 'audit':
+            label = f"{label} {record.action.replace('_', ' ').title()}"
+        details = (record.details or "No details")[:900]
+        if record.expires_at:
+            details = f"{details} (until {record.expires_at.strftime('%Y-%m-%d %H:%M')})"
+        embed.add_field(
+            name=f"{label} - by {author_name}",
+            value=f"{details}\n*{record.created_at.strftime('%Y-%m-%d %H:%M')}*",
+            inline=False
+        )
+    
+    embed.set_footer(text=f"Page {pager.page + 1} · newest first")
+    return embed
+
+
+class PurgeCancelView(discord.ui.View):
+    def __init__(self, user_id: int):
+        super().__init__(timeout=None)
+        self.user_id = user_id
+        self.job = None
+    
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.danger)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("Only the moderator who started this purge can cancel it.", ephemeral=True)
+            return
+        
+        if self.job:
+            self.job.cancel()
+        button.disabled = True
+        await interaction.response.edit_message(content="⏹️ Cancelling purge...", view=self)
 
 
 async def setup(bot):
@@ -68,8 +68,6 @@ class Utility(commands.Cog):
                 else:
                     await interaction.channel.send(message)
             
-            await interaction.followup.send("Message sent successfully!", ephemeral=True)
-            
             config = await self.db.get_guild_config(interaction.guild.id)
             if config and config.get('audit_log_enabled'):
                 await self.db.add_audit_log(
@@ -78,6 +76,8 @@ class Utility(commands.Cog):
                     interaction.user.id,
                     details=f"Format: {format}, Reply: {reply is not None}"
                 )
+            
+            await interaction.followup.send("Message sent successfully!", ephemeral=True)
         
         except discord.Forbidden:
             await interaction.followup.send("I don't have permission to send messages in this channel.", ephemeral=True)
@@ -126,16 +126,16 @@ class Utility(commands.Cog):
         
         embed.add_field(
             name="⚙️ Administrative Commands",
-            value="`/setup` `/reset-bot` `/config view` `/config set` `/clan set-tag` `/clan set-requirements` "
-                  "`/clan message` `/backup` `/restore` `/listbackups` `/permissions set` `/blacklist add` "
+            value="`/setup` `/reset-bot` `/config view` `/config set` `/config rate-limit` `/clan set-tag` `/clan set-requirements` "
+                  "`/clan compliance` `/clan message` `/clan delivery-status` `/backup` `/restore` `/listbackups` `/permissions set` `/blacklist add` "
                   "`/blacklist remove` `/audit-log` `/auto-roles`",
             inline=False
         )
         
         embed.add_field(
             name="🛡️ Moderation Commands",
-            value="`/warn` `/warnings` `/remove-warning` `/mute` `/unmute` `/kick` `/ban` `/unban` "
-                  "`/purge` `/note` `/notes` `/verify` `/report` `/clean-bots` `/raid-shield` "
+            value="`/warn` `/warnings` `/remove-warning` `/escalation` `/mute` `/unmute` `/kick` `/ban` `/unban` `/bulk-mod` "
+                  "`/purge` `/note` `/notes` `/mod-search` `/history` `/verify` `/report` `/clean-bots` `/raid-shield` "
                   "`/lock-channel` `/unlock-channel` `/slowmode` `/scan-profile`",
             inline=False
         )
@@ -143,7 +143,7 @@ class Utility(commands.Cog):
         embed.add_field(
             name="👥 Member Management",
             value="`/role-link` `/sync-ranks` `/import-members` `/export-members` "
-                  "`/activity-threshold` `/force-activity-scan`",
+                  "`/activity-threshold` `/force-activity-scan` `/member-search` `/leaderboard`",
             inline=False
         )
         
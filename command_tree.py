@@ -0,0 +1,41 @@
+import discord
+from discord import app_commands
+from utils.tracing import current_trace
+
+
+def command_name(interaction: discord.Interaction) -> str:
+    command = interaction.command
+    if command is not None:
+        return command.qualified_name
+    return interaction.data.get('name', 'unknown') if interaction.data else 'unknown'
+
+
+class ClanCommandTree(app_commands.CommandTree):
+    async def _call(self, interaction: discord.Interaction):
+        name = command_name(interaction)
+        with self.client.tracer.trace(name, interaction.guild_id, interaction.user.id):
+            async with self.client.db.session(name) as session:
+                await super()._call(interaction)
+                if interaction.command_failed:
+                    session.failed = True
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is not discord.InteractionType.application_command or interaction.guild_id is None:
+            return True
+        
+        name = command_name(interaction)
+        retry_after = await self.client.rate_limiter.check(interaction.guild_id, interaction.user.id, name)
+        if retry_after is None:
+            return True
+        
+        await interaction.response.send_message(
+            f"⏳ `/{name}` is rate limited. Try again in {max(1, round(retry_after))}s.",
+            ephemeral=True
+        )
+        return False
+    
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        trace = current_trace.get()
+        if trace is not None:
+            trace.error = type(getattr(error, 'original', error)).__name__
+        await super().on_error(interaction, error)
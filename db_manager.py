@@ -1,20 +1,234 @@
 import asyncpg
+import asyncio
 import os
-import json
-from typing import Optional, List, Dict, Any
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable
 from datetime import datetime, timedelta
+from records import (
+    AuditLogRecord, BackupSummaryRecord, DeliveryRecord, EscalationRuleRecord, HistoryRecord, MemberRecord, MuteRecord,
+    RecordColumns, ReportRecord, RoleMappingRecord, StaffNoteRecord, TextSearchRecord, WarningRecord
+)
+from utils.offload import offload
+from utils.runtime import dumps, init_connection, loads
+from utils.roster import RosterMirror
+from utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Rank and league live in lookup tables that members reference by smallint code; reads decode them by
+# joining, and RETURNING, which cannot join, through scalar subqueries.
+MEMBER_COLUMNS = ("m.id, m.guild_id, m.user_id, m.username, r.name AS clan_rank, m.hangar_power, l.name AS league, "
+                  "m.last_active, m.is_inactive, m.joined_at")
+MEMBERS_TABLE = ("members m LEFT JOIN member_ranks r ON r.id = m.rank_id "
+                 "LEFT JOIN member_leagues l ON l.id = m.league_id")
+MEMBER_RETURNING = ("id, guild_id, user_id, username, "
+                    "(SELECT name FROM member_ranks WHERE member_ranks.id = rank_id) AS clan_rank, hangar_power, "
+                    "(SELECT name FROM member_leagues WHERE member_leagues.id = league_id) AS league, "
+                    "last_active, is_inactive, joined_at")
+
+# Searchable moderation text: kind -> (table, text column, author column).
+TEXT_SEARCH_SOURCES = {
+    'warning': ('warnings', 'reason', 'moderator_id'),
+    'note': ('staff_notes', 'note', 'staff_id'),
+}
+
+# Sources of a user's moderation timeline: kind -> (table, user column, selected columns, extra condition).
+# Warnings are logged to audit_logs as well, so the audit branch leaves them to the warnings table.
+HISTORY_SOURCES = {
+    'mute': ('mutes', 'user_id', "moderator_id, 'mute', reason, expires_at", ""),
+    'warning': ('warnings', 'user_id', "moderator_id, 'warn', reason, NULL::timestamp", ""),
+    'note': ('staff_notes', 'user_id', "staff_id, 'note', note, NULL::timestamp", ""),
+    'audit': ('audit_logs', 'target_user_id', "moderator_id, action_type, details, NULL::timestamp",
+              " AND action_type <> 'warn'"),
+}
+
+_current_session: ContextVar[Optional['DBSession']] = ContextVar('db_session', default=None)
+
+
+def active_session() -> Optional['DBSession']:
+    session = _current_session.get()
+    if session is None or session.closed:
+        return None
+    return session
+
+
+def parse_dossier_dates(dossier: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON aggregates carry timestamps as ISO strings; turn the recent entries' back into datetimes."""
+    for key in ('recent_warnings', 'recent_notes'):
+        for entry in dossier[key]:
+            entry['created_at'] = datetime.fromisoformat(entry['created_at'])
+    return dossier
+
+
+class SessionConnection:
+    def __init__(self, session: 'DBSession', conn: asyncpg.Connection, lock: Optional[asyncio.Lock] = None):
+        self._session = session
+        self._conn = conn
+        self._lock = lock
+    
+    async def _run(self, method: str, *args, **kwargs):
+        self._session.round_trips += 1
+        with span('db', method):
+            if self._lock is None:
+                return await getattr(self._conn, method)(*args, **kwargs)
+            # Tasks of one command share the connection of an open transaction one query at a time.
+            async with self._lock:
+                return await getattr(self._conn, method)(*args, **kwargs)
+    
+    async def fetch(self, *args, **kwargs):
+        return await self._run('fetch', *args, **kwargs)
+    
+    async def fetchrow(self, *args, **kwargs):
+        return await self._run('fetchrow', *args, **kwargs)
+    
+    async def fetchval(self, *args, **kwargs):
+        return await self._run('fetchval', *args, **kwargs)
+    
+    async def execute(self, *args, **kwargs):
+        return await self._run('execute', *args, **kwargs)
+    
+    async def executemany(self, *args, **kwargs):
+        return await self._run('executemany', *args, **kwargs)
+
+
+class LookupCodes:
+    """Cached name to code mapping for a lookup table; unseen names are added on first use."""
+    
+    def __init__(self, db: 'DatabaseManager', table: str, column: str):
+        self.db = db
+        self.table = table
+        self.column = column
+        self.codes: Dict[str, int] = {}
+    
+    async def load(self, names: Iterable[Optional[str]]):
+        # Call before opening a transaction: the rows are committed on their own connection, so the cache
+        # only holds committed codes and a transaction never waits on a second pooled connection.
+        missing = {name for name in names if name is not None and name not in self.codes}
+        if not missing:
+            return
+        query = f"SELECT id FROM {self.table} WHERE name = $1"
+        async with self.db.autocommit() as conn:
+            for name in missing:
+                code = await conn.fetchval(query, name)
+                if code is None:
+                    await conn.execute(
+                        f"INSERT INTO {self.table} (name) VALUES ($1) ON CONFLICT (name) DO NOTHING", name
+                    )
+                    code = await conn.fetchval(query, name)
+                self.codes[name] = code
+    
+    async def code(self, name: Optional[str]) -> Optional[int]:
+        if name is None:
+            return None
+        await self.load([name])
+        return self.codes[name]
+
+
+class DBSession:
+    """Per-command state: cached guild configs and round-trip counts.
+    
+    Queries borrow a pooled connection only while they run, and each write method commits on its own. A connection
+    is held across queries only inside `DatabaseManager.transaction()`, which commits when its block exits.
+    """
+    
+    def __init__(self, pool: asyncpg.Pool, name: str):
+        self.pool = pool
+        self.name = name
+        self.round_trips = 0
+        self.failed = False
+        self.closed = False
+        self.depth = 0
+        self.configs: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.rollback_hooks: List[Callable[[], None]] = []
+        self.lock = asyncio.Lock()
+        self._conn: Optional[asyncpg.Connection] = None
+        self._transaction = None
+    
+    @asynccontextmanager
+    async def connection(self, write: bool = False):
+        if self.depth and write and self._conn is None:
+            async with self.lock:
+                if self._conn is None:
+                    await self.begin()
+        if self._conn is not None:
+            yield SessionConnection(self, self._conn, self.lock)
+            return
+        
+        async with self.pool.acquire() as conn:
+            if not write:
+                yield SessionConnection(self, conn)
+                return
+            self.round_trips += 2
+            try:
+                async with conn.transaction():
+                    yield SessionConnection(self, conn)
+            except BaseException:
+                self.rolled_back()
+                raise
+    
+    async def begin(self):
+        conn = await self.pool.acquire()
+        try:
+            transaction = conn.transaction()
+            await transaction.start()
+        except BaseException:
+            await self.pool.release(conn)
+            raise
+        self._conn, self._transaction = conn, transaction
+        self.round_trips += 1
+    
+    async def end(self, commit: bool):
+        if self._transaction is None:
+            return
+        try:
+            if commit:
+                await self._transaction.commit()
+                self.rollback_hooks.clear()
+            else:
+                await self._transaction.rollback()
+                self.rolled_back()
+            self.round_trips += 1
+        finally:
+            await self.pool.release(self._conn)
+            self._conn = None
+            self._transaction = None
+    
+    def rolled_back(self):
+        for hook in self.rollback_hooks:
+            hook()
+        self.rollback_hooks.clear()
+    
+    async def close(self):
+        self.closed = True
+        await self.end(commit=not self.failed)
 
 
 class DatabaseManager:
+    FUZZY_NAME_MATCH = "username % {0}"
+    # Only run for the rows of the returned page; `body` is the matched text and $2 the query.
+    TEXT_SEARCH_HEADLINE = ("ts_headline('english', body, websearch_to_tsquery('english', $2), "
+                            "'StartSel=**, StopSel=**, MaxFragments=2, MaxWords=24, MinWords=8')")
+    
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        self.round_trip_stats: Dict[str, List[int]] = {}
+        self.rosters = RosterMirror(self)
+        self.member_codes = {
+            'clan_rank': LookupCodes(self, 'member_ranks', 'rank_id'),
+            'league': LookupCodes(self, 'member_leagues', 'league_id')
+        }
     
     async def connect(self):
         database_url = os.getenv('DATABASE_URL')
         if not database_url:
             raise ValueError("DATABASE_URL environment variable is not set")
         
-        self.pool = await asyncpg.create_pool(database_url, min_size=2, max_size=10)
+        self.pool = await asyncpg.create_pool(database_url, min_size=2, max_size=10, init=init_connection)
         await self.initialize_schema()
     
     async def close(self):
@@ -22,22 +236,119 @@ class DatabaseManager:
             await self.pool.close()
     
     async def initialize_schema(self):
-        with open('database/schema.sql', 'r') as f:
+        with open(SCHEMA_PATH, 'r') as f:
             schema_sql = f.read()
         
         async with self.pool.acquire() as conn:
             await conn.execute(schema_sql)
     
-    async def get_guild_config(self, guild_id: int) -> Optional[Dict[str, Any]]:
+    @asynccontextmanager
+    async def acquire(self, write: bool = False):
+        session = active_session()
+        if session is None:
+            async with self.pool.acquire() as conn:
+                yield conn
+        else:
+            async with session.connection(write) as conn:
+                yield conn
+    
+    @asynccontextmanager
+    async def autocommit(self):
+        """A connection outside the command session whose statements commit on their own."""
         async with self.pool.acquire() as conn:
+            yield conn
+    
+    def create_session(self, name: str) -> DBSession:
+        return DBSession(self.pool, name)
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Commit the enclosed writes, such as an action and its audit row, together when the block exits.
+        
+        Keep Discord calls outside the block: the connection is held until it ends.
+        """
+        session = active_session()
+        if session is None:
+            async with self.session('transaction'):
+                async with self.transaction():
+                    yield
+            return
+        
+        session.depth += 1
+        committed = False
+        try:
+            yield
+            committed = True
+        finally:
+            session.depth -= 1
+            if not session.depth:
+                await session.end(commit=committed)
+    
+    @asynccontextmanager
+    async def session(self, name: str):
+        session = self.create_session(name)
+        token = _current_session.set(session)
+        try:
+            yield session
+        except BaseException:
+            session.failed = True
+            raise
+        finally:
+            _current_session.reset(token)
+            await session.close()
+            self.record_round_trips(name, session.round_trips)
+    
+    def record_round_trips(self, name: str, round_trips: int):
+        stats = self.round_trip_stats.setdefault(name, [0, 0, 0])
+        stats[0] += 1
+        stats[1] += round_trips
+        stats[2] = max(stats[2], round_trips)
+        logger.debug("/%s used %d database round trip(s)", name, round_trips)
+    
+    async def get_command_context(self, guild_id: int, user_id: int, command_name: str) -> Dict[str, Any]:
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(
+                """SELECT gc.*,
+                          EXISTS(SELECT 1 FROM blacklist WHERE guild_id = $1 AND user_id = $2) AS _is_blacklisted,
+                          ARRAY(SELECT required_role_id FROM permissions
+                                WHERE guild_id = $1 AND command_name = $3) AS _required_roles
+                   FROM (SELECT $1::bigint AS target_guild_id) AS target
+                   LEFT JOIN guild_configs gc ON gc.guild_id = target.target_guild_id""",
+                guild_id, user_id, command_name
+            )
+            result = dict(row)
+            context = {
+                'is_blacklisted': result.pop('_is_blacklisted'),
+                'required_roles': result.pop('_required_roles'),
+                'config': result if result['guild_id'] is not None else None
+            }
+            
+            session = active_session()
+            if session is not None:
+                session.configs[guild_id] = context['config']
+            return context
+    
+    async def get_guild_config(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        session = active_session()
+        if session is not None and guild_id in session.configs:
+            return session.configs[guild_id]
+        
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT * FROM guild_configs WHERE guild_id = $1",
                 guild_id
             )
-            return dict(row) if row else None
+            config = dict(row) if row else None
+            if session is not None:
+                session.configs[guild_id] = config
+            return config
     
     async def create_or_update_guild_config(self, guild_id: int, **kwargs):
-        async with self.pool.acquire() as conn:
+        session = active_session()
+        if session is not None:
+            session.configs.pop(guild_id, None)
+        
+        async with self.acquire(write=True) as conn:
             columns = ['guild_id'] + list(kwargs.keys())
             values = [guild_id] + list(kwargs.values())
             placeholders = ', '.join([f'${i+1}' for i in range(len(values))])
@@ -54,7 +365,7 @@ class DatabaseManager:
             await conn.execute(query, *values)
     
     async def add_warning(self, guild_id: int, user_id: int, moderator_id: int, reason: str) -> int:
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             row = await conn.fetchrow(
                 """INSERT INTO warnings (guild_id, user_id, moderator_id, reason)
                    VALUES ($1, $2, $3, $4) RETURNING id""",
@@ -62,57 +373,294 @@ class DatabaseManager:
             )
             return row['id']
     
-    async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def add_warnings_bulk(self, guild_id: int, user_ids: List[int], moderator_id: int, reason: str):
+        async with self.acquire(write=True) as conn:
+            await conn.executemany(
+                """INSERT INTO warnings (guild_id, user_id, moderator_id, reason)
+                   VALUES ($1, $2, $3, $4)""",
+                [(guild_id, user_id, moderator_id, reason) for user_id in user_ids]
+            )
+    
+    async def get_warnings(self, guild_id: int, user_id: int, limit: Optional[int] = None) -> List[WarningRecord]:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM warnings WHERE guild_id = $1 AND user_id = $2 ORDER BY created_at DESC",
-                guild_id, user_id
+                f"""SELECT {WarningRecord.columns} FROM warnings WHERE guild_id = $1 AND user_id = $2
+                   ORDER BY created_at DESC LIMIT $3""",
+                guild_id, user_id, limit
             )
-            return [dict(row) for row in rows]
+            return WarningRecord.from_rows(rows)
+    
+    async def count_warnings(self, guild_id: int, user_id: int, since: Optional[datetime] = None) -> int:
+        async with self.acquire() as conn:
+            return await conn.fetchval(
+                """SELECT COUNT(*) FROM warnings
+                   WHERE guild_id = $1 AND user_id = $2 AND ($3::timestamp IS NULL OR created_at >= $3)""",
+                guild_id, user_id, since
+            )
+    
+    async def get_warning_times(self, guild_id: int, user_id: int, since: datetime) -> List[datetime]:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT created_at FROM warnings
+                   WHERE guild_id = $1 AND user_id = $2 AND created_at >= $3
+                   ORDER BY created_at ASC""",
+                guild_id, user_id, since
+            )
+            return [row['created_at'] for row in rows]
     
     async def remove_warning(self, warning_id: int, guild_id: int) -> bool:
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             result = await conn.execute(
                 "DELETE FROM warnings WHERE id = $1 AND guild_id = $2",
                 warning_id, guild_id
             )
             return result != "DELETE 0"
     
+    async def get_moderation_dossier(self, guild_id: int, user_id: int, recent_limit: int = 3) -> Dict[str, Any]:
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""SELECT wc.warning_count, wr.recent_warnings,
+                          nc.note_count, nr.recent_notes,
+                          mu.expires_at AS mute_expires_at, mu.reason AS mute_reason,
+                          bl.reason AS blacklist_reason, bl.created_at AS blacklisted_at,
+                          bl.user_id IS NOT NULL AS is_blacklisted,
+                          mem.clan_rank, mem.hangar_power, mem.league, mem.last_active, mem.is_inactive
+                   FROM (SELECT $1::bigint AS guild_id, $2::bigint AS user_id) AS target
+                   CROSS JOIN LATERAL (
+                       SELECT COUNT(*) AS warning_count FROM warnings
+                       WHERE guild_id = target.guild_id AND user_id = target.user_id
+                   ) wc
+                   CROSS JOIN LATERAL (
+                       SELECT COALESCE(json_agg(json_build_object(
+                                  'id', recent.id,
+                                  'reason', recent.reason,
+                                  'created_at', recent.created_at
+                              ) ORDER BY recent.created_at DESC), '[]') AS recent_warnings
+                       FROM (
+                           SELECT id, reason, created_at FROM warnings
+                           WHERE guild_id = target.guild_id AND user_id = target.user_id
+                           ORDER BY created_at DESC LIMIT $3
+                       ) recent
+                   ) wr
+                   CROSS JOIN LATERAL (
+                       SELECT COUNT(*) AS note_count FROM staff_notes
+                       WHERE guild_id = target.guild_id AND user_id = target.user_id
+                   ) nc
+                   CROSS JOIN LATERAL (
+                       SELECT COALESCE(json_agg(json_build_object(
+                                  'id', recent.id,
+                                  'note', recent.note,
+                                  'created_at', recent.created_at
+                              ) ORDER BY recent.created_at DESC), '[]') AS recent_notes
+                       FROM (
+                           SELECT id, note, created_at FROM staff_notes
+                           WHERE guild_id = target.guild_id AND user_id = target.user_id
+                           ORDER BY created_at DESC LIMIT $3
+                       ) recent
+                   ) nr
+                   LEFT JOIN LATERAL (
+                       SELECT expires_at, reason FROM mutes
+                       WHERE guild_id = target.guild_id AND user_id = target.user_id
+                         AND expires_at > CURRENT_TIMESTAMP
+                   ) mu ON TRUE
+                   LEFT JOIN LATERAL (
+                       SELECT user_id, reason, created_at FROM blacklist
+                       WHERE guild_id = target.guild_id AND user_id = target.user_id
+                   ) bl ON TRUE
+                   LEFT JOIN LATERAL (
+                       SELECT r.name AS clan_rank, hangar_power, l.name AS league, last_active, is_inactive
+                       FROM {MEMBERS_TABLE}
+                       WHERE m.guild_id = target.guild_id AND m.user_id = target.user_id
+                   ) mem ON TRUE""",
+                guild_id, user_id, recent_limit
+            )
+            return parse_dossier_dates(dict(row))
+    
     async def add_staff_note(self, guild_id: int, user_id: int, staff_id: int, note: str):
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             await conn.execute(
                 """INSERT INTO staff_notes (guild_id, user_id, staff_id, note)
                    VALUES ($1, $2, $3, $4)""",
                 guild_id, user_id, staff_id, note
             )
     
-    async def get_staff_notes(self, guild_id: int, user_id: int) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def add_escalation_rule(self, guild_id: int, warning_count: int, window_days: int, action: str,
+                                  duration_minutes: Optional[int] = None) -> int:
+        async with self.acquire(write=True) as conn:
+            row = await conn.fetchrow(
+                """INSERT INTO escalation_rules (guild_id, warning_count, window_days, action, duration_minutes)
+                   VALUES ($1, $2, $3, $4, $5)
+                   ON CONFLICT (guild_id, warning_count, window_days) DO UPDATE
+                   SET action = EXCLUDED.action, duration_minutes = EXCLUDED.duration_minutes
+                   RETURNING id""",
+                guild_id, warning_count, window_days, action, duration_minutes
+            )
+            return row['id']
+    
+    async def get_escalation_rules(self, guild_id: int) -> List[EscalationRuleRecord]:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT {EscalationRuleRecord.columns} FROM escalation_rules WHERE guild_id = $1
+                   ORDER BY warning_count ASC, window_days DESC""",
+                guild_id
+            )
+            return EscalationRuleRecord.from_rows(rows)
+    
+    async def remove_escalation_rule(self, rule_id: int, guild_id: int) -> bool:
+        async with self.acquire(write=True) as conn:
+            result = await conn.execute(
+                "DELETE FROM escalation_rules WHERE id = $1 AND guild_id = $2",
+                rule_id, guild_id
+            )
+            return result != "DELETE 0"
+    
+    def text_search_query(self, text: str) -> str:
+        return text.strip()
+    
+    def text_search_branch(self, kind: str, table: str, column: str, author_column: str) -> str:
+        tsquery = "websearch_to_tsquery('english', $2)"
+        return f"""SELECT '{kind}' AS kind, id, user_id, {author_column} AS author_id, created_at,
+                          ts_rank({column}_tsv, {tsquery}) AS rank, {column} AS body
+                   FROM {table} WHERE {column}_tsv @@ {tsquery}"""
+    
+    async def search_moderation_text(self, guild_id: int, text: str, kinds: Iterable[str] = tuple(TEXT_SEARCH_SOURCES),
+                                     user_id: Optional[int] = None, after: Optional[Tuple[float, str, int]] = None,
+                                     limit: int = 10) -> Tuple[List[TextSearchRecord], Optional[Tuple[float, str, int]]]:
+        """Warning reasons and staff notes matching `text` across the guild, best match first.
+        
+        `after` is the keyset cursor returned with the previous page.
+        """
+        query = self.text_search_query(text)
+        if not query:
+            return [], None
+        values: List[Any] = [guild_id, query]
+        
+        def param(value: Any) -> str:
+            values.append(value)
+            return f"${len(values)}"
+        
+        user_filter = f" AND user_id = {param(user_id)}" if user_id is not None else ""
+        branches = [
+            f"{self.text_search_branch(kind, *TEXT_SEARCH_SOURCES[kind])} AND guild_id = $1{user_filter}"
+            for kind in kinds
+        ]
+        keyset = ""
+        if after is not None:
+            keyset = f"WHERE (rank, kind, id) < ({param(after[0])}::real, {param(after[1])}, {param(after[2])})"
+        order = "rank DESC, kind DESC, id DESC"
+        
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT kind, id, user_id, author_id, created_at, rank, {self.TEXT_SEARCH_HEADLINE} AS headline
+                    FROM (SELECT * FROM ({' UNION ALL '.join(branches)}) hits {keyset}
+                          ORDER BY {order} LIMIT {param(limit + 1)}) page
+                    ORDER BY {order}""",
+                *values
+            )
+        
+        records = TextSearchRecord.from_rows(rows[:limit])
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = (last.rank, last.kind, last.id)
+        return records, next_cursor
+    
+    async def get_user_history(self, guild_id: int, user_id: int, before: Optional[Tuple[datetime, str, int]] = None,
+                               limit: int = 10) -> Tuple[List[HistoryRecord], Optional[Tuple[datetime, str, int]]]:
+        """One page of a user's warnings, notes, mute and audit entries, newest first.
+        
+        `before` is the keyset cursor returned with the previous page.
+        """
+        values: List[Any] = [guild_id, user_id]
+        
+        def param(value: Any) -> str:
+            values.append(value)
+            return f"${len(values)}"
+        
+        limit_param = param(limit + 1)
+        branches = []
+        for kind, (table, user_column, columns, condition) in HISTORY_SOURCES.items():
+            keyset = ""
+            if before is not None:
+                # Ties on created_at are broken by kind, then id, so each branch only compares what it can index.
+                created_at, cursor_kind, cursor_id = before
+                if kind == cursor_kind:
+                    keyset = f" AND (created_at, id) < ({param(created_at)}, {param(cursor_id)})"
+                else:
+                    keyset = f" AND created_at {'<=' if kind < cursor_kind else '<'} {param(created_at)}"
+            branches.append(
+                f"""SELECT * FROM (SELECT '{kind}' AS kind, id, {columns}, created_at FROM {table}
+                                  WHERE guild_id = $1 AND {user_column} = $2{condition}{keyset}
+                                  ORDER BY created_at DESC, id DESC LIMIT {limit_param}) {table}_page"""
+            )
+        
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM staff_notes WHERE guild_id = $1 AND user_id = $2 ORDER BY created_at DESC",
+                f"""{' UNION ALL '.join(branches)}
+                    ORDER BY created_at DESC, kind DESC, id DESC
+                    LIMIT {limit_param}""",
+                *values
+            )
+        
+        records = HistoryRecord.from_rows(rows[:limit])
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = (last.created_at, last.kind, last.id)
+        return records, next_cursor
+    
+    async def get_staff_notes(self, guild_id: int, user_id: int) -> List[StaffNoteRecord]:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT {StaffNoteRecord.columns} FROM staff_notes WHERE guild_id = $1 AND user_id = $2
+                   ORDER BY created_at DESC""",
                 guild_id, user_id
             )
-            return [dict(row) for row in rows]
+            return StaffNoteRecord.from_rows(rows)
     
     async def add_audit_log(self, guild_id: int, action_type: str, moderator_id: Optional[int] = None,
                             target_user_id: Optional[int] = None, details: Optional[str] = None):
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             await conn.execute(
                 """INSERT INTO audit_logs (guild_id, moderator_id, action_type, target_user_id, details)
                    VALUES ($1, $2, $3, $4, $5)""",
                 guild_id, moderator_id, action_type, target_user_id, details
             )
     
-    async def get_audit_logs(self, guild_id: int, limit: int = 50) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def add_audit_logs_bulk(self, guild_id: int, action_type: str, moderator_id: Optional[int],
+                                  entries: List[Tuple[Optional[int], Optional[str]]]):
+        async with self.acquire(write=True) as conn:
+            await conn.executemany(
+                """INSERT INTO audit_logs (guild_id, moderator_id, action_type, target_user_id, details)
+                   VALUES ($1, $2, $3, $4, $5)""",
+                [(guild_id, moderator_id, action_type, target_user_id, details) for target_user_id, details in entries]
+            )
+    
+    async def get_audit_logs(self, guild_id: int, limit: int = 50) -> List[AuditLogRecord]:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM audit_logs WHERE guild_id = $1 ORDER BY created_at DESC LIMIT $2",
+                f"SELECT {AuditLogRecord.columns} FROM audit_logs WHERE guild_id = $1 ORDER BY created_at DESC LIMIT $2",
                 guild_id, limit
             )
-            return [dict(row) for row in rows]
+            return AuditLogRecord.from_rows(rows)
     
-    async def add_member(self, guild_id: int, user_id: int, username: str, **kwargs):
-        async with self.pool.acquire() as conn:
+    def _members_written(self, guild_id: int, records: List[MemberRecord]):
+        self.rosters.apply(guild_id, records)
+        session = active_session()
+        if session is not None and records:
+            session.rollback_hooks.append(lambda: self.rosters.invalidate(guild_id))
+    
+    async def load_member_codes(self, members: Iterable[Dict[str, Any]]):
+        """Resolves the rank and league codes of a batch of members ahead of a transaction."""
+        members = list(members)
+        for name, codes in self.member_codes.items():
+            await codes.load(member.get(name) for member in members)
+    
+    async def add_member(self, guild_id: int, user_id: int, username: str, **kwargs) -> MemberRecord:
+        for name, codes in self.member_codes.items():
+            if name in kwargs:
+                kwargs[codes.column] = await codes.code(kwargs.pop(name))
+        async with self.acquire(write=True) as conn:
             columns = ['guild_id', 'user_id', 'username'] + list(kwargs.keys())
             values = [guild_id, user_id, username] + list(kwargs.values())
             placeholders = ', '.join([f'${i+1}' for i in range(len(values))])
@@ -124,46 +672,140 @@ class DatabaseManager:
                 INSERT INTO members ({columns_str})
                 VALUES ({placeholders})
                 ON CONFLICT (guild_id, user_id) DO UPDATE SET {update_str}
+                RETURNING {MEMBER_RETURNING}
             """
-            await conn.execute(query, *values)
+            record = MemberRecord(*await conn.fetchrow(query, *values))
+            self._members_written(guild_id, [record])
+            return record
     
-    async def get_member(self, guild_id: int, user_id: int) -> Optional[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def get_member(self, guild_id: int, user_id: int) -> Optional[MemberRecord]:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM members WHERE guild_id = $1 AND user_id = $2",
+                f"SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1 AND m.user_id = $2",
                 guild_id, user_id
             )
-            return dict(row) if row else None
+            return MemberRecord(*row) if row else None
     
-    async def get_all_members(self, guild_id: int) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def get_all_members(self, guild_id: int) -> List[MemberRecord]:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM members WHERE guild_id = $1 ORDER BY joined_at ASC",
+                f"SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1 ORDER BY m.joined_at ASC",
                 guild_id
             )
-            return [dict(row) for row in rows]
+            return MemberRecord.from_rows(rows)
+    
+    async def get_member_columns(self, guild_id: int) -> RecordColumns:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                f"SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1 ORDER BY m.joined_at ASC",
+                guild_id
+            )
+            return RecordColumns(MemberRecord, rows, int_columns=('id', 'guild_id', 'user_id'),
+                                 shared_columns=('clan_rank', 'league'))
+    
+    async def get_db_time(self) -> datetime:
+        async with self.acquire() as conn:
+            return await conn.fetchval("SELECT LOCALTIMESTAMP")
+    
+    async def get_members_changed_since(self, guild_id: int, since: datetime) -> Tuple[List[MemberRecord], int]:
+        """Members written at or after `since`, plus the guild's current member count."""
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                f"SELECT {MEMBER_COLUMNS} FROM {MEMBERS_TABLE} WHERE m.guild_id = $1 AND m.updated_at >= $2",
+                guild_id, since
+            )
+            count = await conn.fetchval("SELECT COUNT(*) FROM members WHERE guild_id = $1", guild_id)
+            return MemberRecord.from_rows(rows), count
+    
+    async def get_rate_limits_changed_since(self, since: datetime) -> List[Tuple[int, Any]]:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT guild_id, rate_limits FROM guild_configs WHERE updated_at >= $1",
+                since
+            )
+            return [(row['guild_id'], row['rate_limits']) for row in rows]
+    
+    async def search_members(self, guild_id: int, name: Optional[str] = None, clan_rank: Optional[str] = None,
+                             league: Optional[str] = None, min_power: Optional[int] = None,
+                             max_power: Optional[int] = None, inactive: Optional[bool] = None,
+                             after: Optional[Tuple[Any, int]] = None,
+                             limit: int = 10) -> Tuple[List[MemberRecord], Optional[Tuple[Any, int]]]:
+        """Filter the roster, ordered by name similarity when `name` is given and alphabetically otherwise.
+        
+        `after` is the keyset cursor returned with the previous page.
+        """
+        values: List[Any] = [guild_id]
+        
+        def param(value: Any) -> str:
+            values.append(value)
+            return f"${len(values)}"
+        
+        conditions = ["m.guild_id = $1"]
+        if clan_rank is not None:
+            conditions.append(f"rank_id = (SELECT id FROM member_ranks WHERE name = {param(clan_rank)})")
+        if league is not None:
+            conditions.append(f"league_id = (SELECT id FROM member_leagues WHERE name = {param(league)})")
+        if min_power is not None:
+            conditions.append(f"hangar_power >= {param(min_power)}")
+        if max_power is not None:
+            conditions.append(f"hangar_power <= {param(max_power)}")
+        if inactive is not None:
+            conditions.append("is_inactive" if inactive else "NOT is_inactive")
+        
+        if name:
+            name_param = param(name)
+            conditions.append(self.FUZZY_NAME_MATCH.format(name_param))
+            sort_key = f"similarity(username, {name_param})"
+            if after is not None:
+                conditions.append(f"({sort_key}, user_id) < ({param(after[0])}::real, {param(after[1])})")
+            order = f"{sort_key} DESC, user_id DESC"
+        else:
+            sort_key = "username"
+            if after is not None:
+                conditions.append(f"(username, user_id) > ({param(after[0])}, {param(after[1])})")
+            order = "username ASC, user_id ASC"
+        
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT {MEMBER_COLUMNS}, {sort_key} AS _sort_key FROM {MEMBERS_TABLE}
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY {order}
+                    LIMIT {param(limit + 1)}""",
+                *values
+            )
+        
+        records = [MemberRecord(*row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = (last['_sort_key'], last['user_id'])
+        return records, next_cursor
     
     async def update_member_activity(self, guild_id: int, user_id: int):
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """UPDATE members SET last_active = CURRENT_TIMESTAMP, is_inactive = FALSE
-                   WHERE guild_id = $1 AND user_id = $2""",
+        async with self.acquire(write=True) as conn:
+            rows = await conn.fetch(
+                f"""UPDATE members SET last_active = CURRENT_TIMESTAMP, is_inactive = FALSE
+                    WHERE guild_id = $1 AND user_id = $2
+                    RETURNING {MEMBER_RETURNING}""",
                 guild_id, user_id
             )
+            self._members_written(guild_id, MemberRecord.from_rows(rows))
     
     async def mark_inactive_members(self, guild_id: int, threshold_days: int) -> List[int]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             threshold_date = datetime.utcnow() - timedelta(days=threshold_days)
             rows = await conn.fetch(
-                """UPDATE members SET is_inactive = TRUE
-                   WHERE guild_id = $1 AND last_active < $2 AND is_inactive = FALSE
-                   RETURNING user_id""",
+                f"""UPDATE members SET is_inactive = TRUE
+                    WHERE guild_id = $1 AND last_active < $2 AND NOT is_inactive
+                    RETURNING {MEMBER_RETURNING}""",
                 guild_id, threshold_date
             )
-            return [row['user_id'] for row in rows]
+            records = MemberRecord.from_rows(rows)
+            self._members_written(guild_id, records)
+            return [record.user_id for record in records]
     
     async def add_role_mapping(self, guild_id: int, discord_role_id: int, clan_rank: str):
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             await conn.execute(
                 """INSERT INTO role_mappings (guild_id, discord_role_id, clan_rank)
                    VALUES ($1, $2, $3)
@@ -171,16 +813,16 @@ class DatabaseManager:
                 guild_id, discord_role_id, clan_rank
             )
     
-    async def get_role_mappings(self, guild_id: int) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def get_role_mappings(self, guild_id: int) -> List[RoleMappingRecord]:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM role_mappings WHERE guild_id = $1",
+                f"SELECT {RoleMappingRecord.columns} FROM role_mappings WHERE guild_id = $1",
                 guild_id
             )
-            return [dict(row) for row in rows]
+            return RoleMappingRecord.from_rows(rows)
     
     async def add_permission(self, guild_id: int, command_name: str, required_role_id: int):
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             await conn.execute(
                 """INSERT INTO permissions (guild_id, command_name, required_role_id)
                    VALUES ($1, $2, $3)
@@ -189,7 +831,7 @@ class DatabaseManager:
             )
     
     async def get_permissions(self, guild_id: int, command_name: str) -> List[int]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
                 "SELECT required_role_id FROM permissions WHERE guild_id = $1 AND command_name = $2",
                 guild_id, command_name
@@ -197,7 +839,7 @@ class DatabaseManager:
             return [row['required_role_id'] for row in rows]
     
     async def add_to_blacklist(self, guild_id: int, user_id: int, added_by: int, reason: Optional[str] = None):
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             await conn.execute(
                 """INSERT INTO blacklist (guild_id, user_id, added_by, reason)
                    VALUES ($1, $2, $3, $4)
@@ -206,7 +848,7 @@ class DatabaseManager:
             )
     
     async def remove_from_blacklist(self, guild_id: int, user_id: int) -> bool:
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             result = await conn.execute(
                 "DELETE FROM blacklist WHERE guild_id = $1 AND user_id = $2",
                 guild_id, user_id
@@ -214,7 +856,7 @@ class DatabaseManager:
             return result != "DELETE 0"
     
     async def is_blacklisted(self, guild_id: int, user_id: int) -> bool:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT 1 FROM blacklist WHERE guild_id = $1 AND user_id = $2",
                 guild_id, user_id
@@ -222,43 +864,46 @@ class DatabaseManager:
             return row is not None
     
     async def create_backup(self, guild_id: int, created_by: int) -> int:
-        async with self.pool.acquire() as conn:
-            backup_data = {
-                'config': await self.get_guild_config(guild_id),
-                'members': await self.get_all_members(guild_id),
-                'role_mappings': await self.get_role_mappings(guild_id),
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
+        backup_data = {
+            'config': await self.get_guild_config(guild_id),
+            'members': [dict(member) for member in await self.get_all_members(guild_id)],
+            'role_mappings': [dict(mapping) for mapping in await self.get_role_mappings(guild_id)],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        
+        # Backups are the one unbounded JSON payload, so they bypass the jsonb codec and are encoded in a worker.
+        payload = await offload.run_cpu(dumps, backup_data)
+        async with self.acquire(write=True) as conn:
             row = await conn.fetchrow(
                 """INSERT INTO backups (guild_id, backup_data, created_by)
-                   VALUES ($1, $2, $3) RETURNING id""",
-                guild_id, json.dumps(backup_data, default=str), created_by
+                   VALUES ($1, $2::text::jsonb, $3) RETURNING id""",
+                guild_id, payload, created_by
             )
             return row['id']
     
     async def get_backup(self, backup_id: int, guild_id: int) -> Optional[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM backups WHERE id = $1 AND guild_id = $2",
+                """SELECT id, guild_id, backup_data::text AS backup_data, created_by, created_at
+                   FROM backups WHERE id = $1 AND guild_id = $2""",
                 backup_id, guild_id
             )
-            if row:
-                result = dict(row)
-                result['backup_data'] = json.loads(result['backup_data'])
-                return result
-            return None
+        if row:
+            result = dict(row)
+            result['backup_data'] = await offload.run_cpu(loads, result['backup_data'])
+            return result
+        return None
     
-    async def get_all_backups(self, guild_id: int) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def get_all_backups(self, guild_id: int) -> List[BackupSummaryRecord]:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT id, guild_id, created_by, created_at FROM backups WHERE guild_id = $1 ORDER BY created_at DESC",
+                f"SELECT {BackupSummaryRecord.columns} FROM backups WHERE guild_id = $1 ORDER BY created_at DESC",
                 guild_id
             )
-            return [dict(row) for row in rows]
+            return BackupSummaryRecord.from_rows(rows)
     
     async def add_mute(self, guild_id: int, user_id: int, moderator_id: int, expires_at: datetime, reason: Optional[str] = None):
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             await conn.execute(
                 """INSERT INTO mutes (guild_id, user_id, moderator_id, expires_at, reason)
                    VALUES ($1, $2, $3, $4, $5)
@@ -266,25 +911,163 @@ class DatabaseManager:
                 guild_id, user_id, moderator_id, expires_at, reason
             )
     
+    async def add_mutes_bulk(self, guild_id: int, user_ids: List[int], moderator_id: int, expires_at: datetime,
+                             reason: Optional[str] = None):
+        async with self.acquire(write=True) as conn:
+            await conn.executemany(
+                """INSERT INTO mutes (guild_id, user_id, moderator_id, expires_at, reason)
+                   VALUES ($1, $2, $3, $4, $5)
+                   ON CONFLICT (guild_id, user_id) DO UPDATE SET expires_at = EXCLUDED.expires_at, reason = EXCLUDED.reason""",
+                [(guild_id, user_id, moderator_id, expires_at, reason) for user_id in user_ids]
+            )
+    
     async def remove_mute(self, guild_id: int, user_id: int) -> bool:
-        async with self.pool.acquire() as conn:
+        async with self.acquire(write=True) as conn:
             result = await conn.execute(
                 "DELETE FROM mutes WHERE guild_id = $1 AND user_id = $2",
                 guild_id, user_id
             )
             return result != "DELETE 0"
     
-    async def get_expired_mutes(self) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
+    async def get_expired_mutes(self) -> List[MuteRecord]:
+        async with self.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM mutes WHERE expires_at <= CURRENT_TIMESTAMP"
+                f"SELECT {MuteRecord.columns} FROM mutes WHERE expires_at <= CURRENT_TIMESTAMP"
             )
-            return [dict(row) for row in rows]
+            return MuteRecord.from_rows(rows)
     
     async def is_muted(self, guild_id: int, user_id: int) -> bool:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT 1 FROM mutes WHERE guild_id = $1 AND user_id = $2 AND expires_at > CURRENT_TIMESTAMP",
                 guild_id, user_id
             )
             return row is not None
+    
+    async def create_report(self, guild_id: int, channel_id: int, message_id: int, reporter_id: int,
+                            triage_channel_id: int, triage_message_id: int, report_count: int = 1) -> ReportRecord:
+        async with self.acquire(write=True) as conn:
+            row = await conn.fetchrow(
+                f"""INSERT INTO reports (guild_id, channel_id, message_id, reporter_id, triage_channel_id,
+                                         triage_message_id, report_count)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7) RETURNING {ReportRecord.columns}""",
+                guild_id, channel_id, message_id, reporter_id, triage_channel_id, triage_message_id, report_count
+            )
+            return ReportRecord(*row)
+    
+    async def get_open_report(self, guild_id: int, channel_id: int, message_id: int,
+                              since: datetime) -> Optional[ReportRecord]:
+        """The unresolved report of a message that was last reported after `since`."""
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""SELECT {ReportRecord.columns} FROM reports
+                    WHERE guild_id = $1 AND channel_id = $2 AND message_id = $3 AND status <> 'resolved'
+                      AND updated_at >= $4
+                    ORDER BY id DESC LIMIT 1""",
+                guild_id, channel_id, message_id, since
+            )
+            return ReportRecord(*row) if row else None
+    
+    async def update_report_count(self, report_id: int, report_count: int):
+        async with self.acquire(write=True) as conn:
+            await conn.execute(
+                "UPDATE reports SET report_count = $2, updated_at = CURRENT_TIMESTAMP WHERE id = $1",
+                report_id, report_count
+            )
+    
+    async def claim_report(self, guild_id: int, triage_message_id: int, staff_id: int) -> Optional[ReportRecord]:
+        async with self.acquire(write=True) as conn:
+            row = await conn.fetchrow(
+                f"""UPDATE reports SET status = 'claimed', claimed_by = $3, updated_at = CURRENT_TIMESTAMP
+                    WHERE guild_id = $1 AND triage_message_id = $2 AND status = 'open'
+                    RETURNING {ReportRecord.columns}""",
+                guild_id, triage_message_id, staff_id
+            )
+            return ReportRecord(*row) if row else None
+    
+    async def resolve_report(self, guild_id: int, triage_message_id: int, staff_id: int,
+                             report_count: Optional[int] = None) -> Optional[ReportRecord]:
+        async with self.acquire(write=True) as conn:
+            row = await conn.fetchrow(
+                f"""UPDATE reports SET status = 'resolved', resolved_by = $3,
+                                       report_count = COALESCE($4, report_count), updated_at = CURRENT_TIMESTAMP
+                    WHERE guild_id = $1 AND triage_message_id = $2 AND status <> 'resolved'
+                    RETURNING {ReportRecord.columns}""",
+                guild_id, triage_message_id, staff_id, report_count
+            )
+            return ReportRecord(*row) if row else None
+    
+    async def create_announcement(self, guild_id: int, author_id: int, mention: Optional[str],
+                                  embed: Dict[str, Any], targets: List[Tuple[str, int]]) -> int:
+        async with self.acquire(write=True) as conn:
+            announcement_id = await conn.fetchval(
+                """INSERT INTO announcements (guild_id, author_id, mention, embed)
+                   VALUES ($1, $2, $3, $4) RETURNING id""",
+                guild_id, author_id, mention, embed
+            )
+            await conn.executemany(
+                """INSERT INTO announcement_deliveries (announcement_id, target_type, target_id)
+                   VALUES ($1, $2, $3)""",
+                [(announcement_id, target_type, target_id) for target_type, target_id in targets]
+            )
+            return announcement_id
+    
+    async def get_due_deliveries(self, limit: int = 50) -> List[DeliveryRecord]:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT d.id, d.announcement_id, d.target_type, d.target_id, d.attempts,
+                          a.guild_id, a.mention, a.embed
+                   FROM announcement_deliveries d
+                   JOIN announcements a ON a.id = d.announcement_id
+                   WHERE d.status = 'pending' AND d.next_attempt_at <= $1
+                   ORDER BY d.target_type = 'dm', d.id
+                   LIMIT $2""",
+                datetime.utcnow(), limit
+            )
+            return DeliveryRecord.from_rows(rows)
+    
+    async def get_next_delivery_time(self) -> Optional[datetime]:
+        async with self.acquire() as conn:
+            return await conn.fetchval(
+                """SELECT next_attempt_at FROM announcement_deliveries WHERE status = 'pending'
+                   ORDER BY next_attempt_at LIMIT 1"""
+            )
+    
+    async def update_deliveries(self, outcomes: List[Tuple[int, str, int, Optional[str], Optional[datetime]]]):
+        """Store (delivery_id, status, attempts, last_error, next_attempt_at) for a processed batch."""
+        async with self.acquire(write=True) as conn:
+            await conn.executemany(
+                """UPDATE announcement_deliveries
+                   SET status = $2, attempts = $3, last_error = $4,
+                       next_attempt_at = COALESCE($5, next_attempt_at),
+                       delivered_at = CASE WHEN $2 = 'sent' THEN CURRENT_TIMESTAMP ELSE delivered_at END
+                   WHERE id = $1""",
+                outcomes
+            )
+    
+    async def get_delivery_stats(self, guild_id: int, announcement_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT a.id, a.created_at,
+                          COUNT(*) FILTER (WHERE d.status = 'sent') AS sent,
+                          COUNT(*) FILTER (WHERE d.status = 'failed') AS failed,
+                          COUNT(*) FILTER (WHERE d.status = 'pending') AS pending,
+                          COUNT(*) FILTER (WHERE d.attempts > 1) AS retried,
+                          MAX(d.delivered_at) AS last_delivered_at
+                   FROM announcements a
+                   JOIN announcement_deliveries d ON d.announcement_id = a.id
+                   WHERE a.guild_id = $1 AND ($2::integer IS NULL OR a.id = $2)
+                   GROUP BY a.id, a.created_at
+                   ORDER BY a.id DESC
+                   LIMIT 5""",
+                guild_id, announcement_id
+            )
+            return [dict(row) for row in rows]
+
+
+def create_database() -> DatabaseManager:
+    backend = os.getenv('DATABASE_BACKEND', 'postgres').lower()
+    if backend == 'sqlite':
+        from sqlite_backend import SQLiteDatabaseManager
+        return SQLiteDatabaseManager(os.getenv('SQLITE_PATH', 'clanbot.db'))
+    return DatabaseManager()
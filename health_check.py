@@ -2,9 +2,15 @@ import asyncio
 from aiohttp import web
 import os
 import logging
+from functools import partial
+from utils.cache_policy import cache_stats
+from utils.offload import offload
+from utils.runtime import dumps, runtime_info
 
 logger = logging.getLogger(__name__)
 
+json_response = partial(web.json_response, dumps=dumps)
+
 
 class HealthCheckServer:
     def __init__(self, bot):
@@ -17,9 +23,13 @@ class HealthCheckServer:
     def setup_routes(self):
         self.app.router.add_get('/health', self.health_check)
         self.app.router.add_get('/status', self.bot_status)
+        self.app.router.add_get('/db-stats', self.db_stats)
+        self.app.router.add_get('/command-stats', self.command_stats)
+        self.app.router.add_get('/cache-stats', self.cache_stats)
+        self.app.router.add_get('/loop-lag', self.loop_lag)
     
     async def health_check(self, request):
-        return web.json_response({
+        return json_response({
             'status': 'healthy',
             'bot': {
                 'ready': self.bot.is_ready(),
@@ -30,20 +40,50 @@ class HealthCheckServer:
     
     async def bot_status(self, request):
         if not self.bot.is_ready():
-            return web.json_response({
+            return json_response({
                 'status': 'starting',
                 'message': 'Bot is starting up...'
             }, status=503)
         
-        return web.json_response({
+        moderation = self.bot.get_cog('Moderation')
+        return json_response({
             'status': 'online',
             'bot_name': self.bot.user.name,
             'bot_id': self.bot.user.id,
             'guilds': len(self.bot.guilds),
             'latency_ms': round(self.bot.latency * 1000, 2),
-            'users': sum(guild.member_count for guild in self.bot.guilds)
+            'users': sum(guild.member_count for guild in self.bot.guilds),
+            'deliveries': self.bot.delivery.stats,
+            'events': self.bot.events.stats(),
+            'offload': offload.stats(),
+            'reports': moderation.reports.stats() if moderation else None,
+            'runtime': runtime_info()
+        })
+    
+    async def db_stats(self, request):
+        return json_response({
+            'commands': {
+                name: {
+                    'invocations': calls,
+                    'avg_round_trips': round(total / calls, 2) if calls else 0,
+                    'max_round_trips': maximum
+                }
+                for name, (calls, total, maximum) in self.bot.db.round_trip_stats.items()
+            },
+            'rosters': self.bot.db.rosters.stats()
         })
     
+    async def command_stats(self, request):
+        stats = self.bot.tracer.stats()
+        stats['rate_limits'] = self.bot.rate_limiter.stats()
+        return json_response(stats)
+    
+    async def cache_stats(self, request):
+        return json_response(cache_stats(self.bot))
+    
+    async def loop_lag(self, request):
+        return json_response(self.bot.loop_monitor.stats())
+    
     async def start(self):
         self.runner = web.AppRunner(self.app)
         await self.runner.setup()
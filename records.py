@@ -0,0 +1,128 @@
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+class Record(Mapping):
+    """Slotted row that keeps the read-only mapping interface of the dicts it replaces."""
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            setattr(self, name, value)
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = cls.__slots__
+        cls._field_set = frozenset(cls.__slots__)
+        cls.columns = ', '.join(cls.__slots__)
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> List['Record']:
+        return [cls(*row) for row in rows]
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+class MemberRecord(Record):
+    __slots__ = ('id', 'guild_id', 'user_id', 'username', 'clan_rank', 'hangar_power', 'league',
+                 'last_active', 'is_inactive', 'joined_at')
+
+
+class WarningRecord(Record):
+    __slots__ = ('id', 'guild_id', 'user_id', 'moderator_id', 'reason', 'created_at')
+
+
+class StaffNoteRecord(Record):
+    __slots__ = ('id', 'guild_id', 'user_id', 'staff_id', 'note', 'created_at')
+
+
+class AuditLogRecord(Record):
+    __slots__ = ('id', 'guild_id', 'moderator_id', 'action_type', 'target_user_id', 'details', 'created_at')
+
+
+class RoleMappingRecord(Record):
+    __slots__ = ('id', 'guild_id', 'discord_role_id', 'clan_rank', 'created_at')
+
+
+class BackupSummaryRecord(Record):
+    __slots__ = ('id', 'guild_id', 'created_by', 'created_at')
+
+
+class MuteRecord(Record):
+    __slots__ = ('id', 'guild_id', 'user_id', 'moderator_id', 'expires_at', 'reason', 'created_at')
+
+
+class EscalationRuleRecord(Record):
+    __slots__ = ('id', 'guild_id', 'warning_count', 'window_days', 'action', 'duration_minutes', 'created_at')
+
+
+class DeliveryRecord(Record):
+    __slots__ = ('id', 'announcement_id', 'target_type', 'target_id', 'attempts', 'guild_id', 'mention', 'embed')
+
+
+class TextSearchRecord(Record):
+    __slots__ = ('kind', 'id', 'user_id', 'author_id', 'created_at', 'rank', 'headline')
+
+
+class ReportRecord(Record):
+    __slots__ = ('id', 'guild_id', 'channel_id', 'message_id', 'reporter_id', 'triage_channel_id', 'triage_message_id',
+                 'claimed_by', 'resolved_by', 'report_count', 'status', 'created_at', 'updated_at')
+
+
+class HistoryRecord(Record):
+    __slots__ = ('kind', 'id', 'author_id', 'action', 'details', 'expires_at', 'created_at')
+
+
+class RecordColumns(Mapping):
+    """Column-oriented result set for bulk reads.
+    
+    Non-null integer columns are stored unboxed and low-cardinality columns share one object per distinct value.
+    """
+    __slots__ = ('record_type', 'data', 'row_count')
+    
+    def __init__(self, record_type: type, rows: Sequence[Sequence[Any]], int_columns: Iterable[str] = (),
+                 shared_columns: Iterable[str] = ()):
+        self.record_type = record_type
+        self.row_count = len(rows)
+        int_columns = set(int_columns)
+        shared_columns = set(shared_columns)
+        self.data: Dict[str, Sequence[Any]] = {}
+        for index, name in enumerate(record_type._fields):
+            if name in int_columns:
+                self.data[name] = array('q', (row[index] for row in rows))
+            elif name in shared_columns:
+                distinct: Dict[Any, Any] = {}
+                self.data[name] = [distinct.setdefault(row[index], row[index]) for row in rows]
+            else:
+                self.data[name] = [row[index] for row in rows]
+    
+    def __getitem__(self, key: str) -> Sequence[Any]:
+        return self.data[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def row(self, index: int) -> Record:
+        return self.record_type(*(self.data[name][index] for name in self.record_type._fields))
+    
+    def rows(self) -> Iterator[Record]:
+        for index in range(self.row_count):
+            yield self.row(index)
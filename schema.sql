@@ -9,25 +9,75 @@ CREATE TABLE IF NOT EXISTS guild_configs (
     auto_roles_enabled BOOLEAN DEFAULT FALSE,
     logging_channel_id BIGINT,
     announcement_role_id BIGINT,
+    compliance_role_id BIGINT,
+    rate_limits JSONB,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Members Table
+ALTER TABLE guild_configs ADD COLUMN IF NOT EXISTS compliance_role_id BIGINT;
+ALTER TABLE guild_configs ADD COLUMN IF NOT EXISTS rate_limits JSONB;
+
+-- Lookup tables for the low-cardinality member columns, which members reference by smallint code
+CREATE TABLE IF NOT EXISTS member_ranks (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(10) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS member_leagues (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE
+);
+
+-- Members Table (columns ordered widest first so rows carry no alignment padding)
 CREATE TABLE IF NOT EXISTS members (
-    id SERIAL PRIMARY KEY,
     guild_id BIGINT NOT NULL,
     user_id BIGINT NOT NULL,
-    username VARCHAR(255),
-    clan_rank VARCHAR(10),
-    hangar_power INTEGER,
-    league VARCHAR(50),
     last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    is_inactive BOOLEAN DEFAULT FALSE,
     joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    id SERIAL PRIMARY KEY,
+    hangar_power INTEGER,
+    rank_id SMALLINT REFERENCES member_ranks(id),
+    league_id SMALLINT REFERENCES member_leagues(id),
+    is_inactive BOOLEAN DEFAULT FALSE,
+    username VARCHAR(255),
     UNIQUE(guild_id, user_id)
 );
 
+ALTER TABLE members ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE members ADD COLUMN IF NOT EXISTS rank_id SMALLINT REFERENCES member_ranks(id);
+ALTER TABLE members ADD COLUMN IF NOT EXISTS league_id SMALLINT REFERENCES member_leagues(id);
+
+-- Move tables created with text clan_rank/league columns over to the codes. Existing rows keep their
+-- column order; VACUUM FULL members afterwards returns the space the text columns held.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'members' AND column_name = 'clan_rank') THEN
+        INSERT INTO member_ranks (name)
+            SELECT DISTINCT clan_rank FROM members WHERE clan_rank IS NOT NULL ON CONFLICT (name) DO NOTHING;
+        INSERT INTO member_leagues (name)
+            SELECT DISTINCT league FROM members WHERE league IS NOT NULL ON CONFLICT (name) DO NOTHING;
+        UPDATE members SET rank_id = (SELECT id FROM member_ranks WHERE name = members.clan_rank),
+                           league_id = (SELECT id FROM member_leagues WHERE name = members.league)
+        WHERE clan_rank IS NOT NULL OR league IS NOT NULL;
+        ALTER TABLE members DROP COLUMN clan_rank, DROP COLUMN league;
+    END IF;
+END $$;
+
+-- updated_at is the watermark warm starts reconcile against, so every write path must bump it.
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS members_touch_updated_at ON members;
+CREATE TRIGGER members_touch_updated_at BEFORE UPDATE ON members
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
 -- Warnings Table
 CREATE TABLE IF NOT EXISTS warnings (
     id SERIAL PRIMARY KEY,
@@ -35,9 +85,13 @@ CREATE TABLE IF NOT EXISTS warnings (
     user_id BIGINT NOT NULL,
     moderator_id BIGINT NOT NULL,
     reason TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reason_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', reason)) STORED
 );
 
+ALTER TABLE warnings ADD COLUMN IF NOT EXISTS reason_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', reason)) STORED;
+
 -- Staff Notes Table
 CREATE TABLE IF NOT EXISTS staff_notes (
     id SERIAL PRIMARY KEY,
@@ -45,9 +99,13 @@ CREATE TABLE IF NOT EXISTS staff_notes (
     user_id BIGINT NOT NULL,
     staff_id BIGINT NOT NULL,
     note TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    note_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', note)) STORED
 );
 
+ALTER TABLE staff_notes ADD COLUMN IF NOT EXISTS note_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', note)) STORED;
+
 -- Audit Logs Table
 CREATE TABLE IF NOT EXISTS audit_logs (
     id SERIAL PRIMARY KEY,
@@ -111,10 +169,86 @@ CREATE TABLE IF NOT EXISTS mutes (
     UNIQUE(guild_id, user_id)
 );
 
+-- Escalation Rules Table (automatic action after repeated warnings)
+CREATE TABLE IF NOT EXISTS escalation_rules (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    warning_count INTEGER NOT NULL,
+    window_days INTEGER NOT NULL,
+    action VARCHAR(20) NOT NULL,
+    duration_minutes INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, warning_count, window_days)
+);
+
+-- Trigram matching for fuzzy member search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Announcements Table (clan-wide messages fanned out by the delivery queue)
+CREATE TABLE IF NOT EXISTS announcements (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    author_id BIGINT NOT NULL,
+    mention TEXT,
+    embed JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Announcement Deliveries Table (persistent queue, one row per channel or DM)
+CREATE TABLE IF NOT EXISTS announcement_deliveries (
+    id SERIAL PRIMARY KEY,
+    announcement_id INTEGER NOT NULL REFERENCES announcements(id) ON DELETE CASCADE,
+    target_type VARCHAR(10) NOT NULL,
+    target_id BIGINT NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivered_at TIMESTAMP
+);
+
+-- Reports Table (one triage message per reported message, duplicates counted on it)
+CREATE TABLE IF NOT EXISTS reports (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    reporter_id BIGINT NOT NULL,
+    triage_channel_id BIGINT NOT NULL,
+    triage_message_id BIGINT NOT NULL,
+    claimed_by BIGINT,
+    resolved_by BIGINT,
+    report_count INTEGER NOT NULL DEFAULT 1,
+    status VARCHAR(10) NOT NULL DEFAULT 'open',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_members_guild_id ON members(guild_id);
-CREATE INDEX IF NOT EXISTS idx_warnings_guild_user ON warnings(guild_id, user_id);
-CREATE INDEX IF NOT EXISTS idx_staff_notes_guild_user ON staff_notes(guild_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_username_trgm ON members USING GIN (username gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_members_guild_username ON members(guild_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_rank_id_username ON members(guild_id, rank_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_league_id_username ON members(guild_id, league_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_power ON members(guild_id, hangar_power DESC);
+CREATE INDEX IF NOT EXISTS idx_members_guild_inactive_username ON members(guild_id, username, user_id) WHERE is_inactive;
+CREATE INDEX IF NOT EXISTS idx_members_guild_active_username ON members(guild_id, username, user_id) WHERE NOT is_inactive;
+-- The inactivity sweep only looks at members not yet marked inactive.
+CREATE INDEX IF NOT EXISTS idx_members_guild_last_active ON members(guild_id, last_active) WHERE NOT is_inactive;
+CREATE INDEX IF NOT EXISTS idx_members_guild_updated ON members(guild_id, updated_at);
+DROP INDEX IF EXISTS idx_warnings_guild_user;
+-- Per-user timelines page through each table by (created_at, id)
+DROP INDEX IF EXISTS idx_warnings_guild_user_created;
+DROP INDEX IF EXISTS idx_staff_notes_guild_user;
+CREATE INDEX IF NOT EXISTS idx_warnings_guild_user_timeline ON warnings(guild_id, user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_staff_notes_guild_user_timeline ON staff_notes(guild_id, user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_guild_target_timeline ON audit_logs(guild_id, target_user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_warnings_reason_tsv ON warnings USING GIN (reason_tsv);
+CREATE INDEX IF NOT EXISTS idx_staff_notes_note_tsv ON staff_notes USING GIN (note_tsv);
 CREATE INDEX IF NOT EXISTS idx_audit_logs_guild ON audit_logs(guild_id);
 CREATE INDEX IF NOT EXISTS idx_mutes_guild_user ON mutes(guild_id, user_id);
 CREATE INDEX IF NOT EXISTS idx_mutes_expires_at ON mutes(expires_at);
+CREATE INDEX IF NOT EXISTS idx_deliveries_pending ON announcement_deliveries(next_attempt_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_deliveries_announcement ON announcement_deliveries(announcement_id, status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_triage_message ON reports(triage_message_id);
+CREATE INDEX IF NOT EXISTS idx_reports_open_message ON reports(guild_id, channel_id, message_id) WHERE status <> 'resolved';
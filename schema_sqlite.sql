@@ -0,0 +1,249 @@
+-- SQLite variant of schema.sql, used when DATABASE_BACKEND=sqlite
+
+-- Guild Configurations Table
+CREATE TABLE IF NOT EXISTS guild_configs (
+    guild_id INTEGER PRIMARY KEY,
+    clan_tag TEXT,
+    clan_requirements_league TEXT,
+    clan_requirements_power INTEGER,
+    activity_threshold_days INTEGER DEFAULT 7,
+    audit_log_enabled BOOLEAN DEFAULT TRUE,
+    auto_roles_enabled BOOLEAN DEFAULT FALSE,
+    logging_channel_id INTEGER,
+    announcement_role_id INTEGER,
+    compliance_role_id INTEGER,
+    rate_limits TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Lookup tables for the low-cardinality member columns, which members reference by integer code
+CREATE TABLE IF NOT EXISTS member_ranks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS member_leagues (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- Members Table
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    username TEXT,
+    rank_id INTEGER REFERENCES member_ranks(id),
+    hangar_power INTEGER,
+    league_id INTEGER REFERENCES member_leagues(id),
+    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_inactive BOOLEAN DEFAULT FALSE,
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, user_id)
+);
+
+-- updated_at is the watermark warm starts reconcile against, so every write path must bump it.
+-- Columns added by ALTER TABLE cannot default to CURRENT_TIMESTAMP, hence the insert trigger.
+CREATE TRIGGER IF NOT EXISTS members_touch_insert AFTER INSERT ON members BEGIN
+    UPDATE members SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS members_touch_update AFTER UPDATE ON members BEGIN
+    UPDATE members SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+-- Warnings Table
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Staff Notes Table
+CREATE TABLE IF NOT EXISTS staff_notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    staff_id INTEGER NOT NULL,
+    note TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Full-text indexes over warning reasons and staff notes, kept in sync with their tables by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS warnings_fts USING fts5(
+    reason, content='warnings', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS warnings_fts_insert AFTER INSERT ON warnings BEGIN
+    INSERT INTO warnings_fts (rowid, reason) VALUES (NEW.id, NEW.reason);
+END;
+
+CREATE TRIGGER IF NOT EXISTS warnings_fts_delete AFTER DELETE ON warnings BEGIN
+    INSERT INTO warnings_fts (warnings_fts, rowid, reason) VALUES ('delete', OLD.id, OLD.reason);
+END;
+
+CREATE TRIGGER IF NOT EXISTS warnings_fts_update AFTER UPDATE OF reason ON warnings BEGIN
+    INSERT INTO warnings_fts (warnings_fts, rowid, reason) VALUES ('delete', OLD.id, OLD.reason);
+    INSERT INTO warnings_fts (rowid, reason) VALUES (NEW.id, NEW.reason);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS staff_notes_fts USING fts5(
+    note, content='staff_notes', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS staff_notes_fts_insert AFTER INSERT ON staff_notes BEGIN
+    INSERT INTO staff_notes_fts (rowid, note) VALUES (NEW.id, NEW.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS staff_notes_fts_delete AFTER DELETE ON staff_notes BEGIN
+    INSERT INTO staff_notes_fts (staff_notes_fts, rowid, note) VALUES ('delete', OLD.id, OLD.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS staff_notes_fts_update AFTER UPDATE OF note ON staff_notes BEGIN
+    INSERT INTO staff_notes_fts (staff_notes_fts, rowid, note) VALUES ('delete', OLD.id, OLD.note);
+    INSERT INTO staff_notes_fts (rowid, note) VALUES (NEW.id, NEW.note);
+END;
+
+-- Audit Logs Table
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    moderator_id INTEGER,
+    action_type TEXT NOT NULL,
+    target_user_id INTEGER,
+    details TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Role Mappings Table (Discord Role to Clan Rank)
+CREATE TABLE IF NOT EXISTS role_mappings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    discord_role_id INTEGER NOT NULL,
+    clan_rank TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, discord_role_id)
+);
+
+-- Permissions Table
+CREATE TABLE IF NOT EXISTS permissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    command_name TEXT NOT NULL,
+    required_role_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, command_name, required_role_id)
+);
+
+-- Blacklist Table
+CREATE TABLE IF NOT EXISTS blacklist (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    reason TEXT,
+    added_by INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, user_id)
+);
+
+-- Backups Table
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    backup_data TEXT NOT NULL,
+    created_by INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Mutes Table (for tracking active mutes)
+CREATE TABLE IF NOT EXISTS mutes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    reason TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, user_id)
+);
+
+-- Escalation Rules Table (automatic action after repeated warnings)
+CREATE TABLE IF NOT EXISTS escalation_rules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    warning_count INTEGER NOT NULL,
+    window_days INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    duration_minutes INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, warning_count, window_days)
+);
+
+-- Announcements Table (clan-wide messages fanned out by the delivery queue)
+CREATE TABLE IF NOT EXISTS announcements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    mention TEXT,
+    embed TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Announcement Deliveries Table (persistent queue, one row per channel or DM)
+CREATE TABLE IF NOT EXISTS announcement_deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    announcement_id INTEGER NOT NULL REFERENCES announcements(id) ON DELETE CASCADE,
+    target_type TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivered_at TIMESTAMP
+);
+
+-- Reports Table (one triage message per reported message, duplicates counted on it)
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    reporter_id INTEGER NOT NULL,
+    triage_channel_id INTEGER NOT NULL,
+    triage_message_id INTEGER NOT NULL,
+    claimed_by INTEGER,
+    resolved_by INTEGER,
+    report_count INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_members_guild_id ON members(guild_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_username ON members(guild_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_rank_id_username ON members(guild_id, rank_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_league_id_username ON members(guild_id, league_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_members_guild_power ON members(guild_id, hangar_power DESC);
+CREATE INDEX IF NOT EXISTS idx_members_guild_inactive_username ON members(guild_id, username, user_id) WHERE is_inactive;
+CREATE INDEX IF NOT EXISTS idx_members_guild_active_username ON members(guild_id, username, user_id) WHERE NOT is_inactive;
+CREATE INDEX IF NOT EXISTS idx_members_guild_last_active ON members(guild_id, last_active) WHERE NOT is_inactive;
+CREATE INDEX IF NOT EXISTS idx_members_guild_updated ON members(guild_id, updated_at);
+-- Per-user timelines page through each table by (created_at, id)
+DROP INDEX IF EXISTS idx_warnings_guild_user_created;
+DROP INDEX IF EXISTS idx_staff_notes_guild_user;
+CREATE INDEX IF NOT EXISTS idx_warnings_guild_user_timeline ON warnings(guild_id, user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_staff_notes_guild_user_timeline ON staff_notes(guild_id, user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_guild_target_timeline ON audit_logs(guild_id, target_user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_guild ON audit_logs(guild_id);
+CREATE INDEX IF NOT EXISTS idx_mutes_guild_user ON mutes(guild_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_mutes_expires_at ON mutes(expires_at);
+CREATE INDEX IF NOT EXISTS idx_deliveries_pending ON announcement_deliveries(next_attempt_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_deliveries_announcement ON announcement_deliveries(announcement_id, status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_triage_message ON reports(triage_message_id);
+CREATE INDEX IF NOT EXISTS idx_reports_open_message ON reports(guild_id, channel_id, message_id) WHERE status <> 'resolved';
@@ -0,0 +1,329 @@
+import asyncio
+import os
+import re
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from db_manager import DatabaseManager, active_session, parse_dossier_dates
+from records import WarningRecord
+from utils.runtime import dumps, loads
+from utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_sqlite.sql')
+
+PLACEHOLDER_PATTERN = re.compile(r'\$(\d+)')
+CAST_PATTERN = re.compile(r'::\w+')
+WORD_PATTERN = re.compile(r'[^\W_]+')
+SEARCH_TERM_PATTERN = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+TRIGRAM_THRESHOLD = 0.3
+
+# Columns added after a table was first created; SQLite has no ADD COLUMN IF NOT EXISTS. They are added
+# before the schema script runs so its indexes and triggers can rely on them.
+ADDED_COLUMNS = {
+    'guild_configs': {'compliance_role_id': 'INTEGER', 'rate_limits': 'TEXT'},
+    'members': {
+        'updated_at': 'TIMESTAMP',
+        'rank_id': 'INTEGER REFERENCES member_ranks(id)',
+        'league_id': 'INTEGER REFERENCES member_leagues(id)',
+    },
+}
+
+# Full-text indexes that are filled from their content table when first created.
+SEARCH_INDEXES = ('warnings_fts', 'staff_notes_fts')
+
+# Members tables from before rank and league moved to lookup codes still carry the text columns.
+COMPACT_MEMBERS_SCRIPT = """
+BEGIN;
+INSERT OR IGNORE INTO member_ranks (name) SELECT DISTINCT clan_rank FROM members WHERE clan_rank IS NOT NULL;
+INSERT OR IGNORE INTO member_leagues (name) SELECT DISTINCT league FROM members WHERE league IS NOT NULL;
+UPDATE members SET rank_id = (SELECT id FROM member_ranks WHERE name = members.clan_rank),
+                   league_id = (SELECT id FROM member_leagues WHERE name = members.league)
+WHERE clan_rank IS NOT NULL OR league IS NOT NULL;
+DROP INDEX IF EXISTS idx_members_guild_rank_username;
+DROP INDEX IF EXISTS idx_members_guild_league_username;
+ALTER TABLE members DROP COLUMN clan_rank;
+ALTER TABLE members DROP COLUMN league;
+COMMIT;
+VACUUM;
+"""
+
+
+def _adapt_datetime(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(' ')
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+# JSON columns are TEXT here; Postgres takes the same Python values through its jsonb codec.
+sqlite3.register_adapter(dict, dumps)
+sqlite3.register_adapter(list, dumps)
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('BOOLEAN', lambda value: bool(int(value)))
+
+
+@lru_cache(maxsize=65536)
+def _trigrams(text: str) -> frozenset:
+    trigrams = set()
+    for word in WORD_PATTERN.findall(text.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+def trigram_similarity(left: Optional[str], right: Optional[str]) -> Optional[float]:
+    """Same measure as pg_trgm's similarity(), so fuzzy search ranks identically on both backends."""
+    if left is None or right is None:
+        return None
+    left_trigrams, right_trigrams = _trigrams(left), _trigrams(right)
+    union = len(left_trigrams | right_trigrams)
+    return len(left_trigrams & right_trigrams) / union if union else 0.0
+
+
+def fts_query(text: str) -> str:
+    """Web-search style input (words, "quoted phrases", -exclusions) as an FTS5 MATCH expression."""
+    include, exclude = [], []
+    for negate, phrase, word in SEARCH_TERM_PATTERN.findall(text):
+        term = (phrase or word).replace('"', '').strip()
+        if term:
+            (exclude if negate else include).append(f'"{term}"')
+    if not include:
+        return ''
+    return ' '.join(include) + ''.join(f' NOT {term}' for term in exclude)
+
+
+def translate_query(query: str) -> str:
+    return CAST_PATTERN.sub('', PLACEHOLDER_PATTERN.sub(r':p\1', query))
+
+
+def _bind(args) -> Dict[str, Any]:
+    return {f'p{i + 1}': value for i, value in enumerate(args)}
+
+
+def _status(cursor: sqlite3.Cursor, query: str) -> str:
+    verb = query.lstrip().split(None, 1)[0].upper()
+    if verb == 'INSERT':
+        return f"INSERT 0 {cursor.rowcount}"
+    return f"{verb} {cursor.rowcount}"
+
+
+class SQLiteSession:
+    def __init__(self, name: str):
+        self.name = name
+        self.round_trips = 0
+        self.failed = False
+        self.closed = False
+        self.configs: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.rollback_hooks: List[Callable[[], None]] = []
+    
+    async def close(self):
+        self.closed = True
+
+
+class SQLiteConnection:
+    def __init__(self, db: 'SQLiteDatabaseManager', session: Optional[SQLiteSession]):
+        self._db = db
+        self._session = session
+    
+    async def _run(self, func, *args):
+        if self._session is not None:
+            self._session.round_trips += 1
+        with span('db', func.__name__.lstrip('_')):
+            return await asyncio.get_running_loop().run_in_executor(self._db.executor, func, *args)
+    
+    def _fetch(self, query: str, args) -> List[sqlite3.Row]:
+        cursor = self._db.conn.execute(translate_query(query), _bind(args))
+        rows = cursor.fetchall()
+        self._db.conn.commit()
+        return rows
+    
+    def _execute(self, query: str, args) -> str:
+        if not args and ';' in query.strip().rstrip(';'):
+            self._db.conn.executescript(query)
+            return "SCRIPT"
+        cursor = self._db.conn.execute(translate_query(query), _bind(args))
+        self._db.conn.commit()
+        return _status(cursor, query)
+    
+    def _executemany(self, query: str, args_list) -> None:
+        self._db.conn.executemany(translate_query(query), [_bind(args) for args in args_list])
+        self._db.conn.commit()
+    
+    async def fetch(self, query: str, *args) -> List[sqlite3.Row]:
+        return await self._run(self._fetch, query, args)
+    
+    async def fetchrow(self, query: str, *args) -> Optional[sqlite3.Row]:
+        rows = await self.fetch(query, *args)
+        return rows[0] if rows else None
+    
+    async def fetchval(self, query: str, *args) -> Any:
+        row = await self.fetchrow(query, *args)
+        return row[0] if row else None
+    
+    async def execute(self, query: str, *args) -> str:
+        return await self._run(self._execute, query, args)
+    
+    async def executemany(self, query: str, args_list) -> None:
+        await self._run(self._executemany, query, list(args_list))
+
+
+class SQLiteDatabaseManager(DatabaseManager):
+    FUZZY_NAME_MATCH = f"similarity(username, {{0}}) >= {TRIGRAM_THRESHOLD}"
+    TEXT_SEARCH_HEADLINE = "body"
+    
+    def __init__(self, path: str = 'clanbot.db'):
+        super().__init__()
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+    
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.create_function('similarity', 2, trigram_similarity, deterministic=True)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+    
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        self.conn = await loop.run_in_executor(self.executor, self._open)
+        await self.initialize_schema()
+        logger.info(f"SQLite database opened at {self.path}")
+    
+    async def close(self):
+        if self.conn:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.conn.close)
+            self.conn = None
+        self.executor.shutdown(wait=False)
+    
+    async def initialize_schema(self):
+        with open(SQLITE_SCHEMA_PATH, 'r') as f:
+            schema_sql = f.read()
+        
+        async with self.acquire() as conn:
+            member_columns = {row['name'] for row in await conn.fetch("PRAGMA table_info(members)")}
+            tables = {row['name'] for row in await conn.fetch("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row['name'] for row in await conn.fetch(f"PRAGMA table_info({table})")}
+                if not existing:
+                    continue
+                for column, column_type in columns.items():
+                    if column not in existing:
+                        await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            await conn.execute(schema_sql)
+            if 'clan_rank' in member_columns:
+                await conn.execute(COMPACT_MEMBERS_SCRIPT)
+            for index in SEARCH_INDEXES:
+                if index not in tables:
+                    await conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+    
+    @asynccontextmanager
+    async def acquire(self, write: bool = False):
+        yield SQLiteConnection(self, active_session())
+    
+    @asynccontextmanager
+    async def autocommit(self):
+        yield SQLiteConnection(self, None)
+    
+    def create_session(self, name: str) -> SQLiteSession:
+        return SQLiteSession(name)
+    
+    @asynccontextmanager
+    async def transaction(self):
+        # Statements share one connection and commit one by one, so there is no open transaction to hold.
+        yield
+    
+    async def get_command_context(self, guild_id: int, user_id: int, command_name: str) -> Dict[str, Any]:
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(
+                """SELECT gc.*,
+                          EXISTS(SELECT 1 FROM blacklist WHERE guild_id = $1 AND user_id = $2) AS _is_blacklisted,
+                          (SELECT group_concat(required_role_id) FROM permissions
+                           WHERE guild_id = $1 AND command_name = $3) AS _required_roles
+                   FROM (SELECT $1 AS target_guild_id) AS target
+                   LEFT JOIN guild_configs gc ON gc.guild_id = target.target_guild_id""",
+                guild_id, user_id, command_name
+            )
+            result = dict(row)
+            required_roles = result.pop('_required_roles')
+            context = {
+                'is_blacklisted': bool(result.pop('_is_blacklisted')),
+                'required_roles': [int(role_id) for role_id in required_roles.split(',')] if required_roles else [],
+                'config': result if result['guild_id'] is not None else None
+            }
+            
+            session = active_session()
+            if session is not None:
+                session.configs[guild_id] = context['config']
+            return context
+    
+    def text_search_query(self, text: str) -> str:
+        return fts_query(text)
+    
+    def text_search_branch(self, kind: str, table: str, column: str, author_column: str) -> str:
+        # bm25() and snippet() only work in the query that reads the FTS table, so the headline is built here.
+        return f"""SELECT '{kind}' AS kind, id, user_id, {author_column} AS author_id, created_at,
+                          -bm25({table}_fts) AS rank, snippet({table}_fts, 0, '**', '**', '…', 24) AS body
+                   FROM {table}_fts JOIN {table} ON {table}.id = {table}_fts.rowid
+                   WHERE {table}_fts MATCH $2"""
+    
+    async def get_warnings(self, guild_id: int, user_id: int, limit: Optional[int] = None) -> List[WarningRecord]:
+        return await super().get_warnings(guild_id, user_id, -1 if limit is None else limit)
+    
+    async def get_moderation_dossier(self, guild_id: int, user_id: int, recent_limit: int = 3) -> Dict[str, Any]:
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(
+                """SELECT (SELECT COUNT(*) FROM warnings
+                           WHERE guild_id = $1 AND user_id = $2) AS warning_count,
+                          (SELECT json_group_array(json_object(
+                                      'id', id, 'reason', reason, 'created_at', created_at))
+                           FROM (SELECT id, reason, created_at FROM warnings
+                                 WHERE guild_id = $1 AND user_id = $2
+                                 ORDER BY created_at DESC LIMIT $3)) AS recent_warnings,
+                          (SELECT COUNT(*) FROM staff_notes
+                           WHERE guild_id = $1 AND user_id = $2) AS note_count,
+                          (SELECT json_group_array(json_object(
+                                      'id', id, 'note', note, 'created_at', created_at))
+                           FROM (SELECT id, note, created_at FROM staff_notes
+                                 WHERE guild_id = $1 AND user_id = $2
+                                 ORDER BY created_at DESC LIMIT $3)) AS recent_notes,
+                          mu.expires_at AS mute_expires_at, mu.reason AS mute_reason,
+                          bl.reason AS blacklist_reason, bl.created_at AS blacklisted_at,
+                          bl.user_id IS NOT NULL AS is_blacklisted,
+                          mr.name AS clan_rank, mem.hangar_power, ml.name AS league, mem.last_active, mem.is_inactive
+                   FROM (SELECT $1 AS guild_id, $2 AS user_id) AS target
+                   LEFT JOIN mutes mu ON mu.guild_id = target.guild_id AND mu.user_id = target.user_id
+                                     AND mu.expires_at > CURRENT_TIMESTAMP
+                   LEFT JOIN blacklist bl ON bl.guild_id = target.guild_id AND bl.user_id = target.user_id
+                   LEFT JOIN members mem ON mem.guild_id = target.guild_id AND mem.user_id = target.user_id
+                   LEFT JOIN member_ranks mr ON mr.id = mem.rank_id
+                   LEFT JOIN member_leagues ml ON ml.id = mem.league_id""",
+                guild_id, user_id, recent_limit
+            )
+            result = dict(row)
+            result['is_blacklisted'] = bool(result['is_blacklisted'])
+            result['recent_warnings'] = loads(result['recent_warnings'])
+            result['recent_notes'] = loads(result['recent_notes'])
+            return parse_dossier_dates(result)
+    
+    async def get_db_time(self) -> datetime:
+        async with self.acquire() as conn:
+            return datetime.fromisoformat(await conn.fetchval("SELECT CURRENT_TIMESTAMP"))
+    
+    async def get_delivery_stats(self, guild_id: int, announcement_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        stats = await super().get_delivery_stats(guild_id, announcement_id)
+        for entry in stats:
+            # Aggregates lose the column's declared type, so the timestamp converter does not run.
+            for key in ('created_at', 'last_delivered_at'):
+                if isinstance(entry[key], str):
+                    entry[key] = datetime.fromisoformat(entry[key])
+        return stats
@@ -0,0 +1,90 @@
+import discord
+import re
+from datetime import datetime
+from typing import Iterable, List, Optional
+from utils.helpers import gather_bounded
+
+
+USER_ID_PATTERN = re.compile(r'\b(\d{15,20})\b')
+BULK_BAN_MAX = 200
+
+
+def parse_user_ids(text: str) -> List[int]:
+    seen = set()
+    user_ids = []
+    for match in USER_ID_PATTERN.findall(text):
+        user_id = int(match)
+        if user_id not in seen:
+            seen.add(user_id)
+            user_ids.append(user_id)
+    return user_ids
+
+
+class BulkResult:
+    def __init__(self):
+        self.succeeded: List[int] = []
+        self.failed: List[int] = []
+        self.skipped: List[int] = []
+    
+    @property
+    def total(self) -> int:
+        return len(self.succeeded) + len(self.failed) + len(self.skipped)
+
+
+async def bulk_ban(guild: discord.Guild, user_ids: List[int], reason: Optional[str] = None) -> BulkResult:
+    result = BulkResult()
+    for start in range(0, len(user_ids), BULK_BAN_MAX):
+        chunk = user_ids[start:start + BULK_BAN_MAX]
+        try:
+            ban_result = await guild.bulk_ban([discord.Object(id=user_id) for user_id in chunk], reason=reason)
+            result.succeeded.extend(user.id for user in ban_result.banned)
+            result.failed.extend(user.id for user in ban_result.failed)
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException:
+            await _run_each(
+                result,
+                chunk,
+                lambda user_id: guild.ban(discord.Object(id=user_id), reason=reason)
+            )
+    return result
+
+
+async def bulk_kick(members: List[discord.Member], reason: Optional[str] = None, concurrency: int = 5) -> BulkResult:
+    result = BulkResult()
+    by_id = {member.id: member for member in members}
+    await _run_each(result, list(by_id), lambda user_id: by_id[user_id].kick(reason=reason), concurrency)
+    return result
+
+
+async def bulk_timeout(members: List[discord.Member], until: datetime, reason: Optional[str] = None,
+                       concurrency: int = 5) -> BulkResult:
+    result = BulkResult()
+    by_id = {member.id: member for member in members}
+    await _run_each(result, list(by_id), lambda user_id: by_id[user_id].timeout(until, reason=reason), concurrency)
+    return result
+
+
+async def _run_each(result: BulkResult, user_ids: List[int], action, concurrency: int = 5):
+    outcomes = await gather_bounded((action(user_id) for user_id in user_ids), concurrency=concurrency)
+    for user_id, outcome in zip(user_ids, outcomes):
+        if isinstance(outcome, Exception):
+            result.failed.append(user_id)
+        else:
+            result.succeeded.append(user_id)
+
+
+def filter_targets(guild: discord.Guild, moderator: discord.Member, user_ids: Iterable[int],
+                   result: BulkResult) -> List[int]:
+    allowed = []
+    for user_id in user_ids:
+        if user_id in (moderator.id, guild.owner_id, guild.me.id):
+            result.skipped.append(user_id)
+            continue
+        
+        member = guild.get_member(user_id)
+        if member and moderator.id != guild.owner_id and member.top_role >= moderator.top_role:
+            result.skipped.append(user_id)
+            continue
+        allowed.append(user_id)
+    return allowed
@@ -0,0 +1,64 @@
+import asyncio
+import discord
+import os
+import resource
+from typing import Any, Dict
+
+
+CHUNK_GUILDS_AT_STARTUP = os.getenv('CHUNK_GUILDS_AT_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+# Comma-separated discord.MemberCacheFlags names, or "none"; members fetched by chunking are kept either way.
+MEMBER_CACHE_FLAGS = os.getenv('MEMBER_CACHE_FLAGS', 'joined,voice')
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', '200'))
+
+_chunk_locks: Dict[int, asyncio.Lock] = {}
+
+
+def member_cache_flags(value: str = MEMBER_CACHE_FLAGS) -> discord.MemberCacheFlags:
+    flags = discord.MemberCacheFlags.none()
+    for name in value.replace(' ', '').split(','):
+        if name and name != 'none':
+            setattr(flags, name, True)
+    return flags
+
+
+async def ensure_chunked(guild: discord.Guild):
+    """Load the full member list of `guild` once, for commands that need every member cached."""
+    if guild.chunked:
+        return
+    async with _chunk_locks.setdefault(guild.id, asyncio.Lock()):
+        if not guild.chunked:
+            await guild.chunk(cache=True)
+
+
+def process_rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak rather than current RSS, in KiB on Linux but bytes on macOS.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cache_stats(bot: discord.Client) -> Dict[str, Any]:
+    return {
+        'rss_bytes': process_rss_bytes(),
+        'policy': {
+            'chunk_guilds_at_startup': CHUNK_GUILDS_AT_STARTUP,
+            'member_cache_flags': MEMBER_CACHE_FLAGS,
+            'message_cache_size': MESSAGE_CACHE_SIZE
+        },
+        'messages': len(bot.cached_messages),
+        'users': len(bot.users),
+        'guilds': {
+            str(guild.id): {
+                'name': guild.name,
+                'chunked': guild.chunked,
+                'members_cached': len(guild.members),
+                'member_count': guild.member_count,
+                'channels': len(guild.channels),
+                'roles': len(guild.roles),
+                'emojis': len(guild.emojis)
+            }
+            for guild in bot.guilds
+        }
+    }
@@ -0,0 +1,83 @@
+import discord
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from records import RecordColumns
+from utils.helpers import gather_bounded
+
+
+LEAGUE_ORDER = ('bronze', 'silver', 'gold', 'platinum', 'diamond', 'master', 'champion', 'legend')
+LEAGUE_INDEX = {league: index for index, league in enumerate(LEAGUE_ORDER)}
+ROLE_BATCH_SIZE = 20
+ROLE_BATCH_DELAY = 2.0
+
+
+def league_rank(league: Optional[str]) -> Optional[int]:
+    if league is None:
+        return None
+    return LEAGUE_INDEX.get(league.strip().lower())
+
+
+class ComplianceReport:
+    def __init__(self, checked: int, required_league: Optional[str], required_power: Optional[int]):
+        self.checked = checked
+        self.required_league = required_league
+        self.required_power = required_power
+        self.non_compliant: List[Tuple[int, str]] = []
+    
+    @property
+    def user_ids(self) -> List[int]:
+        return [user_id for user_id, _ in self.non_compliant]
+
+
+def check_compliance(columns: RecordColumns, required_league: Optional[str],
+                     required_power: Optional[int]) -> ComplianceReport:
+    report = ComplianceReport(columns.row_count, required_league, required_power)
+    if not columns.row_count or (required_league is None and required_power is None):
+        return report
+    
+    user_ids = np.frombuffer(columns['user_id'], dtype=np.int64)
+    leagues = pd.Series(columns['league'], dtype=object)
+    power = pd.to_numeric(pd.Series(columns['hangar_power'], dtype=object)).to_numpy(dtype=float)
+    
+    flags: Dict[str, np.ndarray] = {}
+    if required_power is not None:
+        flags['no power recorded'] = np.isnan(power)
+        flags[f'power below {required_power:,}'] = power < required_power
+    
+    if required_league is not None:
+        normalized = leagues.str.strip().str.lower()
+        required_rank = league_rank(required_league)
+        if required_rank is None:
+            # A league outside the known ladder can only be matched exactly.
+            flags[f'not in {required_league}'] = (normalized != required_league.strip().lower()).to_numpy(dtype=bool)
+        else:
+            ranks = normalized.map(LEAGUE_INDEX).to_numpy(dtype=float)
+            flags['league unknown'] = np.isnan(ranks)
+            flags[f'league below {required_league}'] = ranks < required_rank
+    
+    failing = np.logical_or.reduce(list(flags.values()))
+    for index in np.flatnonzero(failing):
+        reasons = [reason for reason, mask in flags.items() if mask[index]]
+        report.non_compliant.append((int(user_ids[index]), ', '.join(reasons)))
+    return report
+
+
+async def sync_compliance_role(guild: discord.Guild, role: discord.Role, user_ids: Iterable[int],
+                               reason: Optional[str] = None) -> Tuple[int, int, int]:
+    """Give `role` to exactly the given members; returns (added, removed, failed)."""
+    targets = set(user_ids)
+    to_add = [member for member in (guild.get_member(user_id) for user_id in targets)
+              if member and role not in member.roles]
+    to_remove = [member for member in role.members if member.id not in targets]
+    
+    outcomes = await gather_bounded(
+        [member.add_roles(role, reason=reason) for member in to_add]
+        + [member.remove_roles(role, reason=reason) for member in to_remove],
+        concurrency=2,
+        batch_size=ROLE_BATCH_SIZE,
+        batch_delay=ROLE_BATCH_DELAY
+    )
+    added = sum(1 for outcome in outcomes[:len(to_add)] if not isinstance(outcome, Exception))
+    removed = sum(1 for outcome in outcomes[len(to_add):] if not isinstance(outcome, Exception))
+    return added, removed, len(outcomes) - added - removed
@@ -0,0 +1,129 @@
+import asyncio
+import discord
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional, Tuple
+from records import DeliveryRecord
+from utils.cache_policy import ensure_chunked
+from utils.runtime import loads
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+CONCURRENCY = 5
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+IDLE_POLL_SECONDS = 60
+# Minimum spacing between requests on the same route. DMs share one route because opening
+# DM channels is what Discord's anti-spam limits watch, whichever member is messaged.
+ROUTE_INTERVALS = {'channel': 1.0, 'dm': 0.75}
+
+
+class RoutePacer:
+    def __init__(self):
+        self._next_slot: Dict[Hashable, float] = {}
+    
+    async def wait(self, route: Hashable, interval: float):
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(route, now))
+        self._next_slot[route] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DeliveryQueue:
+    """Persistent fan-out of announcements; pending rows survive restarts and are picked up on start."""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        self.pacer = RoutePacer()
+        self.semaphore = asyncio.Semaphore(CONCURRENCY)
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {'sent': 0, 'failed': 0, 'retried': 0}
+    
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+    
+    def notify(self):
+        self.wakeup.set()
+    
+    async def run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                deliveries = await self.db.get_due_deliveries(BATCH_SIZE)
+                if deliveries:
+                    outcomes = await asyncio.gather(*(self.deliver(delivery) for delivery in deliveries))
+                    await self.db.update_deliveries(outcomes)
+                    continue
+                
+                await self.sleep_until_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Delivery queue error: {e}")
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+    
+    async def sleep_until_due(self):
+        timeout = IDLE_POLL_SECONDS
+        next_due = await self.db.get_next_delivery_time()
+        if next_due is not None:
+            timeout = min(timeout, max((next_due - datetime.utcnow()).total_seconds(), 0.5))
+        
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def deliver(self, delivery: DeliveryRecord) -> Tuple[int, str, int, Optional[str], Optional[datetime]]:
+        attempts = delivery.attempts + 1
+        async with self.semaphore:
+            route = ('dm',) if delivery.target_type == 'dm' else ('channel', delivery.target_id)
+            await self.pacer.wait(route, ROUTE_INTERVALS[delivery.target_type])
+            try:
+                await self.send(delivery)
+            except (discord.Forbidden, discord.NotFound, LookupError) as e:
+                self.stats['failed'] += 1
+                return delivery.id, 'failed', attempts, str(e)[:200], None
+            except (discord.HTTPException, asyncio.TimeoutError, OSError) as e:
+                if attempts >= MAX_ATTEMPTS:
+                    self.stats['failed'] += 1
+                    return delivery.id, 'failed', attempts, str(e)[:200], None
+                self.stats['retried'] += 1
+                retry_at = datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+                return delivery.id, 'pending', attempts, str(e)[:200], retry_at
+        
+        self.stats['sent'] += 1
+        return delivery.id, 'sent', attempts, None, None
+    
+    async def send(self, delivery: DeliveryRecord):
+        embed = discord.Embed.from_dict(loads(delivery.embed) if isinstance(delivery.embed, str) else delivery.embed)
+        if delivery.target_type == 'channel':
+            channel = self.bot.get_channel(delivery.target_id)
+            if channel is None:
+                raise LookupError(f"Channel {delivery.target_id} is not available")
+            await channel.send(content=delivery.mention or None, embed=embed)
+            return
+        
+        guild = self.bot.get_guild(delivery.guild_id)
+        if guild is not None:
+            await ensure_chunked(guild)
+        member = guild.get_member(delivery.target_id) if guild else None
+        if member is None:
+            raise LookupError(f"Member {delivery.target_id} is no longer in the server")
+        await member.send(embed=embed)
@@ -0,0 +1,72 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from utils.helpers import format_duration
+
+
+ACTION_SEVERITY = {"mute": 1, "kick": 2, "ban": 3}
+
+
+class EscalationEngine:
+    def __init__(self, db, max_users: int = 10000):
+        self.db = db
+        self.max_users = max_users
+        self.rules: Dict[int, List[Dict[str, Any]]] = {}
+        self.windows: "OrderedDict[Tuple[int, int], deque]" = OrderedDict()
+    
+    async def get_rules(self, guild_id: int) -> List[Dict[str, Any]]:
+        rules = self.rules.get(guild_id)
+        if rules is None:
+            rules = await self.db.get_escalation_rules(guild_id)
+            self.rules[guild_id] = rules
+        return rules
+    
+    def invalidate_rules(self, guild_id: int):
+        self.rules.pop(guild_id, None)
+        for key in [key for key in self.windows if key[0] == guild_id]:
+            del self.windows[key]
+    
+    def invalidate_user(self, guild_id: int, user_id: int):
+        self.windows.pop((guild_id, user_id), None)
+    
+    async def record_warning(self, guild_id: int, user_id: int,
+                             created_at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Record a warning that was just written and return the escalation rule it triggers, if any."""
+        rules = await self.get_rules(guild_id)
+        if not rules:
+            return None
+        
+        created_at = created_at or datetime.utcnow()
+        horizon = created_at - timedelta(days=max(rule['window_days'] for rule in rules))
+        key = (guild_id, user_id)
+        
+        window = self.windows.get(key)
+        if window is None:
+            window = deque(await self.db.get_warning_times(guild_id, user_id, horizon))
+            self.windows[key] = window
+            if len(self.windows) > self.max_users:
+                self.windows.popitem(last=False)
+        else:
+            window.append(created_at)
+            self.windows.move_to_end(key)
+        
+        while window and window[0] < horizon:
+            window.popleft()
+        
+        triggered = None
+        for rule in rules:
+            since = created_at - timedelta(days=rule['window_days'])
+            count = sum(1 for timestamp in window if timestamp >= since)
+            # Only the warning that reaches the threshold fires the rule; later ones in the window do not repeat it.
+            if count != rule['warning_count']:
+                continue
+            if triggered is None or ACTION_SEVERITY[rule['action']] > ACTION_SEVERITY[triggered['action']]:
+                triggered = rule
+        return triggered
+
+
+def describe_rule(rule: Dict[str, Any]) -> str:
+    action = rule['action']
+    if action == "mute":
+        action = f"mute for {format_duration(timedelta(minutes=rule['duration_minutes'] or 60))}"
+    return f"{rule['warning_count']} warnings in {rule['window_days']} day(s) → {action}"
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+BLOCK = "block"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+
+class EventQueue:
+    """Bounded queue for one event class, sharded by guild so each guild's events run in order."""
+    
+    def __init__(self, name: str, handler: Callable[..., Awaitable[Any]], workers: int = 2,
+                 maxsize: int = 1000, policy: str = DROP_OLDEST, db=None):
+        self.name = name
+        self.handler = handler
+        self.policy = policy
+        self.maxsize = maxsize
+        self.db = db
+        shard_size = max(1, maxsize // workers)
+        self.shards: List[asyncio.Queue] = [asyncio.Queue(shard_size) for _ in range(workers)]
+        self.tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+    
+    @property
+    def depth(self) -> int:
+        return sum(shard.qsize() for shard in self.shards)
+    
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self.work(shard)) for shard in self.shards]
+    
+    async def submit(self, guild_id: Optional[int], *args) -> bool:
+        shard = self.shards[(guild_id or 0) % len(self.shards)]
+        item = (time.perf_counter(), guild_id, args)
+        self.submitted += 1
+        
+        if self.policy == BLOCK:
+            await shard.put(item)
+            return True
+        
+        if shard.full():
+            if self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return False
+            shard.get_nowait()
+            shard.task_done()
+            self.dropped += 1
+        shard.put_nowait(item)
+        return True
+    
+    async def work(self, shard: asyncio.Queue):
+        while True:
+            enqueued_at, guild_id, args = await shard.get()
+            started = time.perf_counter()
+            waited = started - enqueued_at
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            try:
+                if self.db is not None:
+                    async with self.db.session(f"event:{self.name}"):
+                        await self.handler(*args)
+                else:
+                    await self.handler(*args)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error handling {self.name} event for guild {guild_id}: {e}")
+            finally:
+                elapsed = time.perf_counter() - started
+                self.run_total += elapsed
+                self.run_max = max(self.run_max, elapsed)
+                shard.task_done()
+    
+    async def drain(self, timeout: float):
+        try:
+            await asyncio.wait_for(asyncio.gather(*(shard.join() for shard in self.shards)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropped {self.depth} queued {self.name} event(s) on shutdown")
+    
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+    
+    def stats(self) -> Dict[str, Any]:
+        finished = self.processed + self.failed
+        return {
+            'depth': self.depth,
+            'maxsize': self.maxsize,
+            'workers': len(self.shards),
+            'policy': self.policy,
+            'submitted': self.submitted,
+            'processed': self.processed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'avg_wait_ms': round(self.wait_total / finished * 1000, 2) if finished else 0,
+            'max_wait_ms': round(self.wait_max * 1000, 2),
+            'avg_run_ms': round(self.run_total / finished * 1000, 2) if finished else 0,
+            'max_run_ms': round(self.run_max * 1000, 2)
+        }
+
+
+class EventPipeline:
+    def __init__(self, db=None):
+        self.db = db
+        self.queues: Dict[str, EventQueue] = {}
+    
+    def register(self, name: str, handler: Callable[..., Awaitable[Any]], workers: int = 2,
+                 maxsize: int = 1000, policy: str = DROP_OLDEST) -> EventQueue:
+        queue = EventQueue(name, handler, workers, maxsize, policy, self.db)
+        self.queues[name] = queue
+        return queue
+    
+    def start(self):
+        for queue in self.queues.values():
+            queue.start()
+    
+    async def submit(self, name: str, guild_id: Optional[int], *args) -> bool:
+        return await self.queues[name].submit(guild_id, *args)
+    
+    async def stop(self, drain_timeout: float = 5.0):
+        await asyncio.gather(*(queue.drain(drain_timeout) for queue in self.queues.values()))
+        await asyncio.gather(*(queue.stop() for queue in self.queues.values()))
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: queue.stats() for name, queue in self.queues.items()}
@@ -1,7 +1,9 @@
 import discord
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 import re
+from utils.tracing import span
 
 
 def parse_duration(duration_str: str) -> Optional[timedelta]:
@@ -50,14 +52,35 @@ async def has_permissions(db, interaction: discord.Interaction, command_name: st
     if interaction.user.guild_permissions.administrator:
         return True
     
-    is_blacklisted = await db.is_blacklisted(interaction.guild.id, interaction.user.id)
-    if is_blacklisted:
+    with span('permission', command_name):
+        context = await db.get_command_context(interaction.guild.id, interaction.user.id, command_name)
+    if context['is_blacklisted']:
         return False
     
-    required_roles = await db.get_permissions(interaction.guild.id, command_name)
+    required_roles = context['required_roles']
     
     if not required_roles:
         return True
     
     user_role_ids = [role.id for role in interaction.user.roles]
     return any(role_id in user_role_ids for role_id in required_roles)
+
+
+async def gather_bounded(coros, concurrency: int = 5, batch_size: int = 50, batch_delay: float = 0) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run(coro):
+        async with semaphore:
+            try:
+                return await coro
+            except Exception as e:
+                return e
+    
+    coros = list(coros)
+    results = []
+    for start in range(0, len(coros), batch_size):
+        if start and batch_delay:
+            await asyncio.sleep(batch_delay)
+        batch = coros[start:start + batch_size]
+        results.extend(await asyncio.gather(*(run(coro) for coro in batch)))
+    return results
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Tuple
+from utils.tracing import current_trace
+
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+LOG_MAX_BYTES = 10 * 2**20
+LOG_BACKUP_COUNT = 5
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CONTEXT_FIELDS = ('guild_id', 'command', 'latency_ms')
+
+# (records per second, burst) per logger and its children; errors from a failing dependency can otherwise
+# flood the log once per event.
+RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'discord.gateway': (1.0, 10),
+    'utils.events': (5.0, 50),
+    'utils.delivery': (5.0, 50),
+}
+# Fraction of records below WARNING kept for chatty loggers.
+SAMPLE_RATES: Dict[str, float] = {
+    'utils.tracing': float(os.getenv('COMMAND_LOG_SAMPLE_RATE', '0.1')),
+}
+
+
+def _lookup(table: dict, name: str):
+    while name:
+        if name in table:
+            return table[name]
+        name = name.rpartition('.')[0]
+    return None
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self.buckets: Dict[str, list] = {}
+        self.suppressed: Dict[str, int] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            rate = _lookup(SAMPLE_RATES, record.name)
+            if rate is not None and random.random() >= rate:
+                return False
+        
+        limit = _lookup(RATE_LIMITS, record.name)
+        if limit is None:
+            return True
+        
+        per_second, burst = limit
+        now = time.monotonic()
+        bucket = self.buckets.setdefault(record.name, [float(burst), now])
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * per_second)
+        bucket[1] = now
+        if bucket[0] < 1:
+            self.suppressed[record.name] = self.suppressed.get(record.name, 0) + 1
+            return False
+        
+        bucket[0] -= 1
+        suppressed = self.suppressed.pop(record.name, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar record(s) suppressed)"
+            record.args = None
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve the message and command context here; formatting and I/O run on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        trace = current_trace.get()
+        if trace is not None:
+            if getattr(record, 'guild_id', None) is None:
+                record.guild_id = trace.guild_id
+            if getattr(record, 'command', None) is None:
+                record.command = trace.command
+        return record
+
+
+class _NameFilter(logging.Filter):
+    def __init__(self, name: str, include: bool):
+        super().__init__()
+        self.logger_name = name
+        self.include = include
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return (record.name == self.logger_name) == self.include
+
+
+def setup_logging() -> QueueListener:
+    """Route all logging through a queue; returns the started listener, which must be stopped on exit."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    
+    console = logging.StreamHandler()
+    console.setFormatter(JSONFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+    console.addFilter(_NameFilter('traces', include=False))
+    
+    log_file = RotatingFileHandler(
+        os.path.join(LOG_DIR, 'bot.log'), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    log_file.setFormatter(JSONFormatter())
+    log_file.addFilter(_NameFilter('traces', include=False))
+    
+    trace_file = RotatingFileHandler(
+        os.path.join(LOG_DIR, 'slow_traces.jsonl'), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    trace_file.setFormatter(logging.Formatter('%(message)s'))
+    trace_file.addFilter(_NameFilter('traces', include=True))
+    
+    log_queue: queue.Queue = queue.Queue(-1)
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter())
+    
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    
+    listener = QueueListener(log_queue, console, log_file, trace_file, respect_handler_level=True)
+    listener.start()
+    return listener
+
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+LOOP_DEBUG = os.getenv('LOOP_DEBUG', 'false').lower() in ('1', 'true', 'yes')
+SAMPLE_INTERVAL = 0.25
+BLOCKED_THRESHOLD = float(os.getenv('LOOP_BLOCKED_THRESHOLD_MS', '250')) / 1000
+WINDOW_SAMPLES = 1200
+MAX_STALLS = 20
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a timer; in debug mode a watchdog thread dumps blocked stacks."""
+    
+    def __init__(self, debug: bool = LOOP_DEBUG, threshold: float = BLOCKED_THRESHOLD):
+        self.debug = debug
+        self.threshold = threshold
+        self.samples: Deque[float] = deque(maxlen=WINDOW_SAMPLES)
+        self.max_lag = 0.0
+        self.blocked = 0
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=MAX_STALLS)
+        self.task: Optional[asyncio.Task] = None
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self.task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self.task = asyncio.create_task(self.run())
+        if self.debug:
+            # asyncio then logs every callback that holds the loop longer than the threshold.
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self.watch, name='loop-watchdog', daemon=True)
+            self._watchdog.start()
+    
+    async def stop(self):
+        self._stop.set()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+    
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            lag = max(0.0, loop.time() - scheduled - SAMPLE_INTERVAL)
+            self._last_tick = time.monotonic()
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.blocked += 1
+    
+    def watch(self):
+        reported_tick = None
+        while not self._stop.wait(self.threshold / 2):
+            tick = self._last_tick
+            stalled = time.monotonic() - tick - SAMPLE_INTERVAL
+            if stalled < self.threshold or tick == reported_tick:
+                continue
+            
+            reported_tick = tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+            self.stalls.append({'at': time.time(), 'blocked_ms': round(stalled * 1000, 1), 'stack': stack})
+            logger.warning(f"Event loop blocked for {stalled * 1000:.0f} ms:\n{stack}")
+    
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'debug': self.debug,
+            'threshold_ms': self.threshold * 1000,
+            'samples': len(self.samples),
+            'p50_ms': round(self.percentile(0.5) * 1000, 2),
+            'p95_ms': round(self.percentile(0.95) * 1000, 2),
+            'p99_ms': round(self.percentile(0.99) * 1000, 2),
+            'max_ms': round(self.max_lag * 1000, 2),
+            'blocked': self.blocked,
+            'recent_stalls': list(self.stalls)
+        }
@@ -0,0 +1,45 @@
+import io
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+REQUIRED_COLUMNS = ('user_id', 'username')
+OPTIONAL_COLUMNS = ('clan_rank', 'hangar_power', 'league')
+EXPORT_COLUMNS = ('user_id', 'username', 'clan_rank', 'hangar_power', 'league', 'last_active', 'is_inactive', 'joined_at')
+
+# These run in the offload process pool, so they take and return plain picklable values.
+
+
+def _value(value: Any) -> Optional[Any]:
+    return None if pd.isna(value) else value
+
+
+def parse_member_table(data: bytes, filename: str) -> Tuple[List[str], List[Tuple]]:
+    """Parse an uploaded CSV/Excel roster into (optional columns present, rows of user_id, username, *optional)."""
+    if filename.endswith('.csv'):
+        df = pd.read_csv(io.BytesIO(data))
+    else:
+        df = pd.read_excel(io.BytesIO(data))
+    
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns. File must contain: {', '.join(REQUIRED_COLUMNS)}")
+    
+    present = [column for column in OPTIONAL_COLUMNS if column in df.columns]
+    rows = []
+    for record in df[list(REQUIRED_COLUMNS) + present].itertuples(index=False, name=None):
+        user_id, username, *optional = record
+        values = dict(zip(present, optional))
+        if 'hangar_power' in values:
+            values['hangar_power'] = int(values['hangar_power']) if pd.notna(values['hangar_power']) else None
+        for column in ('clan_rank', 'league'):
+            if column in values:
+                values[column] = _value(values[column])
+        rows.append((int(user_id), str(username), *(values[column] for column in present)))
+    return present, rows
+
+
+def render_member_csv(columns: Dict[str, Sequence]) -> bytes:
+    df = pd.DataFrame(columns)
+    df = df[[column for column in EXPORT_COLUMNS if column in df.columns]]
+    return df.to_csv(index=False).encode()
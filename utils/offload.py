@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import resource
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+PROCESS_WORKERS = int(os.getenv('OFFLOAD_PROCESSES', '2'))
+THREAD_WORKERS = int(os.getenv('OFFLOAD_THREADS', '4'))
+MAX_PENDING = int(os.getenv('OFFLOAD_MAX_PENDING', '8'))
+TASK_TIMEOUT = float(os.getenv('OFFLOAD_TIMEOUT_SECONDS', '60'))
+# Address space cap per worker process, so a decompression bomb fails with MemoryError in the worker.
+WORKER_MEMORY_LIMIT = int(os.getenv('OFFLOAD_WORKER_MEMORY_MB', '2048')) * 2**20
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_IMPORT_UPLOAD_MB', '10')) * 2**20
+
+
+class OffloadError(Exception):
+    pass
+
+
+class OffloadBusy(OffloadError):
+    def __init__(self):
+        super().__init__("Too many file jobs are running, please try again in a moment.")
+
+
+class OffloadTimeout(OffloadError):
+    def __init__(self, timeout: float):
+        super().__init__(f"The job did not finish within {timeout:g} seconds.")
+
+
+def _limit_worker_memory(limit: int):
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+class OffloadService:
+    """Shared pools for CPU-bound work (processes) and blocking I/O (threads), bounded by `max_pending`."""
+    
+    def __init__(self, processes: int = PROCESS_WORKERS, threads: int = THREAD_WORKERS,
+                 max_pending: int = MAX_PENDING, timeout: float = TASK_TIMEOUT):
+        self.processes = processes
+        self.threads = threads
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._warm_up: Optional[asyncio.Task] = None
+    
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # Forking would copy the gateway connection and logging threads, so workers start fresh.
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_limit_worker_memory,
+                initargs=(WORKER_MEMORY_LIMIT,)
+            )
+        return self._process_pool
+    
+    def start(self):
+        """Start the worker processes now so the first command does not pay for their imports."""
+        self._warm_up = asyncio.create_task(self.warm_up())
+    
+    async def warm_up(self):
+        try:
+            await self.run_cpu(os.getpid)
+        except Exception as e:
+            logger.warning(f"Offload process pool failed to start: {e}")
+    
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='offload')
+        return self._thread_pool
+    
+    async def run_cpu(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Run a picklable top-level function in the process pool."""
+        return await self._run(self.process_pool(), func, args, timeout, processes=True)
+    
+    async def run_io(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        return await self._run(self.thread_pool(), func, args, timeout, processes=False)
+    
+    async def _run(self, executor, func: Callable, args, timeout: Optional[float], processes: bool) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise OffloadBusy()
+        
+        timeout = timeout or self.timeout
+        self.pending += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if processes:
+                self._reset_process_pool(executor)
+            raise OffloadTimeout(timeout) from None
+        except BrokenProcessPool:
+            # A worker died (e.g. hit its memory limit); the pool refuses all further work until rebuilt.
+            self._reset_process_pool(executor)
+            raise OffloadError("A worker process crashed while running the job.") from None
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+    
+    def _reset_process_pool(self, pool: ProcessPoolExecutor):
+        # A running task cannot be cancelled, so the stuck worker is killed and the pool rebuilt on next use.
+        # Jobs of an already replaced pool fail late; they must not tear down its healthy successor.
+        if self._process_pool is not pool:
+            return
+        self._process_pool = None
+        for process in list(getattr(pool, '_processes', {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Restarted the offload process pool")
+    
+    def shutdown(self):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+    
+    def stats(self):
+        return {
+            'processes': self.processes,
+            'threads': self.threads,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected
+        }
+
+
+offload = OffloadService()
@@ -0,0 +1,53 @@
+import discord
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+
+PageFetch = Callable[[Any], Awaitable[Tuple[List[Any], Any]]]
+
+
+class KeysetPager(discord.ui.View):
+    """Previous/Next buttons over a keyset-paginated query.
+    
+    `fetch(cursor)` returns (records, next_cursor) for the page starting at `cursor`, and `render(pager)`
+    builds the embed for the loaded page. Only the user who opened the pager can turn its pages.
+    """
+    
+    def __init__(self, user_id: int, fetch: PageFetch, render: Callable[['KeysetPager'], discord.Embed],
+                 denied_message: str, timeout: Optional[float] = 300):
+        super().__init__(timeout=timeout)
+        self.user_id = user_id
+        self.fetch = fetch
+        self.render = render
+        self.denied_message = denied_message
+        self.cursors = [None]
+        self.page = 0
+        self.records = []
+        self.next_cursor = None
+    
+    async def load_page(self, page: int = 0):
+        # The view only moves to the page once its query succeeded.
+        records, next_cursor = await self.fetch(self.cursors[page])
+        self.page, self.records, self.next_cursor = page, records, next_cursor
+        self.previous.disabled = page == 0
+        self.next.disabled = next_cursor is None
+    
+    def build_embed(self) -> discord.Embed:
+        return self.render(self)
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(self.denied_message, ephemeral=True)
+            return False
+        return True
+    
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.load_page(self.page - 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+    
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) == self.page + 1:
+            self.cursors.append(self.next_cursor)
+        await self.load_page(self.page + 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
@@ -0,0 +1,237 @@
+import discord
+import asyncio
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Sequence, Union
+from utils.offload import offload
+
+
+LINK_PATTERN = re.compile(r'https?://\S+|discord\.gg/\S+', re.IGNORECASE)
+BULK_DELETE_MAX = 100
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+PATTERN_MAX_LENGTH = 100
+PATTERN_BATCH_SIZE = 100
+PATTERN_TIMEOUT = 5.0
+
+SnowflakeTime = Union[discord.abc.Snowflake, datetime]
+
+
+def search_contents(pattern: re.Pattern, contents: Sequence[str]) -> List[bool]:
+    """Run in a worker process, which is killed if a pathological pattern backtracks past the timeout."""
+    return [pattern.search(content) is not None for content in contents]
+
+
+class PurgeFilter:
+    def __init__(
+        self,
+        user_id: Optional[int] = None,
+        pattern: Optional[str] = None,
+        links_only: bool = False,
+        attachments_only: bool = False,
+        bots_only: bool = False,
+        after: Optional[SnowflakeTime] = None,
+        before: Optional[SnowflakeTime] = None
+    ):
+        self.user_id = user_id
+        if pattern and len(pattern) > PATTERN_MAX_LENGTH:
+            raise re.error(f"pattern is longer than {PATTERN_MAX_LENGTH} characters")
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.links_only = links_only
+        self.attachments_only = attachments_only
+        self.bots_only = bots_only
+        self.after = after
+        self.before = before
+    
+    @property
+    def is_empty(self) -> bool:
+        return not (self.user_id or self.pattern or self.links_only or self.attachments_only or self.bots_only)
+    
+    def matches(self, message: discord.Message) -> bool:
+        if self.user_id and message.author.id != self.user_id:
+            return False
+        if self.bots_only and not message.author.bot:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.links_only and not LINK_PATTERN.search(message.content):
+            return False
+        return True
+    
+    async def select(self, messages: List[discord.Message]) -> List[discord.Message]:
+        """The messages, already passed through `matches`, whose content matches the pattern."""
+        if not self.pattern or not messages:
+            return messages
+        found = await offload.run_cpu(search_contents, self.pattern, [message.content for message in messages],
+                                      timeout=PATTERN_TIMEOUT)
+        return [message for message, matched in zip(messages, found) if matched]
+    
+    def describe(self) -> str:
+        parts = []
+        if self.user_id:
+            parts.append(f"user <@{self.user_id}>")
+        if self.bots_only:
+            parts.append("bots")
+        if self.pattern:
+            parts.append(f"matching `{self.pattern.pattern}`")
+        if self.links_only:
+            parts.append("with links")
+        if self.attachments_only:
+            parts.append("with attachments")
+        if self.after:
+            parts.append(f"after {self._format_bound(self.after)}")
+        if self.before:
+            parts.append(f"before {self._format_bound(self.before)}")
+        return ', '.join(parts) if parts else "all messages"
+    
+    @staticmethod
+    def _format_bound(bound: SnowflakeTime) -> str:
+        if not isinstance(bound, datetime):
+            bound = discord.utils.snowflake_time(bound.id)
+        return bound.strftime('%Y-%m-%d %H:%M')
+
+
+class PurgeProgress:
+    __slots__ = ('scanned', 'matched', 'bulk_deleted', 'single_deleted', 'failed', 'cancelled', 'finished')
+    
+    def __init__(self):
+        self.scanned = 0
+        self.matched = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.failed = 0
+        self.cancelled = False
+        self.finished = False
+    
+    @property
+    def deleted(self) -> int:
+        return self.bulk_deleted + self.single_deleted
+
+
+class PurgeJob:
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        message_filter: PurgeFilter,
+        limit: Optional[int],
+        scan_limit: int,
+        on_progress: Optional[Callable[[PurgeProgress], Awaitable[None]]] = None,
+        progress_interval: float = 3.0,
+        single_delete_delay: float = 1.0,
+        reason: Optional[str] = None
+    ):
+        self.channel = channel
+        self.filter = message_filter
+        self.limit = limit
+        self.scan_limit = scan_limit
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.single_delete_delay = single_delete_delay
+        self.reason = reason
+        self.progress = PurgeProgress()
+        self._last_report = 0.0
+        self._batch: List[discord.Message] = []
+        self._bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE + timedelta(minutes=1)
+    
+    def cancel(self):
+        self.progress.cancelled = True
+    
+    async def run(self) -> PurgeProgress:
+        progress = self.progress
+        # Pattern matching runs in a worker, so candidates are sent to it a page at a time.
+        batch_size = PATTERN_BATCH_SIZE if self.filter.pattern else 1
+        candidates: List[discord.Message] = []
+        
+        async for message in self.channel.history(
+            limit=self.scan_limit,
+            before=self.filter.before,
+            after=self.filter.after,
+            oldest_first=False
+        ):
+            if progress.cancelled:
+                break
+            
+            progress.scanned += 1
+            if not self.filter.matches(message):
+                continue
+            
+            candidates.append(message)
+            if len(candidates) >= batch_size:
+                done = await self._purge(await self.filter.select(candidates))
+                candidates = []
+                if done:
+                    break
+        
+        if candidates and not progress.cancelled:
+            await self._purge(await self.filter.select(candidates))
+        if self._batch and not progress.cancelled:
+            await self._delete_bulk(self._batch)
+            self._batch = []
+        
+        progress.finished = True
+        if self.on_progress:
+            await self.on_progress(progress)
+        return progress
+    
+    async def _purge(self, messages: List[discord.Message]) -> bool:
+        """Delete matched messages; True once the limit is reached or the job was cancelled."""
+        progress = self.progress
+        for message in messages:
+            if progress.cancelled:
+                return True
+            
+            progress.matched += 1
+            if message.created_at >= self._bulk_cutoff:
+                self._batch.append(message)
+                if len(self._batch) >= BULK_DELETE_MAX:
+                    await self._delete_bulk(self._batch)
+                    self._batch = []
+            else:
+                if self._batch:
+                    await self._delete_bulk(self._batch)
+                    self._batch = []
+                await self._delete_single(message)
+            
+            await self._report()
+            if self.limit and progress.matched >= self.limit:
+                return True
+        return False
+    
+    async def _delete_bulk(self, batch: List[discord.Message]):
+        if len(batch) == 1:
+            await self._delete_single(batch[0], pace=False)
+            return
+        
+        try:
+            await self.channel.delete_messages(batch, reason=self.reason)
+            self.progress.bulk_deleted += len(batch)
+        except discord.NotFound:
+            for message in batch:
+                await self._delete_single(message)
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException:
+            self.progress.failed += len(batch)
+    
+    async def _delete_single(self, message: discord.Message, pace: bool = True):
+        try:
+            await message.delete()
+            self.progress.single_deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException:
+            self.progress.failed += 1
+        
+        if pace:
+            await asyncio.sleep(self.single_delete_delay)
+    
+    async def _report(self):
+        if not self.on_progress:
+            return
+        
+        now = time.monotonic()
+        if now - self._last_report >= self.progress_interval:
+            self._last_report = now
+            await self.on_progress(self.progress)
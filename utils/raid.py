@@ -0,0 +1,189 @@
+import re
+import time
+import unicodedata
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+LEVEL_NONE = 0
+LEVEL_TIMEOUT = 1
+LEVEL_VERIFICATION = 2
+LEVEL_LOCKDOWN = 3
+
+LEVEL_NAMES = {
+    LEVEL_NONE: "Watching",
+    LEVEL_TIMEOUT: "Timing out join cohort",
+    LEVEL_VERIFICATION: "Verification level raised",
+    LEVEL_LOCKDOWN: "Lockdown",
+}
+
+
+def name_skeleton(name: str) -> str:
+    normalized = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    return re.sub(r'[^a-z]', '', normalized)
+
+
+class RaidSettings:
+    def __init__(
+        self,
+        join_threshold: int = 10,
+        window_seconds: int = 30,
+        min_account_age_days: int = 7,
+        similar_name_threshold: int = 4,
+        timeout_minutes: int = 60,
+        cooldown_seconds: int = 300
+    ):
+        self.join_threshold = join_threshold
+        self.window_seconds = window_seconds
+        self.min_account_age_days = min_account_age_days
+        self.similar_name_threshold = similar_name_threshold
+        self.timeout_minutes = timeout_minutes
+        self.cooldown_seconds = cooldown_seconds
+
+
+class JoinRecord:
+    __slots__ = ('timestamp', 'user_id', 'skeleton', 'young', 'actioned')
+    
+    def __init__(self, timestamp: float, user_id: int, skeleton: str, young: bool):
+        self.timestamp = timestamp
+        self.user_id = user_id
+        self.skeleton = skeleton
+        self.young = young
+        self.actioned = False
+
+
+class GuildRaidState:
+    def __init__(self, settings: RaidSettings):
+        self.settings = settings
+        self.joins: deque = deque()
+        self.young_count = 0
+        self.skeletons: Counter = Counter()
+        self.level = LEVEL_NONE
+        self.window_level = LEVEL_NONE
+        # Time of the latest join that met a threshold; the shield stands down once this is old enough.
+        self.triggered_at: Optional[float] = None
+        self.previous_verification_level = None
+        self.actioned_total = 0
+    
+    def evict(self, now: float):
+        cutoff = now - self.settings.window_seconds
+        while self.joins and self.joins[0].timestamp < cutoff:
+            record = self.joins.popleft()
+            if record.young:
+                self.young_count -= 1
+            if record.skeleton:
+                self.skeletons[record.skeleton] -= 1
+                if self.skeletons[record.skeleton] <= 0:
+                    del self.skeletons[record.skeleton]
+    
+    def cool_down(self, now: float) -> bool:
+        """Drop back to LEVEL_NONE once no join has met a threshold for `cooldown_seconds`.
+        
+        Returns True when the shield stood down; the caller restores the guild from `previous_verification_level`.
+        """
+        if self.level == LEVEL_NONE or self.triggered_at is None:
+            return False
+        if now - self.triggered_at < self.settings.cooldown_seconds:
+            return False
+        self.level = LEVEL_NONE
+        self.window_level = LEVEL_NONE
+        self.triggered_at = None
+        return True
+    
+    def add(self, record: JoinRecord):
+        self.joins.append(record)
+        if record.young:
+            self.young_count += 1
+        if record.skeleton:
+            self.skeletons[record.skeleton] += 1
+    
+    def evaluate(self, record: JoinRecord) -> int:
+        settings = self.settings
+        joins = len(self.joins)
+        
+        level = LEVEL_NONE
+        if joins >= settings.join_threshold:
+            level = LEVEL_TIMEOUT
+        if record.skeleton and self.skeletons[record.skeleton] >= settings.similar_name_threshold:
+            level = max(level, LEVEL_TIMEOUT)
+        if joins >= settings.join_threshold and self.young_count * 2 >= joins:
+            level = max(level, LEVEL_VERIFICATION)
+        if joins >= settings.join_threshold * 2:
+            level = max(level, LEVEL_VERIFICATION)
+        if joins >= settings.join_threshold * 3:
+            level = LEVEL_LOCKDOWN
+        return level
+
+
+class RaidDetector:
+    def __init__(self):
+        self.guilds: Dict[int, GuildRaidState] = {}
+    
+    def arm(self, guild_id: int, settings: Optional[RaidSettings] = None) -> GuildRaidState:
+        state = GuildRaidState(settings or RaidSettings())
+        self.guilds[guild_id] = state
+        return state
+    
+    def disarm(self, guild_id: int) -> Optional[GuildRaidState]:
+        return self.guilds.pop(guild_id, None)
+    
+    def is_armed(self, guild_id: int) -> bool:
+        return guild_id in self.guilds
+    
+    def get_state(self, guild_id: int) -> Optional[GuildRaidState]:
+        return self.guilds.get(guild_id)
+    
+    def record_join(
+        self,
+        guild_id: int,
+        user_id: int,
+        name: str,
+        created_at: datetime,
+        now: Optional[float] = None
+    ) -> int:
+        """Record a join and return the new escalation level, or LEVEL_NONE if unchanged.
+        
+        Call `cool_down` first so a join after a quiet period starts from LEVEL_NONE.
+        """
+        state = self.guilds.get(guild_id)
+        if state is None:
+            return LEVEL_NONE
+        
+        now = time.monotonic() if now is None else now
+        account_age = datetime.now(timezone.utc) - created_at
+        young = account_age.days < state.settings.min_account_age_days
+        
+        record = JoinRecord(now, user_id, name_skeleton(name), young)
+        state.evict(now)
+        state.add(record)
+        
+        level = state.evaluate(record)
+        state.window_level = level
+        if level >= LEVEL_TIMEOUT:
+            state.triggered_at = now
+        if level > state.level:
+            state.level = level
+            return level
+        return LEVEL_NONE
+    
+    def cool_down(self, guild_id: int, now: Optional[float] = None) -> Optional[GuildRaidState]:
+        """The guild's state if its shield just stood down, else None."""
+        state = self.guilds.get(guild_id)
+        if state is None or not state.cool_down(time.monotonic() if now is None else now):
+            return None
+        return state
+    
+    def drain_cohort(self, guild_id: int) -> List[int]:
+        """Joins of the current window not yet actioned, if that window met a threshold."""
+        state = self.guilds.get(guild_id)
+        if state is None or state.window_level < LEVEL_TIMEOUT:
+            return []
+        
+        cohort = []
+        for record in state.joins:
+            if not record.actioned:
+                record.actioned = True
+                cohort.append(record.user_id)
+        state.actioned_total += len(cohort)
+        return cohort
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+from utils.runtime import loads
+
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('user', 'guild')
+MAX_BUCKETS = 200_000
+EXPIRE_PER_CHECK = 4
+
+# Default (uses, per_seconds) per command and scope; guilds override them through `/config rate-limit`.
+DEFAULT_LIMITS: Dict[str, Dict[str, Tuple[int, int]]] = {
+    'echo': {'user': (3, 30), 'guild': (20, 60)},
+    'clan message': {'user': (2, 600), 'guild': (6, 3600)},
+    'purge': {'user': (3, 60), 'guild': (10, 60)},
+    'bulk-mod': {'user': (2, 60), 'guild': (6, 300)},
+    'export-members': {'user': (2, 300), 'guild': (10, 3600)},
+    'import-members': {'user': (2, 300), 'guild': (10, 3600)},
+    'backup': {'user': (2, 300), 'guild': (6, 3600)},
+    'clan compliance': {'user': (2, 300), 'guild': (6, 3600)},
+}
+
+
+def parse_overrides(raw) -> Dict[str, Dict[str, Tuple[int, int]]]:
+    if not raw:
+        return {}
+    try:
+        data = loads(raw) if isinstance(raw, str) else raw
+        return {
+            command: {scope: (int(limit[0]), int(limit[1])) for scope, limit in scopes.items() if scope in SCOPES}
+            for command, scopes in data.items()
+        }
+    except (TypeError, ValueError, IndexError, AttributeError) as e:
+        logger.warning(f"Ignoring malformed rate limit overrides: {e}")
+        return {}
+
+
+class RateLimiter:
+    """Token buckets per scope, guild, user and command, kept in least-recently-used order."""
+    
+    def __init__(self, db, max_buckets: int = MAX_BUCKETS):
+        self.db = db
+        self.max_buckets = max_buckets
+        # key -> [tokens, updated_at, full_at], ordered by last use
+        self.buckets: 'OrderedDict[Hashable, List[float]]' = OrderedDict()
+        self.overrides: Dict[int, Dict[str, Dict[str, Tuple[int, int]]]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.rejections: Dict[str, Dict[str, int]] = {}
+        self.expired = 0
+        self.evicted = 0
+    
+    async def limits_for(self, guild_id: int, command: str) -> Dict[str, Tuple[int, int]]:
+        overrides = self.overrides.get(guild_id)
+        if overrides is None:
+            async with self._locks.setdefault(guild_id, asyncio.Lock()):
+                overrides = self.overrides.get(guild_id)
+                if overrides is None:
+                    config = await self.db.get_guild_config(guild_id)
+                    overrides = parse_overrides(config.get('rate_limits') if config else None)
+                    self.overrides[guild_id] = overrides
+        
+        limits = dict(DEFAULT_LIMITS.get(command, {}))
+        limits.update(overrides.get(command, {}))
+        return {scope: limit for scope, limit in limits.items() if limit[0] > 0}
+    
+    def set_overrides(self, guild_id: int, overrides: Dict[str, Dict[str, Tuple[int, int]]]):
+        self.overrides[guild_id] = overrides
+    
+    async def check(self, guild_id: int, user_id: int, command: str) -> Optional[float]:
+        """Consume one use of `command`; returns None if allowed, otherwise seconds until it is."""
+        limits = await self.limits_for(guild_id, command)
+        if not limits:
+            return None
+        
+        now = time.monotonic()
+        pending = []
+        retry_after = 0.0
+        rejected_scope = None
+        for scope, (uses, per_seconds) in limits.items():
+            key = (scope, guild_id, user_id if scope == 'user' else None, command)
+            rate = uses / per_seconds
+            bucket = self.buckets.get(key)
+            tokens = uses if bucket is None else min(uses, bucket[0] + (now - bucket[1]) * rate)
+            if tokens < 1 and (1 - tokens) / rate > retry_after:
+                retry_after = (1 - tokens) / rate
+                rejected_scope = scope
+            pending.append((key, tokens, uses, rate))
+        
+        if rejected_scope is not None:
+            scopes = self.rejections.setdefault(command, {})
+            scopes[rejected_scope] = scopes.get(rejected_scope, 0) + 1
+            return retry_after
+        
+        for key, tokens, uses, rate in pending:
+            tokens -= 1
+            self.buckets[key] = [tokens, now, now + (uses - tokens) / rate]
+            self.buckets.move_to_end(key)
+        self._expire(now)
+        return None
+    
+    def _expire(self, now: float):
+        # A refilled bucket behaves exactly like a missing one, so dropping it is free; evicting an
+        # unrefilled one past the cap only ever forgives a caller.
+        for _ in range(EXPIRE_PER_CHECK):
+            if not self.buckets:
+                break
+            key, bucket = next(iter(self.buckets.items()))
+            if bucket[2] > now:
+                break
+            del self.buckets[key]
+            self.expired += 1
+        
+        while len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+            self.evicted += 1
+    
+    def stats(self):
+        return {
+            'buckets': len(self.buckets),
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'rejections': self.rejections
+        }
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LINK_PATTERN = re.compile(
+    r'https?://(?:(?:ptb|canary)\.)?discord(?:app)?\.com/channels/(\d+)/(\d+)/(\d+)'
+)
+# Reports of the same message within the window are counted on one triage message.
+REPORT_WINDOW = timedelta(minutes=int(os.getenv('REPORT_WINDOW_MINUTES', '30')))
+# Minimum time between two edits of the same triage message.
+REPORT_EDIT_INTERVAL = float(os.getenv('REPORT_EDIT_INTERVAL_SECONDS', '10'))
+MAX_OPEN_REPORTS = 5000
+
+
+def parse_message_link(link: str) -> Optional[Tuple[int, int, int]]:
+    """(guild_id, channel_id, message_id) of a message link, whatever client or domain it was copied from."""
+    match = MESSAGE_LINK_PATTERN.search(link)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+
+class OpenReport:
+    __slots__ = ('key', 'reporters', 'base_count', 'last_reported', 'record', 'rendered_count', 'last_edit', 'edit_task')
+    
+    def __init__(self, key: Tuple[int, int, int]):
+        self.key = key
+        self.reporters: Set[int] = set()
+        self.base_count = 0
+        self.last_reported = datetime.utcnow()
+        self.record: Optional[Any] = None
+        self.rendered_count = 0
+        self.last_edit = 0.0
+        self.edit_task: Optional[asyncio.Task] = None
+    
+    @property
+    def count(self) -> int:
+        return self.base_count + len(self.reporters)
+
+
+class ReportTriage:
+    """Index of open reports by reported message; duplicate reports only bump a counter on the triage message.
+    
+    `refresh` re-renders a triage message and is called at most once per `interval` for each report.
+    """
+    
+    def __init__(self, refresh: Callable[[OpenReport], Awaitable[None]], window: timedelta = REPORT_WINDOW,
+                 interval: float = REPORT_EDIT_INTERVAL, max_open: int = MAX_OPEN_REPORTS):
+        self.refresh = refresh
+        self.window = window
+        self.interval = interval
+        self.max_open = max_open
+        self.open: "OrderedDict[Tuple[int, int, int], OpenReport]" = OrderedDict()
+        self.coalesced = 0
+        self.edits = 0
+    
+    def add(self, key: Tuple[int, int, int], reporter_id: int) -> Tuple[OpenReport, bool, bool]:
+        """Record a report and return (entry, created, counted).
+        
+        A created entry has no triage message yet; the caller posts one and calls `attach`.
+        """
+        now = datetime.utcnow()
+        self.expire(now)
+        entry = self.open.get(key)
+        created = entry is None
+        if created:
+            entry = OpenReport(key)
+            self.open[key] = entry
+            if len(self.open) > self.max_open:
+                self.discard(next(iter(self.open.values())))
+        
+        counted = reporter_id not in entry.reporters
+        entry.reporters.add(reporter_id)
+        entry.last_reported = now
+        self.open.move_to_end(key)
+        if not created and counted:
+            self.coalesced += 1
+            self.schedule(entry)
+        return entry, created, counted
+    
+    def attach(self, entry: OpenReport, record: Any, base_count: int = 0):
+        """Link an entry to its stored report once the triage message exists."""
+        entry.record = record
+        entry.base_count = base_count
+        entry.rendered_count = record['report_count']
+        self.schedule(entry)
+    
+    def find(self, triage_message_id: int) -> Optional[OpenReport]:
+        for entry in self.open.values():
+            if entry.record is not None and entry.record['triage_message_id'] == triage_message_id:
+                return entry
+        return None
+    
+    def discard(self, entry: OpenReport):
+        if self.open.get(entry.key) is entry:
+            del self.open[entry.key]
+        if entry.edit_task is not None and entry.edit_task is not asyncio.current_task():
+            entry.edit_task.cancel()
+    
+    def expire(self, now: datetime):
+        while self.open:
+            entry = next(iter(self.open.values()))
+            if now - entry.last_reported <= self.window:
+                break
+            self.discard(entry)
+    
+    def mark_rendered(self, entry: OpenReport):
+        """Note an edit made outside the throttle, e.g. by a claim button."""
+        entry.rendered_count = entry.count
+        entry.last_edit = asyncio.get_running_loop().time()
+    
+    def schedule(self, entry: OpenReport):
+        if entry.record is None or entry.count == entry.rendered_count:
+            return
+        if entry.edit_task is None or entry.edit_task.done():
+            entry.edit_task = asyncio.create_task(self.flush(entry))
+    
+    async def flush(self, entry: OpenReport):
+        loop = asyncio.get_running_loop()
+        while entry.count != entry.rendered_count and self.open.get(entry.key) is entry:
+            delay = entry.last_edit + self.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            count = entry.count
+            entry.last_edit = loop.time()
+            try:
+                await self.refresh(entry)
+            except Exception as e:
+                logger.warning(f"Failed to update report triage message {entry.record['triage_message_id']}: {e}")
+                return
+            entry.rendered_count = count
+            self.edits += 1
+    
+    def close(self):
+        for entry in list(self.open.values()):
+            self.discard(entry)
+    
+    def stats(self):
+        return {'open': len(self.open), 'coalesced': self.coalesced, 'edits': self.edits}
@@ -0,0 +1,256 @@
+import asyncio
+import itertools
+import sys
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from records import MemberRecord, RecordColumns
+
+
+MEMBER_INT_COLUMNS = ('id', 'guild_id', 'user_id')
+MEMBER_SHARED_COLUMNS = ('clan_rank', 'league')
+MEMBER_OWNED_COLUMNS = ('id', 'guild_id', 'user_id', 'username', 'hangar_power', 'last_active', 'joined_at')
+LEADERBOARD_COLUMNS = ('username', 'league', 'hangar_power')
+
+# Versions are unique across reloads so a cached page never matches a freshly loaded roster.
+_versions = itertools.count(1)
+
+
+class GuildRoster:
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.members: Dict[int, MemberRecord] = {}
+        self.by_rank: Dict[str, Set[int]] = {}
+        self.by_league: Dict[str, Set[int]] = {}
+        self.inactive: Set[int] = set()
+        self.by_power: List[Tuple[int, int]] = []
+        self.league_power: Dict[str, List[Tuple[int, int]]] = {}
+        self.leaderboard_version = 0
+        self._shared: Dict[str, str] = {}
+    
+    def __len__(self) -> int:
+        return len(self.members)
+    
+    def load(self, records: Iterable[MemberRecord]):
+        for record in records:
+            self.members[record.user_id] = record
+            self._index(record)
+        self.by_power.sort()
+        for ranking in self.league_power.values():
+            ranking.sort()
+        self.leaderboard_version = next(_versions)
+    
+    def upsert(self, record: MemberRecord):
+        previous = self.members.get(record.user_id)
+        if previous is not None:
+            self._unindex(previous)
+        self.members[record.user_id] = record
+        self._index(record, sort=True)
+        if previous is None or any(previous[name] != record[name] for name in LEADERBOARD_COLUMNS):
+            self.leaderboard_version = next(_versions)
+    
+    def remove(self, user_id: int):
+        record = self.members.pop(user_id, None)
+        if record is not None:
+            self._unindex(record)
+            self.leaderboard_version = next(_versions)
+    
+    def _index(self, record: MemberRecord, sort: bool = False):
+        for name in MEMBER_SHARED_COLUMNS:
+            value = getattr(record, name)
+            if value is not None:
+                setattr(record, name, self._shared.setdefault(value, value))
+        if record.clan_rank is not None:
+            self.by_rank.setdefault(record.clan_rank, set()).add(record.user_id)
+        if record.league is not None:
+            self.by_league.setdefault(record.league, set()).add(record.user_id)
+        if record.is_inactive:
+            self.inactive.add(record.user_id)
+        if record.hangar_power is not None:
+            key = (-record.hangar_power, record.user_id)
+            rankings = [self.by_power]
+            if record.league is not None:
+                rankings.append(self.league_power.setdefault(record.league, []))
+            for ranking in rankings:
+                if sort:
+                    insort(ranking, key)
+                else:
+                    ranking.append(key)
+    
+    def _unindex(self, record: MemberRecord):
+        for index, value in ((self.by_rank, record.clan_rank), (self.by_league, record.league)):
+            if value is None:
+                continue
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.discard(record.user_id)
+                if not bucket:
+                    del index[value]
+        self.inactive.discard(record.user_id)
+        if record.hangar_power is not None:
+            key = (-record.hangar_power, record.user_id)
+            rankings = [self.by_power]
+            if record.league in self.league_power:
+                rankings.append(self.league_power[record.league])
+            for ranking in rankings:
+                position = bisect_left(ranking, key)
+                if position < len(ranking) and ranking[position] == key:
+                    del ranking[position]
+            if record.league in self.league_power and not self.league_power[record.league]:
+                del self.league_power[record.league]
+    
+    def get(self, user_id: int) -> Optional[MemberRecord]:
+        return self.members.get(user_id)
+    
+    def query(self, clan_rank: Optional[str] = None, league: Optional[str] = None,
+              inactive: Optional[bool] = None, min_power: Optional[int] = None,
+              max_power: Optional[int] = None) -> List[MemberRecord]:
+        candidates: Optional[Set[int]] = None
+        for index, value in ((self.by_rank, clan_rank), (self.by_league, league)):
+            if value is None:
+                continue
+            bucket = index.get(value, set())
+            candidates = bucket if candidates is None else candidates & bucket
+        
+        if min_power is not None or max_power is not None:
+            start = 0 if max_power is None else bisect_left(self.by_power, (-max_power,))
+            end = len(self.by_power) if min_power is None else bisect_right(self.by_power, (-min_power, float('inf')))
+            in_range = {user_id for _, user_id in self.by_power[start:end]}
+            candidates = in_range if candidates is None else candidates & in_range
+        
+        if inactive is not None:
+            if candidates is None:
+                candidates = self.inactive if inactive else self.members.keys() - self.inactive
+            else:
+                candidates = candidates & self.inactive if inactive else candidates - self.inactive
+        
+        if candidates is None:
+            return list(self.members.values())
+        return [record for user_id, record in self.members.items() if user_id in candidates]
+    
+    def ranking(self, league: Optional[str] = None) -> List[Tuple[int, int]]:
+        if league is None:
+            return self.by_power
+        return self.league_power.get(league, [])
+    
+    def power_rank(self, user_id: int, league: Optional[str] = None) -> Optional[int]:
+        record = self.members.get(user_id)
+        if record is None or record.hangar_power is None or (league is not None and record.league != league):
+            return None
+        return bisect_left(self.ranking(league), (-record.hangar_power, user_id)) + 1
+    
+    def leaderboard(self, league: Optional[str] = None, offset: int = 0, limit: int = 10) -> List[MemberRecord]:
+        return [self.members[user_id] for _, user_id in self.ranking(league)[offset:offset + limit]]
+    
+    def stale_members(self, cutoff: datetime) -> List[int]:
+        return [
+            user_id for user_id, record in self.members.items()
+            if not record.is_inactive and record.last_active is not None and record.last_active < cutoff
+        ]
+    
+    def columns(self) -> RecordColumns:
+        return RecordColumns(
+            MemberRecord,
+            [tuple(record.values()) for record in self.members.values()],
+            int_columns=MEMBER_INT_COLUMNS,
+            shared_columns=MEMBER_SHARED_COLUMNS
+        )
+    
+    def memory_bytes(self) -> int:
+        size = sys.getsizeof(self.members) + sys.getsizeof(self.by_power) + sys.getsizeof(self.inactive)
+        for record in self.members.values():
+            size += sys.getsizeof(record)
+            size += sum(sys.getsizeof(getattr(record, name)) for name in MEMBER_OWNED_COLUMNS)
+        size += sum(sys.getsizeof(value) for value in self._shared)
+        for index in (self.by_rank, self.by_league):
+            size += sys.getsizeof(index) + sum(sys.getsizeof(bucket) for bucket in index.values())
+        size += sum(sys.getsizeof(key) + sys.getsizeof(key[0]) for key in self.by_power)
+        for ranking in self.league_power.values():
+            size += sys.getsizeof(ranking)
+        return size
+
+
+class RosterMirror:
+    def __init__(self, db):
+        self.db = db
+        self.guilds: Dict[int, GuildRoster] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, List[MemberRecord]] = {}
+        # DB time each roster was last known to be complete at; warm starts reconcile from here.
+        self.watermarks: Dict[int, datetime] = {}
+    
+    async def get(self, guild_id: int) -> GuildRoster:
+        roster = self.guilds.get(guild_id)
+        if roster is not None:
+            return roster
+        
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            roster = self.guilds.get(guild_id)
+            if roster is None:
+                self._pending[guild_id] = []
+                try:
+                    watermark = await self.db.get_db_time()
+                    roster = GuildRoster(guild_id)
+                    roster.load(await self.db.get_all_members(guild_id))
+                    for record in self._pending[guild_id]:
+                        roster.upsert(record)
+                    self.guilds[guild_id] = roster
+                    self.watermarks[guild_id] = watermark
+                finally:
+                    del self._pending[guild_id]
+        return roster
+    
+    def install(self, guild_id: int, records: Iterable[MemberRecord], watermark: datetime):
+        if guild_id in self.guilds or guild_id in self._pending:
+            return
+        roster = GuildRoster(guild_id)
+        roster.load(records)
+        self.guilds[guild_id] = roster
+        self.watermarks[guild_id] = watermark
+    
+    async def reconcile(self, guild_id: int, margin: timedelta) -> bool:
+        """Catch an installed roster up with writes since its watermark; drops it if rows were deleted."""
+        async with self._locks.setdefault(guild_id, asyncio.Lock()):
+            roster = self.guilds.get(guild_id)
+            watermark = self.watermarks.get(guild_id)
+            if roster is None or watermark is None:
+                return False
+            
+            self._pending[guild_id] = []
+            try:
+                now = await self.db.get_db_time()
+                changed, count = await self.db.get_members_changed_since(guild_id, watermark - margin)
+                if self.guilds.get(guild_id) is not roster:
+                    return False
+                # Writes applied while the query ran are newer than what it returned.
+                for record in changed + self._pending[guild_id]:
+                    roster.upsert(record)
+            finally:
+                del self._pending[guild_id]
+            if len(roster) != count:
+                # Every surviving row is now in the roster, so a surplus means members were deleted.
+                self.invalidate(guild_id)
+                return False
+            self.watermarks[guild_id] = now
+            return True
+    
+    def apply(self, guild_id: int, records: Iterable[MemberRecord]):
+        records = list(records)
+        pending = self._pending.get(guild_id)
+        if pending is not None:
+            pending.extend(records)
+        roster = self.guilds.get(guild_id)
+        if roster is not None:
+            for record in records:
+                roster.upsert(record)
+    
+    def invalidate(self, guild_id: int):
+        self.guilds.pop(guild_id, None)
+        self.watermarks.pop(guild_id, None)
+    
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        return {
+            guild_id: {'members': len(roster), 'memory_bytes': roster.memory_bytes()}
+            for guild_id, roster in self.guilds.items()
+        }
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import os
+from typing import Any, Coroutine, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+# Fast mode is on by default but only takes effect for the optional packages that are installed.
+FAST_RUNTIME = os.getenv('FAST_RUNTIME', 'true').lower() in ('1', 'true', 'yes')
+USE_ORJSON = FAST_RUNTIME and orjson is not None
+USE_UVLOOP = FAST_RUNTIME and uvloop is not None
+
+
+if USE_ORJSON:
+    def dumps(data: Any) -> str:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    loads = orjson.loads
+else:
+    def dumps(data: Any) -> str:
+        return json.dumps(data, default=str)
+    
+    loads = json.loads
+
+
+def run(main: Coroutine) -> Any:
+    if USE_UVLOOP:
+        return uvloop.run(main)
+    return asyncio.run(main)
+
+
+async def init_connection(conn):
+    """Decode json/jsonb in the driver, so queries return Python values and take them as parameters."""
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(type_name, encoder=dumps, decoder=loads, schema='pg_catalog')
+
+
+def runtime_info() -> Dict[str, Any]:
+    return {
+        'fast_runtime': FAST_RUNTIME,
+        'event_loop': 'uvloop' if USE_UVLOOP else 'asyncio',
+        'json': 'orjson' if USE_ORJSON else 'json'
+    }
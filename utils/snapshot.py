@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from records import MemberRecord
+from utils.ratelimit import parse_overrides
+from utils.runtime import dumps, loads
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', os.path.join('state', 'snapshot.bin'))
+SNAPSHOT_VERSION = 1
+MAGIC = b'CLANSNAP'
+HEADER = struct.Struct('<8sHQ')
+# Writes commit after CURRENT_TIMESTAMP is taken, so reconciliation re-reads a little before each watermark.
+WATERMARK_MARGIN = timedelta(minutes=5)
+TIMESTAMP_COLUMNS = ('last_active', 'joined_at')
+
+
+class StateSnapshot:
+    """Versioned on-disk copy of the roster mirror and rate limit overrides for warm restarts."""
+    
+    def __init__(self, bot, path: str = SNAPSHOT_PATH):
+        self.bot = bot
+        self.db = bot.db
+        self.path = path
+        self.restored_at: Optional[datetime] = None
+        self.reconciled = 0
+    
+    async def save(self):
+        watermark = await self.db.get_db_time()
+        rosters = self.db.rosters
+        data = {
+            'fields': MemberRecord._fields,
+            'rosters': {
+                str(guild_id): {
+                    'watermark': rosters.watermarks[guild_id].isoformat(),
+                    'rows': [list(record.values()) for record in roster.members.values()]
+                }
+                for guild_id, roster in rosters.guilds.items() if guild_id in rosters.watermarks
+            },
+            'rate_limits': {
+                'watermark': watermark.isoformat(),
+                'guilds': {str(guild_id): overrides for guild_id, overrides in self.bot.rate_limiter.overrides.items()}
+            }
+        }
+        await asyncio.get_running_loop().run_in_executor(None, self._write, data)
+        logger.info(f"Saved state snapshot with {len(data['rosters'])} roster(s)")
+    
+    def _write(self, data: Dict[str, Any]):
+        payload = dumps(data).encode()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(payload)))
+            f.write(payload)
+        os.replace(temp_path, self.path)
+    
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                if len(view) < HEADER.size:
+                    return None
+                magic, version, length = HEADER.unpack_from(view)
+                if magic != MAGIC or version != SNAPSHOT_VERSION or len(view) < HEADER.size + length:
+                    return None
+                data = loads(view[HEADER.size:HEADER.size + length])
+        except (FileNotFoundError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable state snapshot: {e}")
+            return None
+        return data if tuple(data.get('fields', ())) == MemberRecord._fields else None
+    
+    async def restore(self) -> int:
+        """Install the snapshot into memory; returns the number of rosters restored."""
+        data = await asyncio.get_running_loop().run_in_executor(None, self._read)
+        if data is None:
+            return 0
+        
+        timestamp_indexes = [MemberRecord._fields.index(name) for name in TIMESTAMP_COLUMNS]
+        for guild_id, entry in data['rosters'].items():
+            rows = entry['rows']
+            for row in rows:
+                for index in timestamp_indexes:
+                    if row[index] is not None:
+                        row[index] = datetime.fromisoformat(row[index])
+            self.db.rosters.install(int(guild_id), MemberRecord.from_rows(rows),
+                                    datetime.fromisoformat(entry['watermark']))
+        
+        for guild_id, overrides in data['rate_limits']['guilds'].items():
+            self.bot.rate_limiter.set_overrides(int(guild_id), parse_overrides(overrides))
+        
+        self.restored_at = datetime.fromisoformat(data['rate_limits']['watermark'])
+        logger.info(f"Restored {len(data['rosters'])} roster(s) from the state snapshot")
+        return len(data['rosters'])
+    
+    async def reconcile(self):
+        """Bring restored state up to date with writes made since the snapshot was taken."""
+        if self.restored_at is not None:
+            try:
+                changed = await self.db.get_rate_limits_changed_since(self.restored_at - WATERMARK_MARGIN)
+                for guild_id, rate_limits in changed:
+                    self.bot.rate_limiter.set_overrides(guild_id, parse_overrides(rate_limits))
+            except Exception as e:
+                logger.error(f"Failed to reconcile rate limit overrides: {e}")
+                self.bot.rate_limiter.overrides.clear()
+        
+        for guild_id in list(self.db.rosters.guilds):
+            try:
+                if await self.db.rosters.reconcile(guild_id, WATERMARK_MARGIN):
+                    self.reconciled += 1
+            except Exception as e:
+                logger.error(f"Failed to reconcile roster for guild {guild_id}: {e}")
+                self.db.rosters.invalidate(guild_id)
+        logger.info(f"Reconciled {self.reconciled} restored roster(s) with the database")
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import random
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
+from discord.webhook.async_ import async_context
+
+
+logger = logging.getLogger(__name__)
+slow_trace_logger = logging.getLogger('traces')
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SLOW_TRACE_MS = float(os.getenv('SLOW_TRACE_MS', '1000'))
+SLOW_TRACE_SAMPLE_RATE = float(os.getenv('SLOW_TRACE_SAMPLE_RATE', '1.0'))
+
+current_trace: ContextVar[Optional['Trace']] = ContextVar('command_trace', default=None)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+    
+    def observe(self, ms: float):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.maximum = max(self.maximum, ms)
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.count:
+            return None
+        threshold = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= threshold:
+                return bound
+        return round(self.maximum, 2)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f'le_{bound}': count for bound, count in zip(BUCKETS_MS, self.counts)}
+        buckets['le_inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count, 2) if self.count else 0,
+            'max_ms': round(self.maximum, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': buckets
+        }
+
+
+class Trace:
+    def __init__(self, command: str, guild_id: Optional[int], user_id: Optional[int]):
+        self.command = command
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.spans: List[Tuple[str, str, float, float]] = []
+    
+    def add_span(self, kind: str, name: str, started: float, ended: float):
+        self.spans.append((kind, name, (started - self.started) * 1000, (ended - started) * 1000))
+    
+    def breakdown(self) -> Dict[str, float]:
+        totals = {}
+        for kind, _, _, duration in self.spans:
+            totals[kind] = totals.get(kind, 0.0) + duration
+        return totals
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'command': self.command,
+            'guild_id': self.guild_id,
+            'user_id': self.user_id,
+            'duration_ms': round(self.duration_ms or 0, 2),
+            'error': self.error,
+            'breakdown_ms': {kind: round(total, 2) for kind, total in self.breakdown().items()},
+            'spans': [
+                {'kind': kind, 'name': name, 'offset_ms': round(offset, 2), 'duration_ms': round(duration, 2)}
+                for kind, name, offset, duration in self.spans
+            ]
+        }
+
+
+@contextmanager
+def span(kind: str, name: str):
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(kind, name, started, time.perf_counter())
+
+
+def traced(kind: str, request):
+    """Wrap a discord.py `request(route, ...)` coroutine so each call becomes a span."""
+    @wraps(request)
+    async def wrapper(route, *args, **kwargs):
+        if current_trace.get() is None:
+            return await request(route, *args, **kwargs)
+        with span(kind, f"{route.method} {route.path}"):
+            return await request(route, *args, **kwargs)
+    return wrapper
+
+
+class Tracer:
+    def __init__(self):
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.slow_traces = 0
+    
+    def instrument(self, client):
+        client.http.request = traced('discord', client.http.request)
+        # Interaction responses and followups go through the shared webhook adapter, not the bot's HTTP client.
+        adapter = async_context.get()
+        adapter.request = traced('response', adapter.request)
+    
+    @contextmanager
+    def trace(self, command: str, guild_id: Optional[int], user_id: Optional[int]):
+        trace = Trace(command, guild_id, user_id)
+        token = current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            current_trace.reset(token)
+            self.finish(trace)
+    
+    def finish(self, trace: Trace):
+        trace.duration_ms = (time.perf_counter() - trace.started) * 1000
+        histograms = self.histograms.setdefault(trace.command, {})
+        histograms.setdefault('total', LatencyHistogram()).observe(trace.duration_ms)
+        for kind, total in trace.breakdown().items():
+            histograms.setdefault(kind, LatencyHistogram()).observe(total)
+        
+        logger.info(
+            "/%s finished in %.1f ms", trace.command, trace.duration_ms,
+            extra={'guild_id': trace.guild_id, 'command': trace.command, 'latency_ms': round(trace.duration_ms, 2)}
+        )
+        if trace.duration_ms >= SLOW_TRACE_MS and random.random() < SLOW_TRACE_SAMPLE_RATE:
+            self.slow_traces += 1
+            slow_trace_logger.warning(json.dumps(trace.to_dict()))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'slow_traces': self.slow_traces,
+            'commands': {
+                command: {kind: histogram.snapshot() for kind, histogram in histograms.items()}
+                for command, histograms in self.histograms.items()
+            }
+        }